@@ -0,0 +1,128 @@
+"""
+Per-request cost of the vehicle-availability search as the fleet grows.
+
+Each vehicle gets a few confirmed bookings around the search day, and a
+batch of availability searches (random 1-4 h windows) is answered with:
+
+- whole-fleet: scan every vehicle, then one conflict query per vehicle
+  (the handler before it was paged)
+- paged: one page of vehicles (pagination.fetch_page, --limit per page) and
+  one conflict query per vehicle on that page, as the handler does now
+
+Reported per search request: DynamoDB requests and read units on the vehicles
+and bookings tables (from the local DynamoDB stand-in). The paged cost stays
+flat while the whole-fleet cost grows with the fleet. Walking every page of
+one search through nextCursor must give exactly the whole-fleet answer (exit
+status 1 otherwise).
+
+Usage:
+    python availability.py [--fleets 100,1000,10000] [--searches 20] [--limit 20]
+"""
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions', 'common-layer', 'python'))
+
+from local_dynamo import LocalDynamoDB, LocalClient
+from pagination import items, fetch_page
+from booking_times import find_conflicts
+from booking_reservations import slot_window
+
+VEHICLES = 'DALScooterVehicles'
+BOOKINGS = 'DALScooterBookings'
+DAY = 1767225600  # 2026-01-01T00:00:00Z
+
+def build_tables(fleet, rng):
+    db = LocalDynamoDB()
+    vehicles = db.create_table(VEHICLES, 'vehicleID')
+    bookings = db.create_table(BOOKINGS, 'bookingID')
+    bookings.add_index('VehicleStartIndex', 'vehicleID', 'startEpoch')
+    booking_count = 0
+    for index in range(fleet):
+        vehicle_id = f"V{index:06d}"
+        vehicles.put_item(Item={'vehicleID': vehicle_id, 'type': 'eBike', 'operatorID': 'op@dal.ca'})
+        for _ in range(rng.randint(0, 3)):
+            start = DAY + rng.randint(0, 22) * 3600
+            bookings.put_item(Item={
+                'bookingID': f"B{booking_count:08d}",
+                'vehicleID': vehicle_id,
+                'startEpoch': start,
+                'endEpoch': start + rng.randint(1, 3) * 3600,
+                'status': 'confirmed'
+            })
+            booking_count += 1
+    return db
+
+def whole_fleet(db, client, window):
+    return [
+        vehicle['vehicleID'] for vehicle in items(db.Table(VEHICLES).scan)
+        if not find_conflicts(client, BOOKINGS, vehicle['vehicleID'], *window)
+    ]
+
+def paged(db, client, window, limit, cursor=None):
+    vehicles, next_cursor = fetch_page(db.Table(VEHICLES).scan, limit, cursor, scope={'type': None})
+    free = [vehicle['vehicleID'] for vehicle in vehicles if not find_conflicts(client, BOOKINGS, vehicle['vehicleID'], *window)]
+    return free, next_cursor
+
+def cost(db, run):
+    """(requests, read units) spent by run() on both tables"""
+    tables = [db.Table(VEHICLES), db.Table(BOOKINGS)]
+    before = [(table.requests, table.read_units) for table in tables]
+    result = run()
+    requests = sum(table.requests - b[0] for table, b in zip(tables, before))
+    units = sum(table.read_units - b[1] for table, b in zip(tables, before))
+    return result, requests, units
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fleets', default='100,1000,10000', help='Comma-separated fleet sizes')
+    parser.add_argument('--searches', type=int, default=20, help='Availability searches per fleet size')
+    parser.add_argument('--limit', type=int, default=20, help='Vehicles per page')
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'fleet':>7} {'fleet requests':>15} {'fleet RCU':>10} {'paged requests':>15} {'paged RCU':>10} {'pages':>6} {'mismatches':>11}")
+    mismatches = 0
+    for fleet in [int(value) for value in args.fleets.split(',')]:
+        rng = random.Random(args.seed)
+        db = build_tables(fleet, rng)
+        client = LocalClient(db)
+
+        totals = {'fleet': [0, 0.0], 'paged': [0, 0.0]}
+        page_count = 0
+        fleet_mismatches = 0
+        for search in range(args.searches):
+            start = DAY + rng.randint(0, 20) * 3600
+            window = slot_window(start, start + rng.randint(1, 4) * 3600)
+
+            expected, requests, units = cost(db, lambda: whole_fleet(db, client, window))
+            totals['fleet'][0] += requests
+            totals['fleet'][1] += units
+
+            _, requests, units = cost(db, lambda: paged(db, client, window, args.limit))
+            totals['paged'][0] += requests
+            totals['paged'][1] += units
+
+            # Walk every page of the first search and compare with the whole-fleet answer
+            if search == 0:
+                found, cursor = paged(db, client, window, args.limit)
+                page_count = 1
+                while cursor:
+                    more, cursor = paged(db, client, window, args.limit, cursor)
+                    found.extend(more)
+                    page_count += 1
+                fleet_mismatches = len(set(found) ^ set(expected))
+        mismatches += fleet_mismatches
+
+        print(f"{fleet:>7} {totals['fleet'][0] / args.searches:>15.1f} {totals['fleet'][1] / args.searches:>10.1f} "
+              f"{totals['paged'][0] / args.searches:>15.1f} {totals['paged'][1] / args.searches:>10.1f} "
+              f"{page_count:>6} {fleet_mismatches:>11}")
+
+    if mismatches:
+        print(f"FAIL: paged answers differ from the whole-fleet answer for {mismatches} vehicles")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
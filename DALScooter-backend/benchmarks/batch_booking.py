@@ -0,0 +1,116 @@
+"""
+Group booking cost: one reserve() per booking vs booking_reservations.reserve_batch.
+
+For each group size, books that many vehicles (2 h each) for one customer
+against the local DynamoDB stand-in with a simulated round trip per call,
+and reports DynamoDB calls and wall time per group. Requests through
+book_vehicle also pay one SNS publish each; batch-book-vehicles publishes
+once per operator (the --operators column).
+
+It then checks the all-or-nothing guarantee: a group whose last booking
+collides with a confirmed one must leave no bookings behind, even when the
+group spans several transactions.
+
+Usage:
+    python batch_booking.py [--sizes 1,5,10,25] [--latency-ms 5] [--operators 2]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions', 'common-layer', 'python'))
+
+from local_dynamo import LocalDynamoDB, LocalClient
+from booking_ids import new_booking_id
+from booking_reservations import reserve, reserve_batch, reservation_chunks, SlotUnavailable, LOCK_TABLE_NAME
+
+TABLE = 'DALScooterBookings'
+DAY_START = 1767258000  # 2026-01-01T09:00:00Z
+
+class CountingClient(LocalClient):
+    """LocalClient counting transact_write_items calls"""
+
+    def __init__(self, db, latency=0.0):
+        super().__init__(db, latency)
+        self.calls = 0
+
+    def transact_write_items(self, TransactItems):
+        self.calls += 1
+        return super().transact_write_items(TransactItems)
+
+def make_db():
+    db = LocalDynamoDB()
+    db.create_table(TABLE, 'bookingID')
+    db.create_table(LOCK_TABLE_NAME, 'lockKey')
+    return db
+
+def group(size, day=0):
+    reservations = []
+    for index in range(size):
+        start = DAY_START + day * 86400
+        end = start + 2 * 3600
+        vehicle_id = f"V{index}"
+        reservations.append(({
+            'bookingID': {'S': new_booking_id()},
+            'vehicleID': {'S': vehicle_id},
+            'startEpoch': {'N': str(start)},
+            'endEpoch': {'N': str(end)},
+            'status': {'S': 'pending'}
+        }, vehicle_id, start, end))
+    return reservations
+
+def stored(db):
+    return sum(item is not None for item in db.Table(TABLE).items), sum(item is not None for item in db.Table(LOCK_TABLE_NAME).items)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1,5,10,25', help='Comma-separated group sizes')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='Simulated round trip per DynamoDB/SNS call')
+    parser.add_argument('--operators', type=int, default=2, help='Distinct operators owning the vehicles of a group')
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    print(f"{'group':>6} {'single calls':>13} {'single ms':>10} {'batch calls':>12} {'batch ms':>9} {'publishes':>16}")
+    for size in [int(value) for value in args.sizes.split(',')]:
+        db = make_db()
+        client = CountingClient(db, latency)
+        started = time.perf_counter()
+        for reservation in group(size):
+            reserve(client, *reservation, table_name=TABLE, claim=False)
+            time.sleep(latency)  # SNS publish per booking
+        single_ms = (time.perf_counter() - started) * 1000
+        single_calls = client.calls
+
+        db = make_db()
+        client = CountingClient(db, latency)
+        started = time.perf_counter()
+        reserve_batch(client, group(size), table_name=TABLE, claim=False)
+        publishes = min(size, args.operators)
+        time.sleep(latency * publishes)
+        batch_ms = (time.perf_counter() - started) * 1000
+
+        print(f"{size:>6} {single_calls:>13} {single_ms:>10.1f} {client.calls:>12} {batch_ms:>9.1f} {f'{size} -> {publishes}':>16}")
+
+    # All or nothing across transactions: the last booking of a large group collides
+    db = make_db()
+    client = CountingClient(db)
+    # A confirmed booking holding the slots of the group's last booking
+    blocker = group(40, day=1)[-1]
+    reserve(client, *blocker, table_name=TABLE)
+    before = stored(db)
+    reservations = group(40, day=1)
+    chunks = len(list(reservation_chunks(reservations)))
+    try:
+        reserve_batch(client, reservations, table_name=TABLE, claim=False)
+        print("FAIL: conflicting batch was accepted")
+        sys.exit(1)
+    except SlotUnavailable:
+        pass
+    if stored(db) != before:
+        print(f"FAIL: failed batch left items behind ({stored(db)} vs {before})")
+        sys.exit(1)
+    print(f"OK: a conflicting 40-booking group over {chunks} transactions left nothing behind")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Read cost of the book_vehicle conflict check as a vehicle's history grows.
+
+For each history size, one vehicle gets that many past confirmed bookings
+(1-4 h each, back to back going back in time) plus a few upcoming ones, and
+a batch of new booking requests is checked for conflicts with:
+
+- legacy: the previous VehicleIDIndex query on vehicleID with a
+  FilterExpression on ISO strings, which reads the whole history
+- range:  booking_times.find_conflicts, a bounded range query on
+  VehicleStartIndex (vehicleID, startEpoch)
+
+Reported per check: items evaluated and read units (from the local DynamoDB
+stand-in). The range query stays flat while the legacy query grows
+linearly. Each answer is also checked against a brute-force overlap test;
+mixed 'Z'/'+00:00' timestamps make the legacy string comparison miss or
+invent conflicts, which shows up in the "legacy wrong" column.
+
+Usage:
+    python booking_conflicts.py [--sizes 10,100,1000,10000] [--checks 200]
+"""
+import os
+import sys
+import random
+import argparse
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions', 'common-layer', 'python'))
+
+from local_dynamo import LocalDynamoDB, LocalClient
+from booking_times import find_conflicts, to_epoch
+
+TABLE = 'DALScooterBookings'
+NOW = 1767225600  # 2026-01-01T00:00:00Z
+
+def iso(epoch, rng):
+    """Format like the clients do, which is not consistent"""
+    moment = datetime.fromtimestamp(epoch, tz=timezone.utc)
+    if rng.random() < 0.5:
+        return moment.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    return moment.isoformat()
+
+def build_table(history, rng):
+    db = LocalDynamoDB()
+    table = db.create_table(TABLE, 'bookingID')
+    table.add_index('VehicleIDIndex', 'vehicleID')
+    table.add_index('VehicleStartIndex', 'vehicleID', 'startEpoch')
+
+    def add(index, start, end):
+        table.put_item(Item={
+            'bookingID': f"B{index:08d}",
+            'vehicleID': 'V1',
+            'startTime': iso(start, rng),
+            'endTime': iso(end, rng),
+            'startEpoch': start,
+            'endEpoch': end,
+            'email': 'rider@dal.ca',
+            'status': 'confirmed'
+        })
+
+    end = NOW
+    for index in range(history):
+        start = end - rng.randint(1, 4) * 3600
+        add(index, start, end)
+        end = start - rng.randint(0, 6) * 3600
+    # A few upcoming bookings for requests to collide with
+    for offset in range(5):
+        add(history + offset, NOW + offset * 86400 + 9 * 3600, NOW + offset * 86400 + 11 * 3600)
+    return db
+
+def legacy_conflicts(client, vehicle_id, start_time, end_time):
+    response = client.query(
+        TableName=TABLE,
+        IndexName='VehicleIDIndex',
+        KeyConditionExpression='vehicleID = :vehicle_id',
+        FilterExpression='#status = :status AND endTime > :start_time AND startTime < :end_time',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={
+            ':vehicle_id': {'S': vehicle_id},
+            ':status': {'S': 'confirmed'},
+            ':start_time': {'S': start_time},
+            ':end_time': {'S': end_time}
+        }
+    )
+    items = response.get('Items', [])
+    # The legacy handler ignored LastEvaluatedKey; keep paging here so cost is not understated
+    while 'LastEvaluatedKey' in response:
+        response = client.query(
+            TableName=TABLE,
+            IndexName='VehicleIDIndex',
+            KeyConditionExpression='vehicleID = :vehicle_id',
+            FilterExpression='#status = :status AND endTime > :start_time AND startTime < :end_time',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':vehicle_id': {'S': vehicle_id},
+                ':status': {'S': 'confirmed'},
+                ':start_time': {'S': start_time},
+                ':end_time': {'S': end_time}
+            },
+            ExclusiveStartKey=response['LastEvaluatedKey']
+        )
+        items.extend(response.get('Items', []))
+    return items
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10,100,1000,10000', help='Comma-separated history sizes')
+    parser.add_argument('--checks', type=int, default=200, help='Conflict checks per history size')
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    print(f"{'history':>8} {'legacy RCU':>11} {'range RCU':>10} {'legacy items':>13} {'range items':>12} {'legacy wrong':>13} {'range wrong':>12}")
+    for size in [int(value) for value in args.sizes.split(',')]:
+        rng = random.Random(args.seed)
+        db = build_table(size, rng)
+        table = db.Table(TABLE)
+        client = LocalClient(db)
+
+        legacy_units = range_units = 0.0
+        legacy_items = range_items = 0
+        legacy_wrong = range_wrong = 0
+        for _ in range(args.checks):
+            start = NOW + rng.randint(0, 5 * 24) * 3600
+            end = start + rng.randint(1, 4) * 3600
+            start_time, end_time = iso(start, rng), iso(end, rng)
+
+            units, items = table.read_units, table.items_read
+            legacy = legacy_conflicts(client, 'V1', start_time, end_time)
+            legacy_units += table.read_units - units
+            legacy_items += table.items_read - items
+
+            units, items = table.read_units, table.items_read
+            bounded = find_conflicts(client, TABLE, 'V1', to_epoch(start_time), to_epoch(end_time))
+            range_units += table.read_units - units
+            range_items += table.items_read - items
+
+            truth = any(item['startEpoch'] < end and item['endEpoch'] > start for item in table.items)
+            legacy_wrong += bool(legacy) != truth
+            range_wrong += bool(bounded) != truth
+
+        print(f"{size:>8} {legacy_units / args.checks:>11.1f} {range_units / args.checks:>10.1f} "
+              f"{legacy_items / args.checks:>13.0f} {range_items / args.checks:>12.1f} {legacy_wrong:>13} {range_wrong:>12}")
+
+if __name__ == '__main__':
+    main()
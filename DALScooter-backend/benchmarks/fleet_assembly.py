@@ -0,0 +1,131 @@
+"""
+Scaling benchmark for the vehicle/booking/feedback join behind get-vehicles.
+
+Builds synthetic tables in the local DynamoDB stand-in (default 10k vehicles,
+1M bookings, 100k feedback items) and compares:
+
+- hash join: fleet_assembly.assemble_fleet, following every scan page
+- nested join: the previous get-vehicles code, one scan() per table and a
+  comprehension over all feedback for every vehicle. It is O(vehicles x
+  feedback), so it is timed on --baseline-vehicles vehicles and extrapolated.
+
+--scored-fraction sets how many feedback items already carry the vehicleID
+written by the feedback aggregator (those skip the booking lookup; at 1.0 the
+bookings table is not read at all).
+
+Usage:
+    python fleet_assembly.py [--vehicles 10000] [--bookings 1000000] [--feedback 100000]
+                             [--scored-fraction 0.0] [--baseline-vehicles 200]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions', 'common-layer', 'python'))
+
+from local_dynamo import LocalDynamoDB
+from fleet_assembly import assemble_fleet
+
+def build_tables(args, rng):
+    db = LocalDynamoDB()
+    vehicles = db.create_table('DALScooterVehicles', 'vehicleID')
+    bookings = db.create_table('DALScooterBookings', 'bookingID')
+    feedback = db.create_table('DALScooter-FeedbackTable', 'feedbackId')
+    db.create_table('DALScooter-VehicleSentiment', 'vehicleID')
+
+    vehicle_ids = [f"V{index:07d}" for index in range(args.vehicles)]
+    vehicles.load({
+        'vehicleID': vehicle_id,
+        'type': rng.choice(['eBike', 'Gyroscooter', 'Segway']),
+        'operatorID': f"operator{index % 50}@dal.ca",
+        'hourlyRate': 10
+    } for index, vehicle_id in enumerate(vehicle_ids))
+
+    booking_vehicles = [rng.choice(vehicle_ids) for _ in range(args.bookings)]
+    bookings.load({
+        'bookingID': f"B{index:08d}",
+        'vehicleID': vehicle_id,
+        'email': f"user{index % 5000}@dal.ca",
+        'status': 'confirmed'
+    } for index, vehicle_id in enumerate(booking_vehicles))
+
+    for index in range(args.feedback):
+        booking_index = rng.randrange(args.bookings)
+        item = {
+            'feedbackId': f"F{index:08d}",
+            'bookingReferenceCode': f"B{booking_index:08d}",
+            'feedbackMessage': 'Smooth ride, would book again',
+            'timestamp': '2025-07-01T12:00:00Z'
+        }
+        if rng.random() < args.scored_fraction:
+            item['vehicleID'] = booking_vehicles[booking_index]
+        feedback.put_item(Item=item)
+    return db
+
+def nested_join(db, vehicle_limit):
+    """The original get-vehicles join, single scan() per table"""
+    vehicles = db.Table('DALScooterVehicles').scan()['Items'][:vehicle_limit]
+    bookings = db.Table('DALScooterBookings').scan()['Items']
+    feedbacks = db.Table('DALScooter-FeedbackTable').scan()['Items']
+    booking_to_vehicle_map = {}
+    for booking in bookings:
+        booking_to_vehicle_map[booking.get('bookingID')] = booking.get('vehicleID')
+    vehicle_feedbacks = {}
+    for vehicle in vehicles:
+        vehicle_feedbacks[vehicle.get('vehicleID')] = [
+            f for f in feedbacks if f.get('bookingReferenceCode') in booking_to_vehicle_map and booking_to_vehicle_map[f.get('bookingReferenceCode')] == vehicle.get('vehicleID')
+        ]
+    return vehicles, bookings, feedbacks, vehicle_feedbacks
+
+def reset_stats(db):
+    for table in db.tables.values():
+        table.requests = 0
+        table.read_units = 0.0
+
+def report_stats(db):
+    return ', '.join(f"{name}: {table.requests} req / {table.read_units:,.0f} RCU" for name, table in db.tables.items())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vehicles', type=int, default=10000)
+    parser.add_argument('--bookings', type=int, default=1000000)
+    parser.add_argument('--feedback', type=int, default=100000)
+    parser.add_argument('--scored-fraction', type=float, default=0.0)
+    parser.add_argument('--baseline-vehicles', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = build_tables(args, random.Random(args.seed))
+    print(f"setup: {args.vehicles} vehicles, {args.bookings} bookings, {args.feedback} feedback in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    vehicles, feedback_by_vehicle, _ = assemble_fleet(
+        db.Table('DALScooterVehicles'), db.Table('DALScooterBookings'),
+        db.Table('DALScooter-FeedbackTable'), db.Table('DALScooter-VehicleSentiment')
+    )
+    elapsed = time.perf_counter() - start
+    attached = sum(len(items) for items in feedback_by_vehicle.values())
+    print(f"hash join:   {elapsed:.2f}s, {len(vehicles)} vehicles, {attached} feedback attached")
+    print(f"             {report_stats(db)}")
+
+    reset_stats(db)
+    start = time.perf_counter()
+    sample, bookings, feedbacks, nested = nested_join(db, args.baseline_vehicles)
+    elapsed = time.perf_counter() - start
+    extrapolated = elapsed * args.vehicles / max(1, len(sample))
+    print(f"nested join: {elapsed:.2f}s for {len(sample)} vehicles (~{extrapolated:,.0f}s extrapolated to {args.vehicles})")
+    print(f"             single scan() saw {len(bookings)}/{args.bookings} bookings, {len(feedbacks)}/{args.feedback} feedback (1 MB truncation)")
+
+    # The two joins must agree wherever the truncated scans had the data
+    mismatched = sum(
+        1 for vehicle in sample
+        if {f['feedbackId'] for f in nested[vehicle['vehicleID']]}
+        - {f['feedbackId'] for f in feedback_by_vehicle.get(vehicle['vehicleID'], [])}
+    )
+    print(f"             vehicles where nested join found feedback the hash join missed: {mismatched}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,426 @@
+"""
+In-memory stand-in for the boto3 DynamoDB Table resource, for benchmarks.
+
+Only what the benchmarks exercise is implemented, with DynamoDB's paging
+semantics: a scan or query page ends after `Limit` items or once the
+evaluated data reaches 1 MB, and LastEvaluatedKey/ExclusiveStartKey resume
+it. Queries run against global secondary indexes declared with add_index()
+and accept string key condition and filter expressions made of
+`a = :v`, `a < :v` (and <=, >, >=) and `a BETWEEN :x AND :y` terms joined
+with AND; scans take the same filters or a single attribute_exists() /
+attribute_not_exists(). Table.update_item applies `SET` and `REMOVE`
+expressions. Expression values may be plain or low-level typed ({'S': ...}).
+
+LocalClient mimics boto3.client('dynamodb') for conditional writes and
+transactions (attribute_exists/attribute_not_exists and comparison
+conditions, `SET a = :x, b = :y` updates inside transactions, and
+ReturnValuesOnConditionCheckFailure). Each call is applied atomically under
+one lock after an optional simulated network latency, so concurrent callers
+interleave the way they would against DynamoDB.
+
+Every table counts requests and read capacity (4 KB units, eventually
+consistent reads at half a unit per 4 KB, charged on everything a scan or
+key condition evaluated) so benchmarks can report DynamoDB cost alongside
+wall time.
+"""
+import math
+import time
+import threading
+from types import SimpleNamespace
+from decimal import Decimal
+from bisect import bisect_left, bisect_right
+
+PAGE_BYTES = 1024 * 1024
+
+def item_size(item):
+    """Approximate DynamoDB item size: attribute names plus values"""
+    return sum(len(name) + len(str(value)) for name, value in item.items())
+
+def plain_value(value):
+    """Low-level typed value ({'S': ...}/{'N': ...}) -> Python value"""
+    if isinstance(value, dict) and len(value) == 1:
+        kind, raw = next(iter(value.items()))
+        if kind == 'N':
+            return Decimal(raw)
+        if kind in ('S', 'BOOL'):
+            return raw
+    return value
+
+def typed_value(value):
+    """Python value -> low-level typed value, as the client API returns items"""
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, (int, float, Decimal)):
+        return {'N': str(value)}
+    return {'S': value}
+
+def parse_conditions(expression, names, values):
+    """'a = :x AND b BETWEEN :l AND :h' -> [(attribute, operator, operands)]"""
+    tokens = expression.split()
+    conditions = []
+    position = 0
+    while position < len(tokens):
+        attribute = names.get(tokens[position], tokens[position])
+        operator = tokens[position + 1]
+        if operator.upper() == 'BETWEEN':
+            operands = (plain_value(values[tokens[position + 2]]), plain_value(values[tokens[position + 4]]))
+            position += 5
+        else:
+            operands = (plain_value(values[tokens[position + 2]]),)
+            position += 3
+        conditions.append((attribute, operator.upper(), operands))
+        if position < len(tokens):
+            if tokens[position].upper() != 'AND':
+                raise NotImplementedError(f"Unsupported expression: {expression}")
+            position += 1
+    return conditions
+
+def matches(item, conditions):
+    for attribute, operator, operands in conditions:
+        if attribute not in item:
+            return False
+        value = item[attribute]
+        if operator == '=' and not value == operands[0]:
+            return False
+        if operator == '<' and not value < operands[0]:
+            return False
+        if operator == '<=' and not value <= operands[0]:
+            return False
+        if operator == '>' and not value > operands[0]:
+            return False
+        if operator == '>=' and not value >= operands[0]:
+            return False
+        if operator == 'BETWEEN' and not operands[0] <= value <= operands[1]:
+            return False
+    return True
+
+class LocalTable:
+    def __init__(self, name, hash_key, range_key=None):
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.items = []
+        self.sizes = []
+        self.positions = {}
+        self.requests = 0
+        self.read_units = 0.0
+        self.items_read = 0
+        self.indexes = {}
+        self.index_data = {}
+
+    def add_index(self, name, hash_key, range_key=None):
+        """Declare a GSI; like DynamoDB it is sparse (items missing a key attribute are left out)"""
+        self.indexes[name] = (hash_key, range_key)
+        self.index_data.pop(name, None)
+
+    def delete_item(self, Key):
+        position = self.positions.pop(self.key_of(Key), None)
+        if position is not None:
+            # Tombstone keeps the positions of later items stable
+            self.items[position] = None
+            self.sizes[position] = 0
+            self.index_data.clear()
+        return {}
+
+    def existing(self, key):
+        position = self.positions.get(self.key_of(key))
+        return None if position is None else self.items[position]
+
+    def key_of(self, item):
+        if self.range_key:
+            return (item[self.hash_key], item[self.range_key])
+        return item[self.hash_key]
+
+    def key_dict(self, item):
+        key = {self.hash_key: item[self.hash_key]}
+        if self.range_key:
+            key[self.range_key] = item[self.range_key]
+        return key
+
+    def put_item(self, Item):
+        key = self.key_of(Item)
+        if key in self.positions:
+            position = self.positions[key]
+            self.items[position] = dict(Item)
+            self.sizes[position] = item_size(Item)
+        else:
+            self.positions[key] = len(self.items)
+            self.items.append(dict(Item))
+            self.sizes.append(item_size(Item))
+        self.index_data.clear()
+        return {}
+
+    def load(self, items):
+        for item in items:
+            self.put_item(Item=item)
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeNames=None, ExpressionAttributeValues=None):
+        """`SET a = :x, ...` or `REMOVE a, ...` on the item at Key (created if absent)"""
+        names = ExpressionAttributeNames or {}
+        item = dict(self.existing(Key) or Key)
+        expression = UpdateExpression.strip()
+        if expression.upper().startswith('REMOVE '):
+            for attribute in expression[7:].split(','):
+                item.pop(names.get(attribute.strip(), attribute.strip()), None)
+        else:
+            item.update(set_values(expression, names, ExpressionAttributeValues))
+        return self.put_item(Item=item)
+
+    def get_item(self, Key, ProjectionExpression=None):
+        self.requests += 1
+        position = self.positions.get(self.key_of(Key))
+        if position is None:
+            self.read_units += 0.5
+            return {}
+        self.read_units += max(0.5, math.ceil(self.sizes[position] / 4096) / 2)
+        return {'Item': project(self.items[position], ProjectionExpression)}
+
+    def scan(self, Limit=None, ExclusiveStartKey=None, ProjectionExpression=None, FilterExpression=None,
+             ExpressionAttributeNames=None, ExpressionAttributeValues=None, **kwargs):
+        if kwargs:
+            raise NotImplementedError(f"Unsupported scan arguments: {sorted(kwargs)}")
+        self.requests += 1
+        start = 0
+        if ExclusiveStartKey:
+            start = self.positions[self.key_of(ExclusiveStartKey)] + 1
+
+        page = []
+        evaluated = 0
+        scanned = 0
+        last = None
+        position = start
+        while position < len(self.items):
+            evaluated += self.sizes[position]
+            item = self.items[position]
+            if item is None:
+                position += 1
+                continue
+            last = item
+            scanned += 1
+            if condition_holds(item, FilterExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+                page.append(project(item, ProjectionExpression))
+            position += 1
+            # Like DynamoDB, Limit counts evaluated items, not filtered ones
+            if (Limit and scanned >= Limit) or evaluated >= PAGE_BYTES:
+                break
+
+        self.read_units += math.ceil(evaluated / 4096) / 2
+        self.items_read += len(page)
+        response = {'Items': page, 'Count': len(page), 'ScannedCount': scanned}
+        if position < len(self.items) and last is not None:
+            response['LastEvaluatedKey'] = self.key_dict(last)
+        return response
+
+    def _index(self, name):
+        # {hash value: (sorted range values, positions)} rebuilt after writes
+        if name not in self.index_data:
+            hash_key, range_key = self.indexes[name]
+            partitions = {}
+            for position, item in enumerate(self.items):
+                if item is not None and hash_key in item and (range_key is None or range_key in item):
+                    partitions.setdefault(item[hash_key], []).append((item[range_key] if range_key else 0, position))
+            self.index_data[name] = {
+                value: ([entry[0] for entry in sorted(entries)], [entry[1] for entry in sorted(entries)])
+                for value, entries in partitions.items()
+            }
+        return self.index_data[name]
+
+    def query(self, IndexName, KeyConditionExpression, FilterExpression=None, ExpressionAttributeNames=None,
+              ExpressionAttributeValues=None, Limit=None, ExclusiveStartKey=None, TableName=None, **kwargs):
+        if kwargs:
+            raise NotImplementedError(f"Unsupported query arguments: {sorted(kwargs)}")
+        self.requests += 1
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        hash_key, range_key = self.indexes[IndexName]
+        key_conditions = parse_conditions(KeyConditionExpression, names, values)
+        hash_value = next(operands[0] for attribute, _, operands in key_conditions if attribute == hash_key)
+        ranges, positions = self._index(IndexName).get(plain_value(hash_value), ([], []))
+
+        low, high = 0, len(ranges)
+        for attribute, operator, operands in key_conditions:
+            if attribute != range_key:
+                continue
+            if operator in ('BETWEEN', '>=', '='):
+                low = max(low, bisect_left(ranges, operands[0]))
+            if operator == '>':
+                low = max(low, bisect_right(ranges, operands[0]))
+            if operator == 'BETWEEN':
+                high = min(high, bisect_right(ranges, operands[1]))
+            if operator in ('<=', '='):
+                high = min(high, bisect_right(ranges, operands[0]))
+            if operator == '<':
+                high = min(high, bisect_left(ranges, operands[0]))
+
+        if ExclusiveStartKey:
+            start_position = self.positions[self.key_of(plain_item(ExclusiveStartKey))]
+            low = positions.index(start_position, low, high) + 1
+
+        filters = parse_conditions(FilterExpression, names, values) if FilterExpression else []
+        page = []
+        evaluated = 0
+        scanned = 0
+        cursor = low
+        while cursor < high:
+            position = positions[cursor]
+            evaluated += self.sizes[position]
+            scanned += 1
+            cursor += 1
+            if matches(self.items[position], filters):
+                page.append(dict(self.items[position]))
+            if (Limit and scanned >= Limit) or evaluated >= PAGE_BYTES:
+                break
+
+        # Reads are charged on everything the key condition touched, before filtering
+        self.read_units += max(0.5, math.ceil(evaluated / 4096) / 2)
+        self.items_read += scanned
+        response = {'Items': page, 'Count': len(page), 'ScannedCount': scanned}
+        if cursor < high:
+            last = self.items[positions[cursor - 1]]
+            response['LastEvaluatedKey'] = self.key_dict(last)
+        return response
+
+    def stats(self):
+        return {'requests': self.requests, 'read_units': self.read_units, 'items_read': self.items_read}
+
+def project(item, expression):
+    """item narrowed to a ProjectionExpression of plain attribute names"""
+    if not expression:
+        return dict(item)
+    return {name: item[name] for name in (part.strip() for part in expression.split(',')) if name in item}
+
+def plain_item(item):
+    return {name: plain_value(value) for name, value in item.items()}
+
+def condition_holds(existing, expression, names=None, values=None):
+    """Evaluate a ConditionExpression against the current item (None if absent)"""
+    if not expression:
+        return True
+    names = names or {}
+    expression = expression.strip()
+    for function, wanted in (('attribute_not_exists', False), ('attribute_exists', True)):
+        if expression.startswith(function + '('):
+            attribute = names.get(expression[len(function) + 1:-1].strip(), expression[len(function) + 1:-1].strip())
+            return (existing is not None and attribute in existing) == wanted
+    return existing is not None and matches(existing, parse_conditions(expression, names, values or {}))
+
+def set_values(expression, names=None, values=None):
+    """'SET a = :x, #b = :y' -> {attribute: plain value}"""
+    names = names or {}
+    expression = expression.strip()
+    if not expression.upper().startswith('SET '):
+        raise NotImplementedError(f"Unsupported update expression: {expression}")
+    updates = {}
+    for assignment in expression[4:].split(','):
+        attribute, placeholder = (part.strip() for part in assignment.split('='))
+        updates[names.get(attribute, attribute)] = plain_value(values[placeholder])
+    return updates
+
+class ClientError(Exception):
+    def __init__(self, code, message, **extra):
+        super().__init__(message)
+        self.response = dict({'Error': {'Code': code, 'Message': message}}, **extra)
+
+class TransactionCanceledException(ClientError):
+    pass
+
+class ConditionalCheckFailedException(ClientError):
+    pass
+
+class LocalClient:
+    """
+    Stand-in for boto3.client('dynamodb'): routes TableName to LocalTables,
+    converting typed keys and returning items as plain values.
+    """
+
+    exceptions = SimpleNamespace(
+        ClientError=ClientError,
+        TransactionCanceledException=TransactionCanceledException,
+        ConditionalCheckFailedException=ConditionalCheckFailedException
+    )
+
+    def __init__(self, db, latency=0.0):
+        self.db = db
+        self.latency = latency
+        self.lock = threading.Lock()
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def query(self, TableName, **kwargs):
+        self._round_trip()
+        with self.lock:
+            return self.db.Table(TableName).query(**kwargs)
+
+    def get_item(self, TableName, Key):
+        self._round_trip()
+        with self.lock:
+            return self.db.Table(TableName).get_item(Key=plain_item(Key))
+
+    def put_item(self, TableName, Item, ConditionExpression=None, ExpressionAttributeNames=None, ExpressionAttributeValues=None):
+        self._round_trip()
+        table = self.db.Table(TableName)
+        item = plain_item(Item)
+        with self.lock:
+            if not condition_holds(table.existing(item), ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+                raise ConditionalCheckFailedException('ConditionalCheckFailedException', 'The conditional request failed')
+            return table.put_item(Item=item)
+
+    def delete_item(self, TableName, Key, ConditionExpression=None, ExpressionAttributeNames=None, ExpressionAttributeValues=None):
+        self._round_trip()
+        table = self.db.Table(TableName)
+        key = plain_item(Key)
+        with self.lock:
+            if not condition_holds(table.existing(key), ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+                raise ConditionalCheckFailedException('ConditionalCheckFailedException', 'The conditional request failed')
+            return table.delete_item(Key=key)
+
+    def transact_write_items(self, TransactItems):
+        """All-or-nothing Put/Update/Delete/ConditionCheck with per-item cancellation reasons"""
+        self._round_trip()
+        operations = []
+        for entry in TransactItems:
+            kind, operation = next(iter(entry.items()))
+            table = self.db.Table(operation['TableName'])
+            key = plain_item(operation['Item'] if kind == 'Put' else operation['Key'])
+            operations.append((kind, operation, table, key))
+
+        with self.lock:
+            reasons = []
+            for kind, operation, table, key in operations:
+                existing = table.existing(key)
+                holds = condition_holds(
+                    existing, operation.get('ConditionExpression'),
+                    operation.get('ExpressionAttributeNames'), operation.get('ExpressionAttributeValues')
+                )
+                reason = {'Code': 'None' if holds else 'ConditionalCheckFailed'}
+                if not holds and existing and operation.get('ReturnValuesOnConditionCheckFailure') == 'ALL_OLD':
+                    reason['Item'] = {name: typed_value(value) for name, value in existing.items()}
+                reasons.append(reason)
+            if any(reason['Code'] != 'None' for reason in reasons):
+                raise TransactionCanceledException(
+                    'TransactionCanceledException', 'Transaction cancelled', CancellationReasons=reasons
+                )
+            for kind, operation, table, key in operations:
+                if kind == 'Put':
+                    table.put_item(Item=key)
+                elif kind == 'Update':
+                    updates = set_values(operation['UpdateExpression'], operation.get('ExpressionAttributeNames'), operation.get('ExpressionAttributeValues'))
+                    table.put_item(Item=dict(table.existing(key) or key, **updates))
+                elif kind == 'Delete':
+                    table.delete_item(Key=key)
+        return {}
+
+class LocalDynamoDB:
+    """Stand-in for boto3.resource('dynamodb'), holding named LocalTables"""
+
+    def __init__(self):
+        self.tables = {}
+
+    def create_table(self, name, hash_key, range_key=None):
+        self.tables[name] = LocalTable(name, hash_key, range_key)
+        return self.tables[name]
+
+    def Table(self, name):
+        return self.tables[name]
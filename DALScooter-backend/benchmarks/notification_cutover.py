@@ -0,0 +1,182 @@
+"""
+Notification delivery while users move from per-user topics to the shared topic.
+
+A local users table and SNS stand-in hold users at every stage of the
+migration:
+
+- not migrated: per-user topic only (topicArn, no shared subscription yet)
+- pending: subscribed to the shared topic, confirmation not clicked yet
+- confirmed: shared subscription confirmed
+- new: created after the cutover, shared subscription only
+
+Each phase notifies every user once through user_notifications.publish and
+once through an outbox notification_put (relayed to SNS the way
+outbox-relay does), then counts what reached each inbox:
+
+1. before --migrate
+2. after --migrate --delete-topics, nobody confirmed yet (new users
+   provisioned on the shared topic only)
+3. after a second --delete-topics run, with the confirmed users confirmed
+   and the not-migrated users signed up since
+4. the same, with USER_NOTIFICATIONS_LEGACY_TOPICS=off (shared topic only,
+   as before the fallback) to show who would miss messages
+
+Every user must get each message exactly once in phases 1-3 (exit status 1
+otherwise).
+
+Usage:
+    python notification_cutover.py [--users 40]
+"""
+import os
+import sys
+import json
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions', 'common-layer', 'python'))
+
+SHARED_TOPIC = 'arn:aws:sns:us-east-1:000000000000:DALScooterUserNotifications'
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ['USER_NOTIFICATIONS_TOPIC_ARN'] = SHARED_TOPIC
+
+from local_dynamo import LocalDynamoDB
+import user_notifications
+
+USERS = 'DALScooterUsers'
+STAGES = ['not migrated', 'pending', 'confirmed', 'new']
+
+class NotFoundException(Exception):
+    pass
+
+class LocalSNS:
+    """Topics, email subscriptions with filter policies, and the inboxes they deliver to"""
+
+    def __init__(self):
+        self.topics = {SHARED_TOPIC: []}  # topic ARN -> [subscription ARN]
+        self.subscriptions = {}  # subscription ARN -> {'endpoint', 'filter', 'confirmed'}
+        self.inboxes = Counter()  # (endpoint, message) -> deliveries
+
+    def user_topic(self, email):
+        """A per-user topic with the user's confirmed subscription, as signup used to create"""
+        arn = f"arn:aws:sns:us-east-1:000000000000:DALScooter-Notifications-{email.replace('@', '-')}"
+        self.topics[arn] = []
+        self.subscribe(arn, 'email', email, confirmed=True)
+        return arn
+
+    def subscribe(self, TopicArn, Protocol, Endpoint, Attributes=None, ReturnSubscriptionArn=False, confirmed=False):
+        arn = f"{TopicArn}:{len(self.subscriptions)}"
+        policy = json.loads((Attributes or {}).get('FilterPolicy', 'null'))
+        self.subscriptions[arn] = {'endpoint': Endpoint, 'filter': policy, 'confirmed': confirmed}
+        self.topics[TopicArn].append(arn)
+        return {'SubscriptionArn': arn}
+
+    def confirm(self, subscription_arn):
+        self.subscriptions[subscription_arn]['confirmed'] = True
+
+    def get_subscription_attributes(self, SubscriptionArn):
+        confirmed = self.subscriptions[SubscriptionArn]['confirmed']
+        return {'Attributes': {'PendingConfirmation': 'false' if confirmed else 'true'}}
+
+    def delete_topic(self, TopicArn):
+        for arn in self.topics.pop(TopicArn, []):
+            self.subscriptions.pop(arn, None)
+
+    def publish(self, TopicArn, Message, MessageAttributes=None, Subject=None):
+        if TopicArn not in self.topics:
+            raise NotFoundException(f"Topic does not exist: {TopicArn}")
+        attributes = {name: value['StringValue'] for name, value in (MessageAttributes or {}).items()}
+        for arn in self.topics[TopicArn]:
+            subscription = self.subscriptions[arn]
+            policy = subscription['filter']
+            if not subscription['confirmed']:
+                continue
+            if policy and any(attributes.get(name) not in allowed for name, allowed in policy.items()):
+                continue
+            self.inboxes[(subscription['endpoint'], Message)] += 1
+        return {'MessageId': str(sum(self.inboxes.values()))}
+
+def relay(sns, put):
+    """Publish an outbox Put the way outbox-relay does"""
+    item = put['Put']['Item']
+    attributes = {name: {'DataType': 'String', 'StringValue': value['S']} for name, value in item['attributes']['M'].items()}
+    sns.publish(TopicArn=item['topicArn']['S'], Message=item['message']['S'], MessageAttributes=attributes)
+
+def notify_everyone(sns, users, phase):
+    """(delivered once, missed, duplicated, publish errors) over both messages of every user"""
+    errors = 0
+    messages = []
+    for email in users:
+        direct = f"{phase}: direct to {email}"
+        queued = f"{phase}: outbox to {email}"
+        messages += [(email, direct), (email, queued)]
+        try:
+            user_notifications.publish(email, direct, subject='DALScooter')
+            relay(sns, user_notifications.notification_put(email, queued, subject='DALScooter'))
+        except NotFoundException:
+            errors += 1
+    counts = Counter(sns.inboxes[message] for message in messages)
+    return counts[1], counts[0], sum(count for deliveries, count in counts.items() if deliveries > 1), errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=40, help='Users per migration stage')
+    args = parser.parse_args()
+
+    db = LocalDynamoDB()
+    table = db.create_table(USERS, 'userID')
+    sns = LocalSNS()
+    user_notifications.sns = sns
+    user_notifications.dynamodb = db
+
+    stages = {stage: [f"{stage.replace(' ', '-')}{index}@dal.ca" for index in range(args.users)] for stage in STAGES}
+    results = []
+
+    def phase(name, legacy, users):
+        user_notifications.LEGACY_TOPICS = legacy
+        results.append((name, legacy, len(users)) + notify_everyone(sns, users, name))
+
+    def add_users(emails, legacy_topic=False):
+        for email in emails:
+            item = {'userID': email, 'email': email}
+            if legacy_topic:
+                item['topicArn'] = sns.user_topic(email)
+            else:
+                # Provisioned on the shared topic and confirmed right away
+                item['notificationSubscriptionArn'] = user_notifications.subscribe(email)
+                sns.confirm(item['notificationSubscriptionArn'])
+            table.put_item(Item=item)
+
+    migrating = stages['pending'] + stages['confirmed']
+    add_users(migrating, legacy_topic=True)
+    phase('before --migrate', True, migrating)
+
+    # Nobody has confirmed the new subscriptions yet, so nothing is deleted
+    user_notifications.migrate(USERS, delete_topics=True)
+    add_users(stages['new'])
+    phase('after --migrate, none confirmed', True, migrating + stages['new'])
+
+    for email in stages['confirmed']:
+        sns.confirm(table.get_item(Key={'userID': email})['Item']['notificationSubscriptionArn'])
+    summary = user_notifications.migrate(USERS, delete_topics=True)
+    # Signed up through the old per-user topic path after the last --migrate run
+    add_users(stages['not migrated'], legacy_topic=True)
+    everyone = [email for stage in STAGES for email in stages[stage]]
+    phase('after --delete-topics, some confirmed', True, everyone)
+    phase('same, shared topic only', False, everyone)
+
+    print(f"{'phase':<40} {'legacy':>7} {'users':>6} {'once':>6} {'missed':>7} {'duplicated':>11} {'errors':>7}")
+    failed = False
+    for name, legacy, users, delivered, missed, duplicated, errors in results:
+        print(f"{name:<40} {'on' if legacy else 'off':>7} {users:>6} {delivered:>6} {missed:>7} {duplicated:>11} {errors:>7}")
+        if legacy and (missed or duplicated or errors):
+            failed = True
+    print(f"last --delete-topics run: {summary}")
+    remaining = {stage: sum(1 for email in stages[stage] if 'topicArn' in table.get_item(Key={'userID': email})['Item']) for stage in STAGES}
+    print(f"users still on a per-user topic: {remaining}")
+
+    if failed:
+        print("FAIL: users missed or duplicated notifications while per-user topics were in use")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
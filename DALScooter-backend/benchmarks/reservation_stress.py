@@ -0,0 +1,139 @@
+"""
+Concurrency stress test for booking slot reservation.
+
+Stores thousands of pending booking requests for a handful of vehicles and
+then accepts all of them from many threads against the local DynamoDB
+stand-in (with simulated round-trip latency, so requests interleave like
+Lambdas do), and checks the confirmed bookings for overlaps:
+
+- confirm:         booking_reservations.confirm, one transaction flipping the
+                   booking to confirmed and claiming its slot locks
+- check-then-put:  the previous approach, a conflict query followed by a
+                   separate write
+
+The confirm mode must produce zero double bookings; the script exits with
+status 1 otherwise. check-then-put is run for comparison and is expected to
+double book under contention.
+
+Usage:
+    python reservation_stress.py [--requests 5000] [--threads 32] [--vehicles 5] [--latency-ms 0.5]
+"""
+import os
+import sys
+import uuid
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions', 'common-layer', 'python'))
+
+from local_dynamo import LocalDynamoDB, LocalClient
+from booking_times import find_conflicts
+from booking_reservations import reserve, confirm, SlotUnavailable, LOCK_TABLE_NAME, SLOT_SECONDS
+
+TABLE = 'DALScooterBookings'
+DAY_START = 1767225600  # 2026-01-01T00:00:00Z
+
+def make_db():
+    db = LocalDynamoDB()
+    bookings = db.create_table(TABLE, 'bookingID')
+    bookings.add_index('VehicleStartIndex', 'vehicleID', 'startEpoch')
+    db.create_table(LOCK_TABLE_NAME, 'lockKey')
+    return db
+
+def booking_item(booking_id, vehicle_id, start, end):
+    return {
+        'bookingID': {'S': booking_id},
+        'vehicleID': {'S': vehicle_id},
+        'startEpoch': {'N': str(start)},
+        'endEpoch': {'N': str(end)},
+        'status': {'S': 'pending'}
+    }
+
+def request_windows(count, vehicles, seed):
+    """Slot-aligned windows of 1-8 slots within one busy day"""
+    rng = random.Random(seed)
+    windows = []
+    for _ in range(count):
+        start = DAY_START + rng.randrange(0, 24 * 3600 // SLOT_SECONDS) * SLOT_SECONDS
+        windows.append((f"V{rng.randrange(vehicles)}", start, start + rng.randint(1, 8) * SLOT_SECONDS))
+    return windows
+
+def via_confirm(client, booking_id, vehicle_id, start, end):
+    try:
+        confirm(client, booking_id, vehicle_id, start, end, table_name=TABLE)
+        return True
+    except SlotUnavailable:
+        return False
+
+def via_check_then_put(client, booking_id, vehicle_id, start, end):
+    if find_conflicts(client, TABLE, vehicle_id, start, end):
+        return False
+    item = booking_item(booking_id, vehicle_id, start, end)
+    item['status'] = {'S': 'confirmed'}
+    client.put_item(TableName=TABLE, Item=item)
+    return True
+
+def double_bookings(db):
+    """Pairs of confirmed bookings of the same vehicle whose windows overlap"""
+    by_vehicle = {}
+    for item in db.Table(TABLE).items:
+        if item is not None and item['status'] == 'confirmed':
+            by_vehicle.setdefault(item['vehicleID'], []).append((int(item['startEpoch']), int(item['endEpoch'])))
+    overlaps = 0
+    for windows in by_vehicle.values():
+        windows.sort()
+        latest_end = None
+        for start, end in windows:
+            if latest_end is not None and start < latest_end:
+                overlaps += 1
+            latest_end = end if latest_end is None else max(latest_end, end)
+    return overlaps, sum(len(windows) for windows in by_vehicle.values())
+
+def run(mode, attempt, windows, threads, latency):
+    db = make_db()
+    client = LocalClient(db, latency=latency)
+    # Pending requests hold no locks, so all of them are stored
+    requests = []
+    for vehicle_id, start, end in windows:
+        booking_id = str(uuid.uuid4())
+        reserve(LocalClient(db), booking_item(booking_id, vehicle_id, start, end), vehicle_id, start, end, table_name=TABLE, claim=False)
+        requests.append((booking_id, vehicle_id, start, end))
+    accepted = [0]
+    counter_lock = threading.Lock()
+
+    def accept(request):
+        if attempt(client, *request):
+            with counter_lock:
+                accepted[0] += 1
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(accept, requests))
+
+    overlaps, confirmed = double_bookings(db)
+    print(f"{mode:<15} {len(requests)} requests, {accepted[0]} accepted, {confirmed} confirmed, {overlaps} double bookings")
+    return overlaps
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--vehicles', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=0.5, help='Simulated DynamoDB round trip per call')
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    windows = request_windows(args.requests, args.vehicles, args.seed)
+    latency = args.latency_ms / 1000
+
+    confirm_overlaps = run('confirm', via_confirm, windows, args.threads, latency)
+    run('check-then-put', via_check_then_put, windows, args.threads, latency)
+
+    if confirm_overlaps:
+        print("FAIL: confirm produced double bookings")
+        sys.exit(1)
+    print("OK: no double bookings with transactional reservation")
+
+if __name__ == '__main__':
+    main()
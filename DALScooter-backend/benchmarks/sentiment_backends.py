@@ -0,0 +1,74 @@
+"""
+Compare sentiment backends on the fixture feedback corpus.
+
+Reports throughput (messages/second) and label agreement with the reference
+labels in fixtures/feedback_corpus.json. With --google (requires AWS/GCP
+credentials) the Google NL backend is scored on the same corpus and the
+agreement between the two backends is reported as well.
+
+The cached run replays the corpus through the in-process sentiment cache and
+prints its hit/miss counters.
+
+Usage:
+    python sentiment_backends.py [--messages 20000] [--google]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions', 'common-layer', 'python'))
+
+from sentiment import get_backend, sentiment_label, cache_stats
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'feedback_corpus.json')
+
+def load_corpus():
+    with open(FIXTURE) as f:
+        return json.load(f)
+
+def run_backend(backend, texts):
+    start = time.perf_counter()
+    results = backend.analyze_batch(texts)
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+def agreement(labels, expected):
+    matches = sum(1 for label, reference in zip(labels, expected) if label == reference)
+    return matches / len(expected) if expected else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=20000, help='Messages per throughput batch')
+    parser.add_argument('--google', action='store_true', help='Also score the corpus with Google NL')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    texts = [entry['text'] for entry in corpus]
+    expected = [entry['label'] for entry in corpus]
+
+    lexicon = get_backend('lexicon', cached=False)
+    results, _ = run_backend(lexicon, texts)
+    lexicon_labels = [sentiment_label(score) for score, _ in results]
+    print(f"lexicon: label agreement with fixture {agreement(lexicon_labels, expected):.1%} ({len(texts)} messages)")
+
+    batch = (texts * (args.messages // len(texts) + 1))[:args.messages]
+    _, elapsed = run_backend(lexicon, batch)
+    print(f"lexicon: {len(batch)} messages in {elapsed:.3f}s ({len(batch) / elapsed:,.0f} msg/s)")
+
+    cached = get_backend('lexicon', cached=True)
+    _, cold = run_backend(cached, batch)
+    _, warm = run_backend(cached, batch)
+    print(f"lexicon (cached): cold {cold:.3f}s, warm {warm:.3f}s, stats {cache_stats()}")
+
+    if args.google:
+        google = get_backend('google', cached=False)
+        results, elapsed = run_backend(google, texts)
+        google_labels = [sentiment_label(score) for score, _ in results]
+        print(f"google:  label agreement with fixture {agreement(google_labels, expected):.1%}")
+        print(f"google:  {len(texts)} messages in {elapsed:.3f}s ({len(texts) / elapsed:,.1f} msg/s)")
+        print(f"lexicon vs google label agreement: {agreement(lexicon_labels, google_labels):.1%}")
+
+if __name__ == '__main__':
+    main()
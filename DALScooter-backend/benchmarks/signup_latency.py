@@ -0,0 +1,201 @@
+"""
+Signup latency: provisioning inside the request vs the queued worker.
+
+Runs the call sequence of auth-handler's signup branch against local
+stand-ins with simulated latency (and an occasional slow or failing SNS
+call), for many concurrent signups:
+
+- per-user-topic: cognito.sign_up, put_item, sns.create_topic, update_item,
+  sns.subscribe (the original handler)
+- shared-sync: cognito.sign_up, sns.subscribe to the shared notification
+  topic, put_item
+- queued: cognito.sign_up and one transaction storing the user and its
+  provisioning job in the outbox (the current handler)
+
+and reports latency percentiles and failed signups per flow. It then drains
+the queued jobs through user_provisioning.provision with SQS-style
+redelivery, to show that every user ends up provisioned or failed with its
+status recorded.
+
+Usage:
+    python signup_latency.py [--signups 200] [--concurrency 20]
+        [--cognito-ms 150] [--dynamo-ms 10] [--sns-ms 40]
+        [--sns-tail-ms 1500] [--sns-tail-rate 0.05] [--sns-failure-rate 0.02]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions', 'common-layer', 'python'))
+
+from local_dynamo import LocalDynamoDB, LocalClient
+from user_provisioning import provisioning_job, provision, MAX_PROVISIONING_ATTEMPTS, PENDING
+
+USERS = 'DALScooterUsers'
+OUTBOX = 'DALScooterOutbox'
+
+class ServiceError(Exception):
+    pass
+
+class Service:
+    """A remote call with base latency plus an occasional slow tail or failure"""
+
+    def __init__(self, latency_ms, tail_ms=0.0, tail_rate=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency_ms / 1000
+        self.tail = tail_ms / 1000
+        self.tail_rate = tail_rate
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def call(self):
+        with self.lock:
+            self.calls += 1
+            jitter = self.random.uniform(0.8, 1.2)
+            slow = self.random.random() < self.tail_rate
+            failed = self.random.random() < self.failure_rate
+        time.sleep(self.latency * jitter + (self.tail if slow else 0.0))
+        if failed:
+            raise ServiceError('simulated service error')
+
+class ProfileTable:
+    """Records provisioning status updates the way the users table would"""
+
+    def __init__(self):
+        self.status = {}
+        self.lock = threading.Lock()
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues):
+        with self.lock:
+            self.status[Key['userID']] = ExpressionAttributeValues[':status']
+
+def user_item(email):
+    return {
+        'userID': {'S': email},
+        'name': {'S': 'Benchmark User'},
+        'role': {'S': 'Customer'},
+        'securityQuestion': {'S': 'First scooter?'},
+        'hashedAnswer': {'S': 'x' * 64}
+    }
+
+def per_user_topic(services, client, email):
+    services['cognito'].call()
+    client.put_item(TableName=USERS, Item=user_item(email))
+    services['sns'].call()  # create_topic
+    services['dynamo'].call()  # update_item topicArn
+    services['sns'].call()  # subscribe
+
+def shared_sync(services, client, email):
+    services['cognito'].call()
+    services['sns'].call()  # subscribe with filter policy
+    client.put_item(TableName=USERS, Item=user_item(email))
+
+def queued(services, client, email):
+    services['cognito'].call()
+    item = user_item(email)
+    item['provisioningStatus'] = {'S': PENDING}
+    client.transact_write_items(TransactItems=[
+        {'Put': {'TableName': USERS, 'Item': item}},
+        # Shape of outbox.event_put
+        {'Put': {'TableName': OUTBOX, 'Item': {
+            'eventID': {'S': str(uuid.uuid4())},
+            'message': {'S': json.dumps(provisioning_job(email))}
+        }}}
+    ])
+
+def make_db():
+    db = LocalDynamoDB()
+    db.create_table(USERS, 'userID')
+    db.create_table(OUTBOX, 'eventID')
+    return db
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run(flow, args, seed):
+    services = {
+        'cognito': Service(args.cognito_ms, seed=seed),
+        'dynamo': Service(args.dynamo_ms, seed=seed + 1),
+        'sns': Service(args.sns_ms, args.sns_tail_ms, args.sns_tail_rate, args.sns_failure_rate, seed=seed + 2)
+    }
+    db = make_db()
+    client = LocalClient(db, args.dynamo_ms / 1000)
+
+    def signup(index):
+        started = time.perf_counter()
+        try:
+            flow(services, client, f"user{index}@example.com")
+            ok = True
+        except ServiceError:
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(signup, range(args.signups)))
+    latencies = [latency for latency, _ in results]
+    failed = sum(not ok for _, ok in results)
+    return latencies, failed, services['sns'].calls, db
+
+def drain(db, args):
+    """Deliver every queued job to provision() until it succeeds or runs out of attempts"""
+    sns = Service(args.sns_ms, args.sns_tail_ms, args.sns_tail_rate, args.sns_failure_rate, seed=99)
+    table = ProfileTable()
+
+    def subscribe(user_id, email):
+        sns.call()
+        return f"arn:aws:sns:local:000000000000:DALScooterUserNotifications:{user_id}"
+
+    jobs = [json.loads(item['message']) for item in db.Table(OUTBOX).items if item is not None]
+    deliveries = 0
+    for job in jobs:
+        for attempt in range(1, MAX_PROVISIONING_ATTEMPTS + 1):
+            deliveries += 1
+            try:
+                provision(table, subscribe, job, attempt)
+                break
+            except ServiceError:
+                continue
+    statuses = {}
+    for status in table.status.values():
+        statuses[status] = statuses.get(status, 0) + 1
+    return len(jobs), deliveries, statuses
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--signups', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--cognito-ms', type=float, default=150.0)
+    parser.add_argument('--dynamo-ms', type=float, default=10.0)
+    parser.add_argument('--sns-ms', type=float, default=40.0)
+    parser.add_argument('--sns-tail-ms', type=float, default=1500.0, help='Extra latency of a slow SNS call')
+    parser.add_argument('--sns-tail-rate', type=float, default=0.05, help='Fraction of SNS calls that are slow')
+    parser.add_argument('--sns-failure-rate', type=float, default=0.02, help='Fraction of SNS calls that fail')
+    args = parser.parse_args()
+
+    print(f"{'flow':<16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'failed':>7} {'SNS calls':>10}")
+    queued_db = None
+    for name, flow in [('per-user-topic', per_user_topic), ('shared-sync', shared_sync), ('queued', queued)]:
+        latencies, failed, sns_calls, db = run(flow, args, seed=1)
+        print(
+            f"{name:<16} {percentile(latencies, 0.5):>8.1f} {percentile(latencies, 0.95):>8.1f} "
+            f"{percentile(latencies, 0.99):>8.1f} {max(latencies):>8.1f} {failed:>7} {sns_calls:>10}"
+        )
+        if flow is queued:
+            queued_db = db
+
+    jobs, deliveries, statuses = drain(queued_db, args)
+    print(f"\nWorker: {jobs} jobs, {deliveries} deliveries, statuses {statuses}")
+    if sum(statuses.values()) != jobs:
+        print("FAIL: some jobs have no recorded provisioning status")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Measure cold-start cost of each Lambda handler.
+
+Every handler is loaded in a fresh interpreter (so nothing is shared between
+measurements) with the common layer on sys.path, the way Lambda mounts it
+under /opt/python. For each handler the script reports:
+
+- import time of lambda_function.py
+- time of the first invocation (only with --invoke; this talks to AWS, so it
+  needs credentials and the deployed tables)
+- heavy modules (google.cloud, grpc) that were already loaded by the import
+
+Handlers read their table names and topic ARNs from the environment at
+import time, so each child gets the deployed names from ENVIRONMENT (plus
+HANDLER_ENVIRONMENT overrides) unless they are already set in the shell.
+
+Usage:
+    python startup.py [--invoke] [--runs 3] [handler ...]
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda-functions')
+LAYER = os.path.join(ROOT, 'common-layer', 'python')
+
+HEAVY_MODULES = ['google.cloud.language_v1', 'grpc']
+
+# Names from the terraform configuration; only their presence matters for the import
+TOPIC_ARN = 'arn:aws:sns:us-east-1:000000000000:{}'
+ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'TABLE_NAME': 'DALScooterBookings',
+    'DYNAMODB_TABLE': 'DALScooterUsers',
+    'USER_TABLE': 'DALScooterUsers',
+    'VEHICLE_TABLE': 'DALScooterVehicles',
+    'VEHICLES_DYNAMODB_TABLE': 'DALScooterVehicles',
+    'FEEDBACK_DYNAMODB_TABLE': 'DALScooter-FeedbackTable',
+    'USER_POOL_ID': 'us-east-1_benchmark',
+    'USER_POOL_CLIENT_ID': 'benchmark',
+    'SNS_TOPIC_ARN': TOPIC_ARN.format('DALScooterBookingRequests'),
+    'USER_NOTIFICATIONS_TOPIC_ARN': TOPIC_ARN.format('DALScooterUserNotifications'),
+    'USER_PROVISIONING_TOPIC_ARN': TOPIC_ARN.format('DALScooterUserProvisioning'),
+}
+# Handlers using a variable for a different table than the rest
+HANDLER_ENVIRONMENT = {
+    'vehicle-catalog': {'TABLE_NAME': 'DALScooterVehicles'},
+}
+
+# Minimal events for the first invocation; handlers not listed get {}
+EVENTS = {
+    'get_vehicles_handler': {'httpMethod': 'GET'},
+    'get-pending-bookings': {'httpMethod': 'GET', 'queryStringParameters': {}},
+    'booking-lookup-handler': {'sessionState': {'intent': {'name': 'BookingLookup', 'slots': {}}}},
+    'navigation-help-handler': {'sessionState': {'intent': {'name': 'NavigationHelp', 'slots': {}}}},
+}
+
+# Runs inside the child interpreter; prints one JSON line
+PROBE = '''
+import sys, json, time, importlib
+sys.path[:0] = [{handler_dir!r}, {layer!r}]
+start = time.perf_counter()
+module = importlib.import_module('lambda_function')
+import_ms = (time.perf_counter() - start) * 1000
+result = {{'import_ms': import_ms, 'heavy': [name for name in {heavy!r} if name in sys.modules]}}
+if {invoke!r}:
+    entry = getattr(module, 'lambda_handler', None) or getattr(module, 'handler')
+    start = time.perf_counter()
+    try:
+        entry({event!r}, None)
+    except Exception as e:
+        result['error'] = repr(e)
+    result['invoke_ms'] = (time.perf_counter() - start) * 1000
+print(json.dumps(result))
+'''
+
+def handler_dirs():
+    return sorted(
+        name for name in os.listdir(ROOT)
+        if os.path.exists(os.path.join(ROOT, name, 'lambda_function.py'))
+    )
+
+def probe(name, invoke):
+    code = PROBE.format(
+        handler_dir=os.path.join(ROOT, name),
+        layer=LAYER,
+        heavy=HEAVY_MODULES,
+        invoke=invoke,
+        event=EVENTS.get(name, {})
+    )
+    env = dict(ENVIRONMENT, **HANDLER_ENVIRONMENT.get(name, {}))
+    env.update(os.environ)
+    completed = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env)
+    if completed.returncode != 0:
+        return {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr else 'failed'}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('handlers', nargs='*', help='Handler directories to measure (default: all)')
+    parser.add_argument('--invoke', action='store_true', help='Also time the first invocation (needs AWS credentials)')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters per handler; the median is reported')
+    args = parser.parse_args()
+
+    print(f"{'handler':<28} {'import ms':>10} {'invoke ms':>10}  heavy modules / errors")
+    for name in args.handlers or handler_dirs():
+        results = [probe(name, args.invoke) for _ in range(args.runs)]
+        ok = [result for result in results if 'import_ms' in result]
+        if not ok:
+            print(f"{name:<28} {'-':>10} {'-':>10}  {results[0]['error']}")
+            continue
+        import_ms = sorted(result['import_ms'] for result in ok)[len(ok) // 2]
+        invoke = sorted(result['invoke_ms'] for result in ok if 'invoke_ms' in result)
+        invoke_ms = f"{invoke[len(invoke) // 2]:.1f}" if invoke else '-'
+        notes = ', '.join(ok[0]['heavy']) or ''
+        if 'error' in ok[0]:
+            notes = (notes + ' ' if notes else '') + ok[0]['error']
+        print(f"{name:<28} {import_ms:>10.1f} {invoke_ms:>10}  {notes}")
+
+if __name__ == '__main__':
+    main()
@@ -38,14 +38,31 @@ resource "aws_dynamodb_table" "support_tickets" {
 }
 
 # Booking Lookup Lambda Function
+# This stack does not share the common layer, so booking_ids.py is bundled into the zip
+data "archive_file" "booking_lookup_zip" {
+  type        = "zip"
+  output_path = "${path.module}/booking_lookup_handler.zip"
+
+  source {
+    content  = file("${path.module}/../lambda-functions/booking-lookup-handler/lambda_function.py")
+    filename = "lambda_function.py"
+  }
+
+  source {
+    content  = file("${path.module}/../lambda-functions/common-layer/python/booking_ids.py")
+    filename = "booking_ids.py"
+  }
+}
+
 resource "aws_lambda_function" "booking_lookup_handler" {
-  filename      = "booking_lookup_handler.zip"
-  function_name = "booking-lookup-handler"
-  role          = local.lab_role_arn
-  handler       = "lambda_function.lambda_handler"
-  runtime       = "python3.9"
-  timeout       = 30
-  memory_size   = 256
+  filename         = data.archive_file.booking_lookup_zip.output_path
+  source_code_hash = data.archive_file.booking_lookup_zip.output_base64sha256
+  function_name    = "booking-lookup-handler"
+  role             = local.lab_role_arn
+  handler          = "lambda_function.lambda_handler"
+  runtime          = "python3.9"
+  timeout          = 30
+  memory_size      = 256
 }
 
 # Customer Support Lambda Function
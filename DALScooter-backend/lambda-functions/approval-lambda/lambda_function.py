@@ -1,58 +1,230 @@
 import json
 import boto3
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-# Initialize DynamoDB resource and SNS client
+from dynamo_batch import batch_get, chunks
+from idempotency import claim, complete, abandon, AlreadyInProgress
+from lookup_cache import LookupCache, VEHICLE_OPERATORS
+import user_notifications
+
+# Initialize DynamoDB resource
 dynamodb_resource = boto3.resource('dynamodb')
-sns = boto3.client('sns')
-users_table = dynamodb_resource.Table(os.environ['USER_DYNAMODB_TABLE'])
-vehicles_table = dynamodb_resource.Table(os.environ['VEHICLES_DYNAMODB_TABLE'])  # Add vehicles table env var
+VEHICLES_DYNAMODB_TABLE = os.environ['VEHICLES_DYNAMODB_TABLE']
+# Notifications published at once. Without digest mode an SQS batch holds at
+# most 10 records, so this publishes a whole batch at once; a digest batch
+# (up to the trigger's flush threshold) is worked through 10 operators at a time.
+PUBLISH_CONCURRENCY = int(os.environ.get('PUBLISH_CONCURRENCY', '10'))
+# Time kept in hand for one notification (claims, publish, ledger updates).
+# Notifications not started before the invocation gets this close to its
+# timeout are left to SQS redelivery instead of being cut off mid-way.
+PUBLISH_RESERVE_MS = int(os.environ.get('PUBLISH_RESERVE_MS', '3000'))
+# Digest mode: 'off' publishes one notification per booking request, 'batch'
+# one summary per operator for each SQS batch. The coalescing window
+# (maximum delay) and flush threshold are the SQS trigger's batching window
+# and batch size, see approval.tf.
+DIGEST_MODE = os.environ.get('DIGEST_MODE', 'off')
+# Booking requests listed in one summary; larger groups are split
+DIGEST_MAX_REQUESTS = int(os.environ.get('DIGEST_MAX_REQUESTS', '50'))
+
+# vehicle -> operator rarely changes; kept across invocations
+vehicle_operators = LookupCache('vehicle-operators', marker=VEHICLE_OPERATORS)
+
+def parse_record(record):
+    """The booking request (or batch-book-vehicles group) carried by one SQS record"""
+    message = json.loads(record['body'])
+    print(f"Raw message: {message}")  # Debug the raw SNS message
+    # Extract the nested booking request from the Message field
+    booking_data = json.loads(message['Message'])
+    print(f"Booking data: {booking_data}")  # Debug the parsed booking data
+
+    if 'bookings' in booking_data:
+        if not booking_data.get('operatorID') or not booking_data['bookings']:
+            raise ValueError("Missing operator or bookings in batch booking request")
+        return booking_data
+
+    required = ['bookingID', 'vehicleID', 'startTime', 'endTime', 'email']
+    if not all(booking_data.get(field) for field in required):
+        raise ValueError("Missing required fields in booking request")
+    return booking_data
+
+def load_operators(vehicle_ids):
+    return {
+        vehicle['vehicleID']: vehicle['operatorID']
+        for vehicle in batch_get(
+            dynamodb_resource, VEHICLES_DYNAMODB_TABLE, [{'vehicleID': vehicle_id} for vehicle_id in vehicle_ids],
+            projection='vehicleID, operatorID'
+        )
+        if vehicle.get('operatorID')
+    }
+
+def resolve_operators(requests):
+    """Fill in operatorID for requests that lack it, reading uncached vehicles in one batch"""
+    vehicle_ids = {request['vehicleID'] for request in requests if not request.get('operatorID')}
+    if not vehicle_ids:
+        return
+    operators = vehicle_operators.get_many(vehicle_ids, load_operators)
+    for request in requests:
+        if not request.get('operatorID'):
+            request['operatorID'] = operators.get(request['vehicleID'])
+
+def request_bookings(request):
+    """The bookings of a single booking request or a batch-book-vehicles group"""
+    return request['bookings'] if 'bookings' in request else [request]
+
+def operator_notification(request):
+    """(subject, message) for a single booking request or a group booking"""
+    if 'bookings' in request:
+        lines = [
+            f"- vehicle {booking['vehicleID']} (ID: {booking['bookingID']}) from {booking['startTime']} to {booking['endTime']}"
+            for booking in request['bookings']
+        ]
+        message = f"{len(request['bookings'])} new booking requests by {request.get('email')}:\n" + "\n".join(lines) + "\nApprove or reject via app."
+        return "Booking Requests", message
+    message = f"New booking request for vehicle {request['vehicleID']} (ID: {request['bookingID']}) from {request['startTime']} to {request['endTime']} by {request['email']}. Approve or reject via app."
+    return "Booking Request", message
+
+def digest_notification(requests):
+    """(subject, message) summarising several booking requests for one operator"""
+    if len(requests) == 1:
+        return operator_notification(requests[0])
+    lines = [
+        f"- vehicle {booking['vehicleID']} (ID: {booking['bookingID']}) from {booking['startTime']} to {booking['endTime']} by {request.get('email')}"
+        for request in requests
+        for booking in request_bookings(request)
+    ]
+    message = f"{len(lines)} new booking requests:\n" + "\n".join(lines) + "\nApprove or reject via app."
+    return "Booking Requests", message
+
+def idempotency_key(booking):
+    """One ledger entry per booking, however its notification was grouped"""
+    return f"approval#{booking['bookingID']}"
+
+def with_bookings(request, bookings):
+    """request narrowed down to bookings (a subset of its own)"""
+    return dict(request, bookings=bookings) if 'bookings' in request else request
+
+def claim_bookings(entries):
+    """
+    Claim the ledger entry of every booking of [(messageId, request)].
+
+    Returns (keys, fresh, busy): the keys claimed now, the requests narrowed
+    down to their newly claimed bookings, and the messageIds with a booking
+    another invocation is still working on. Bookings notified by an earlier
+    delivery are left out, so a redelivered request never shows up in a
+    second digest, whichever group it lands in.
+    """
+    keys, fresh, busy = [], [], []
+    for message_id, request in entries:
+        claimed = []
+        try:
+            for booking in request_bookings(request):
+                if claim(idempotency_key(booking)):
+                    keys.append(idempotency_key(booking))
+                    claimed.append(booking)
+                else:
+                    print(f"Skipping booking {booking['bookingID']}: operator already notified")
+        except AlreadyInProgress as e:
+            print(f"Booking {e.args[0]} is being notified by another invocation")
+            busy.append(message_id)
+        if claimed:
+            fresh.append(with_bookings(request, claimed))
+    return keys, fresh, busy
+
+def group_notifications(deliverable):
+    """
+    [(messageIds, requests, operatorID)] to publish for [(messageId, request)].
+
+    Without digest mode every request is published on its own; in digest
+    mode the requests of each operator are coalesced, DIGEST_MAX_REQUESTS per
+    summary, in arrival order.
+    """
+    if DIGEST_MODE != 'batch':
+        return [([message_id], [request], request['operatorID']) for message_id, request in deliverable]
+    by_operator = {}
+    for message_id, request in deliverable:
+        by_operator.setdefault(request['operatorID'], []).append((message_id, request))
+    groups = []
+    for operator_id, entries in by_operator.items():
+        for chunk in chunks(entries, DIGEST_MAX_REQUESTS):
+            groups.append(([message_id for message_id, _ in chunk], [request for _, request in chunk], operator_id))
+    return groups
 
 def handler(event, context):
+    """
+    Notify operators of the booking requests in one SQS batch.
+
+    Vehicle operators come from the warm-container lookup cache, with one
+    BatchGetItem for whatever is not cached. Operators are notified through
+    the shared user notification topic, addressed by operatorID, and the
+    publishes run concurrently, so a batch costs at most two round trips
+    instead of three per record.
+
+    Records that could not be notified are reported in batchItemFailures,
+    so SQS redelivers only those (and eventually moves them to the DLQ).
+    The idempotency ledger is claimed per booking, and notifications only
+    list the bookings whose operator was not notified by an earlier
+    delivery. With DIGEST_MODE=batch each operator gets one summary per
+    batch instead of one notification per request. Notifications still
+    waiting when less than PUBLISH_RESERVE_MS is left are reported as
+    failures without claiming anything, so a large digest batch never runs
+    into the Lambda timeout.
+    """
+    failures = []
+    requests = []
     for record in event['Records']:
-        current_booking_id = None  # Default value to avoid UnboundLocalError
         try:
-            message = json.loads(record['body'])
-            print(f"Raw message: {message}")  # Debug the raw SNS message
-            # Extract the nested booking request from the Message field
-            booking_data = json.loads(message['Message'])
-            print(f"Booking data: {booking_data}")  # Debug the parsed booking data
-
-            current_booking_id = booking_data.get('bookingID')
-            vehicle_id = booking_data.get('vehicleID')
-            start_time = booking_data.get('startTime')
-            end_time = booking_data.get('endTime')
-            email = booking_data.get('email')
-
-            if not all([current_booking_id, vehicle_id, start_time, end_time, email]):
-                raise ValueError("Missing required fields in booking request")
-
-            # Fetch operator email from vehicles table
-            vehicles_response = vehicles_table.get_item(Key={'vehicleID': vehicle_id})
-            op_email = vehicles_response.get('Item', {}).get('operatorID')  # Assuming op_email is an attribute
-            if not op_email:
-                raise ValueError(f"No operator email found for vehicle {vehicle_id}")
-
-            # Fetch topic ARN from users table using operator email
-            user_response = users_table.get_item(Key={'userID': op_email}).get('Item', {})
-            topic_arn = user_response.get('topicArn')
-            if not topic_arn:
-                raise ValueError(f"No topic ARN found for operator {op_email}")
-
-            # Send notification to operator
-            operator_message = f"New booking request for vehicle {vehicle_id} (ID: {current_booking_id}) from {start_time} to {end_time} by {email}. Approve or reject via app."
-            sns.publish(
-                TopicArn=topic_arn,
-                Message=operator_message,
-                Subject="Booking Request"
-            )
-            print(f"Notified operator for booking {current_booking_id}")
+            requests.append((record['messageId'], parse_record(record)))
+        except Exception as e:
+            print(f"Error processing booking record {record.get('messageId', 'unknown')}: {str(e)}")
+            failures.append(record['messageId'])
 
+    try:
+        resolve_operators([request for _, request in requests])
+    except Exception as e:
+        # Without operators nothing in the batch can be delivered
+        print(f"Error resolving operators: {str(e)}")
+        return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures + [message_id for message_id, _ in requests]]}
+
+    deliverable = []
+    for message_id, request in requests:
+        label = request.get('bookingID') or f"group of {len(request.get('bookings', []))}"
+        if not request.get('operatorID'):
+            print(f"Error processing booking {label}: No operator email found for vehicle {request.get('vehicleID')}")
+            failures.append(message_id)
+        else:
+            deliverable.append((message_id, request))
+
+    def publish(notification):
+        """messageIds of the records that still need a delivery"""
+        message_ids, group, operator_id = notification
+        if context.get_remaining_time_in_millis() < PUBLISH_RESERVE_MS:
+            print(f"Out of time, leaving {len(message_ids)} records of operator {operator_id} for redelivery")
+            return message_ids
+        keys = []
+        try:
+            keys, fresh, busy = claim_bookings(list(zip(message_ids, group)))
+            if not fresh:
+                return busy
+            label = ', '.join(booking['bookingID'] for request in fresh for booking in request_bookings(request))
+            subject, message = digest_notification(fresh)
+            user_notifications.publish(operator_id, message, subject)
         except Exception as e:
-            print(f"Error processing booking {current_booking_id or 'unknown'}: {str(e)}")
-            continue
+            print(f"Error notifying operator {operator_id}: {str(e)}")
+            for key in keys:
+                abandon(key)
+            return message_ids
+        for key in keys:
+            complete(key)
+        print(f"Notified operator for booking {label}")
+        return busy
 
-    return {
-        'statusCode': 200,
-        'body': json.dumps({'message': 'Booking requests processed'})
-    }
\ No newline at end of file
+    notifications = group_notifications(deliverable)
+    if notifications:
+        with ThreadPoolExecutor(max_workers=min(PUBLISH_CONCURRENCY, len(notifications))) as executor:
+            for message_ids in executor.map(publish, notifications):
+                failures.extend(message_ids)
+
+    print(f"Lookup cache: {vehicle_operators.stats()}")
+
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures]}
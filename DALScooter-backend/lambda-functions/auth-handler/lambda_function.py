@@ -1,17 +1,29 @@
 import json
 import boto3
 import os
+import logging
 import hashlib
 import random
 import string
 from botocore.exceptions import ClientError
+from boto3.dynamodb.types import TypeSerializer
 import datetime
 
-# Initialize AWS Cognito, DynamoDB, and SNS clients
+import user_notifications
+from outbox import event_put
+from user_provisioning import provisioning_job, PENDING
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Initialize AWS Cognito and DynamoDB clients
 cognito = boto3.client('cognito-idp')
 dynamodb = boto3.resource('dynamodb')
+dynamodb_client = boto3.client('dynamodb')
+serializer = TypeSerializer()
 table = dynamodb.Table(os.environ['DYNAMODB_TABLE'])
-sns_client = boto3.client('sns')
+USER_PROVISIONING_TOPIC_ARN = os.environ.get('USER_PROVISIONING_TOPIC_ARN')
 
 def lambda_handler(event, context):
     # Handle Cognito Lambda triggers
@@ -61,26 +73,9 @@ def api_gateway_handler(event, context):
                     Username=email,
                     ConfirmationCode=otp
                 )
-                # logger.info(f"Subscribed email {email} to topic {topic_arn}")
-                user_data = table.get_item(Key={'userID': email}).get('Item', {})
-                topic_arn = user_data.get('topicArn')
-                if not topic_arn:
-                    return {
-                        'statusCode': 400,
-                        'headers': {
-                            "Access-Control-Allow-Origin": "*",
-                            "Access-Control-Allow-Headers": "Content-Type, Authorization",
-                            "Access-Control-Allow-Methods": "POST, OPTIONS"
-                        },
-                        'body': json.dumps({'message': 'Topic ARN not found. Subscription may not be set up.'})
-                    }
-                # Send a welcome email via SNS
+                # Send a welcome email via the shared notification topic
                 welcome_message = f"Welcome to DALScooter, {name}! Your account is now active. This is a test email from your notification topic."
-                sns_client.publish(
-                    TopicArn=topic_arn,
-                    Message=welcome_message,
-                    Subject="Welcome to DALScooter"
-                )
+                user_notifications.publish(email, welcome_message, subject="Welcome to DALScooter")
                 return {
                     'statusCode': 200,
                     'headers': {
@@ -103,40 +98,32 @@ def api_gateway_handler(event, context):
                 ]
             )
 
-            # Hash and store security answer in DynamoDB with name and role
+            # Hash and store security answer in DynamoDB with name and role.
+            # The notification subscription is set up by the user-provisioning
+            # worker: the user and its provisioning job are one write.
             if security_question and security_answer:
                 hashed_answer = hashlib.sha256(security_answer.encode()).hexdigest()
-                table.put_item(
-                    Item={
-                        'userID': email,
-                        'name': name,
-                        'role': role,
-                        'securityQuestion': security_question,
-                        'hashedAnswer': hashed_answer,
-                        'validated': False,
-                        'cipherPlain': None,
-                        'cipherShift': None,
-                        'cipherValidated': False
-                    }
-                )
-                # Manually create SNS topic after OTP verification
-                topic_name = f"DALScooter-Notifications-{email.replace('@', '-').replace('.', '-')}"
-                response = sns_client.create_topic(Name=topic_name)
-                topic_arn = response['TopicArn']
-                # logger.info(f"Created SNS topic: {topic_arn} for email: {email}")
-                
-                # Store topic ARN in DynamoDB
-                table.update_item(
-                    Key={'userID': email},
-                    UpdateExpression='SET topicArn = :arn',
-                    ExpressionAttributeValues={':arn': topic_arn}
-                )
-
-                sns_client.subscribe(
-                    TopicArn=topic_arn,
-                    Protocol='email',
-                    Endpoint=email
-                )
+                user_item = {
+                    'userID': email,
+                    'name': name,
+                    'role': role,
+                    'securityQuestion': security_question,
+                    'hashedAnswer': hashed_answer,
+                    'validated': False,
+                    'cipherPlain': None,
+                    'cipherShift': None,
+                    'cipherValidated': False,
+                    'provisioningStatus': PENDING
+                }
+                dynamodb_client.transact_write_items(TransactItems=[
+                    {
+                        'Put': {
+                            'TableName': os.environ['DYNAMODB_TABLE'],
+                            'Item': {key: serializer.serialize(value) for key, value in user_item.items()}
+                        }
+                    },
+                    event_put(USER_PROVISIONING_TOPIC_ARN, provisioning_job(email))
+                ])
 
             return {
                 'statusCode': 200,
@@ -169,24 +156,9 @@ def api_gateway_handler(event, context):
                 access_token = response['AuthenticationResult']['AccessToken']
                 user_response = table.get_item(Key={'userID': email}).get('Item', {})
                 role = user_response.get('role', 'customer')
-                topic_arn = user_response.get('topicArn')
-                if not topic_arn:
-                    return {
-                        'statusCode': 400,
-                        'headers': {
-                            "Access-Control-Allow-Origin": "*",
-                            "Access-Control-Allow-Headers": "Content-Type, Authorization",
-                            "Access-Control-Allow-Methods": "POST, OPTIONS"
-                        },
-                        'body': json.dumps({'message': 'Topic ARN not found. Subscription may not be set up.'})
-                    }
-                # Send a welcome email via SNS
+                # Send a welcome email via the shared notification topic
                 welcome_message = f"Hello {user_response.get('name', 'User')}! You have successfully logged into DALScooter at {datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}. If this was not you, contact support immediately."
-                sns_client.publish(
-                    TopicArn=topic_arn,
-                    Message=welcome_message,
-                    Subject="Welcome to DALScooter"
-                )
+                user_notifications.publish(email, welcome_message, subject="Welcome to DALScooter")
                 return {
                     'statusCode': 200,
                     'headers': {
@@ -248,24 +220,9 @@ def api_gateway_handler(event, context):
                 access_token = response['AuthenticationResult']['AccessToken']
                 user_response = table.get_item(Key={'userID': email}).get('Item', {})
                 role = user_response.get('role', 'customer')
-                topic_arn = user_response.get('topicArn')
-                if not topic_arn:
-                    return {
-                        'statusCode': 400,
-                        'headers': {
-                            "Access-Control-Allow-Origin": "*",
-                            "Access-Control-Allow-Headers": "Content-Type, Authorization",
-                            "Access-Control-Allow-Methods": "POST, OPTIONS"
-                        },
-                        'body': json.dumps({'message': 'Topic ARN not found. Subscription may not be set up.'})
-                    }
-                # Send a welcome email via SNS
+                # Send a welcome email via the shared notification topic
                 welcome_message = f"Hello {user_response.get('name', 'User')}! You have successfully logged into DALScooter at {datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}. If this was not you, contact support immediately."
-                sns_client.publish(
-                    TopicArn=topic_arn,
-                    Message=welcome_message,
-                    Subject="Welcome to DALScooter"
-                )
+                user_notifications.publish(email, welcome_message, subject="Welcome to DALScooter")
                 return {
                     'statusCode': 200,
                     'headers': {
@@ -441,25 +398,37 @@ def verify_auth_challenge_response(event):
     return event
 
 def post_confirmation_handler(event):
-    """Create a user-specific SNS topic after email confirmation"""
+    """
+    Make sure the confirmed user gets provisioned. Signup already queued a
+    provisioning job together with the user item; users created any other
+    way get one queued here, so the user-provisioning worker stays the only
+    place that subscribes users to notifications.
+    """
+    email = event['request']['userAttributes']['email']
     try:
-        email = event['request']['userAttributes']['email']
-        topic_name = f"DALScooter-Notifications-{email.replace('@', '-').replace('.', '-')}"
-        response = sns_client.create_topic(Name=topic_name)
-        topic_arn = response['TopicArn']
-        logger.info(f"Created SNS topic: {topic_arn} for email: {email}")
-        
-        # Store topic ARN in DynamoDB (optional, for reference)
-        table.update_item(
-            Key={'userID': email},
-            UpdateExpression='SET topicArn = :arn',
-            ExpressionAttributeValues={':arn': topic_arn}
+        dynamodb_client.transact_write_items(
+            TransactItems=[
+                {
+                    'Update': {
+                        'TableName': os.environ['DYNAMODB_TABLE'],
+                        'Key': {'userID': {'S': email}},
+                        'UpdateExpression': 'SET provisioningStatus = :pending',
+                        'ConditionExpression': 'attribute_not_exists(provisioningStatus)',
+                        'ExpressionAttributeValues': {':pending': {'S': PENDING}}
+                    }
+                },
+                event_put(USER_PROVISIONING_TOPIC_ARN, provisioning_job(email))
+            ]
         )
-        
+        logger.info(f"Queued provisioning for {email}")
         return event
-    except ClientError as e:
-        logger.error(f"Error creating SNS topic for {email}: {str(e)}")
+    except dynamodb_client.exceptions.TransactionCanceledException as e:
+        reasons = e.response.get('CancellationReasons', [])
+        if reasons and reasons[0].get('Code') == 'ConditionalCheckFailed':
+            logger.info(f"Provisioning for {email} was already queued at signup")
+            return event
+        logger.error(f"Error queueing provisioning for {email}: {str(e)}")
         raise
     except Exception as e:
         logger.error(f"Unexpected error in post_confirmation_handler: {str(e)}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,204 @@
+import json
+import boto3
+import os
+from datetime import datetime
+
+from booking_ids import new_booking_id
+from booking_times import to_epoch, MAX_BOOKING_HOURS, MAX_BOOKING_SECONDS
+from booking_reservations import reserve_batch, slot_starts, lock_key, SlotUnavailable, DuplicateBookingID
+from outbox import event_put
+
+dynamodb = boto3.client('dynamodb')
+
+VEHICLES_TABLE_NAME = os.environ.get('VEHICLES_TABLE_NAME', 'DALScooterVehicles')
+# Upper bound on bookings per request, keeping validation and the transactions small
+MAX_BATCH_BOOKINGS = int(os.environ.get('MAX_BATCH_BOOKINGS', '25'))
+MAX_ID_ATTEMPTS = 3
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'POST,OPTIONS'
+}
+
+def validate_requests(requests):
+    """
+    Parse every requested {vehicleID, startTime, endTime} and collect all
+    problems at once. Returns (parsed, errors); parsed entries are
+    (vehicle_id, start_time, end_time, start_epoch, end_epoch).
+    """
+    parsed, errors = [], []
+    claimed = {}
+    for index, request in enumerate(requests):
+        vehicle_id = request.get('vehicleID')
+        start_time = request.get('startTime')
+        end_time = request.get('endTime')
+        if not all([vehicle_id, start_time, end_time]):
+            errors.append({'index': index, 'message': 'Missing required fields'})
+            continue
+        try:
+            start_epoch = to_epoch(start_time)
+            end_epoch = to_epoch(end_time)
+        except ValueError:
+            errors.append({'index': index, 'message': 'startTime and endTime must be ISO 8601 timestamps'})
+            continue
+        if end_epoch <= start_epoch:
+            errors.append({'index': index, 'message': 'End time must be after start time'})
+            continue
+        if end_epoch - start_epoch > MAX_BOOKING_SECONDS:
+            errors.append({'index': index, 'message': f'Bookings cannot be longer than {MAX_BOOKING_HOURS} hours'})
+            continue
+        # Two windows of the same vehicle sharing a slot would check the same lock twice,
+        # and only one of them could ever be confirmed
+        overlapping = [claimed[lock_key(vehicle_id, slot)] for slot in slot_starts(start_epoch, end_epoch) if lock_key(vehicle_id, slot) in claimed]
+        if overlapping:
+            errors.append({'index': index, 'message': f'Overlaps request {overlapping[0]} for the same vehicle'})
+            continue
+        for slot in slot_starts(start_epoch, end_epoch):
+            claimed[lock_key(vehicle_id, slot)] = index
+        parsed.append((vehicle_id, start_time, end_time, start_epoch, end_epoch))
+    return parsed, errors
+
+def load_operators(vehicle_ids):
+    """{vehicleID: operatorID} for the vehicles that exist, in one batched read"""
+    operators = {}
+    request = {
+        VEHICLES_TABLE_NAME: {
+            'Keys': [{'vehicleID': {'S': vehicle_id}} for vehicle_id in set(vehicle_ids)],
+            'ProjectionExpression': 'vehicleID, operatorID'
+        }
+    }
+    while request:
+        response = dynamodb.batch_get_item(RequestItems=request)
+        for item in response.get('Responses', {}).get(VEHICLES_TABLE_NAME, []):
+            operators[item['vehicleID']['S']] = item.get('operatorID', {}).get('S')
+        request = response.get('UnprocessedKeys')
+    return operators
+
+def booking_reservations(parsed, email, operators, created_at):
+    """Typed booking items with fresh IDs, as reserve_batch tuples"""
+    return [
+        (
+            {
+                'bookingID': {'S': new_booking_id()},
+                'vehicleID': {'S': vehicle_id},
+                'startTime': {'S': start_time},
+                'endTime': {'S': end_time},
+                'startEpoch': {'N': str(start_epoch)},
+                'endEpoch': {'N': str(end_epoch)},
+                'email': {'S': email},
+                'operatorID': {'S': operators[vehicle_id]},
+                'status': {'S': 'pending'},
+                'createdAt': {'S': created_at}
+            },
+            vehicle_id, start_epoch, end_epoch
+        )
+        for vehicle_id, start_time, end_time, start_epoch, end_epoch in parsed
+    ]
+
+def handler(event, context):
+    """
+    Book several vehicles/windows for one customer, all or nothing.
+
+    Body: {"email": ..., "bookings": [{"vehicleID", "startTime", "endTime"}, ...]}.
+    Every request is validated before anything is written, the bookings are
+    written in as few transactions as possible (checked against the slot
+    locks of confirmed bookings), and each operator gets one aggregated
+    booking request event instead of one per booking. The events are written
+    to the outbox in the last transaction of the batch.
+    """
+    try:
+        body = json.loads(event.get('body') or '{}')
+        email = body.get('email')
+        requests = body.get('bookings')
+
+        if not email or not isinstance(requests, list) or not requests:
+            return {
+                'statusCode': 400,
+                'headers': CORS_HEADERS,
+                'body': json.dumps({'message': 'email and a non-empty bookings list are required'})
+            }
+        if len(requests) > MAX_BATCH_BOOKINGS:
+            return {
+                'statusCode': 400,
+                'headers': CORS_HEADERS,
+                'body': json.dumps({'message': f'At most {MAX_BATCH_BOOKINGS} bookings per request'})
+            }
+
+        parsed, errors = validate_requests(requests)
+        if not errors:
+            operators = load_operators([entry[0] for entry in parsed])
+            errors = [
+                {'index': index, 'message': f'Vehicle {entry[0]} not found'}
+                for index, entry in enumerate(parsed)
+                if not operators.get(entry[0])
+            ]
+        if errors:
+            return {
+                'statusCode': 400,
+                'headers': CORS_HEADERS,
+                'body': json.dumps({'message': 'Invalid booking requests', 'errors': errors})
+            }
+
+        created_at = datetime.now().isoformat()
+        for _ in range(MAX_ID_ATTEMPTS):
+            reservations = booking_reservations(parsed, email, operators, created_at)
+            bookings = [
+                {
+                    'bookingID': booking_item['bookingID']['S'],
+                    'vehicleID': vehicle_id,
+                    'startTime': booking_item['startTime']['S'],
+                    'endTime': booking_item['endTime']['S'],
+                    'email': email,
+                    'status': 'pending'
+                }
+                for booking_item, vehicle_id, _, _ in reservations
+            ]
+            by_operator = {}
+            for booking in bookings:
+                by_operator.setdefault(operators[booking['vehicleID']], []).append(booking)
+            events = [
+                event_put(
+                    os.environ['SNS_TOPIC_ARN'],
+                    {'operatorID': operator_id, 'email': email, 'bookings': operator_bookings},
+                    subject='New eBike Booking Requests'
+                )
+                for operator_id, operator_bookings in by_operator.items()
+            ]
+            try:
+                reserve_batch(dynamodb, reservations, table_name=os.environ['TABLE_NAME'], extra_items=events, claim=False)
+                break
+            except DuplicateBookingID as e:
+                print(f"Booking ID {e.args[0]} already taken, retrying batch")
+            except SlotUnavailable as e:
+                vehicle_id, booking_id = e.args
+                index = next(i for i, reservation in enumerate(reservations) if reservation[0]['bookingID']['S'] == booking_id)
+                return {
+                    'statusCode': 409,
+                    'headers': CORS_HEADERS,
+                    'body': json.dumps({
+                        'message': f"Vehicle {vehicle_id} is already booked between {parsed[index][1][11:16]} and {parsed[index][2][11:16]}",
+                        'index': index
+                    })
+                }
+        else:
+            return {
+                'statusCode': 500,
+                'headers': CORS_HEADERS,
+                'body': json.dumps({'message': 'Failed to generate unique booking IDs'})
+            }
+        print(f"Stored {len(bookings)} booking requests with {len(events)} operator events")
+
+        return {
+            'statusCode': 200,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'message': 'Booking requests submitted for approval', 'bookings': bookings})
+        }
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'message': 'Internal server error'})
+        }
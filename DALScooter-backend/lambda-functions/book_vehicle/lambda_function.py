@@ -2,22 +2,18 @@ import json
 import boto3
 import os
 from datetime import datetime
-import random
-import string
+
+from booking_ids import new_booking_id
+from booking_times import to_epoch, MAX_BOOKING_HOURS, MAX_BOOKING_SECONDS
+from booking_reservations import reserve, SlotUnavailable, DuplicateBookingID
+from outbox import event_put
 
 dynamodb = boto3.client('dynamodb')
-sns = boto3.client('sns')
 
-def generate_booking_id():
-    characters = string.ascii_uppercase + string.digits
-    return ''.join(random.choice(characters) for _ in range(6))
+VEHICLES_TABLE_NAME = os.environ.get('VEHICLES_TABLE_NAME', 'DALScooterVehicles')
 
-def check_booking_id_unique(booking_id, table_name):
-    response = dynamodb.get_item(
-        TableName=table_name,
-        Key={'bookingID': {'S': booking_id}}
-    )
-    return 'Item' not in response
+# A collision of 40-bit IDs is a one-in-a-million event; retrying once is almost always enough
+MAX_ID_ATTEMPTS = 3
 
 def handler(event, context):
     try:
@@ -38,9 +34,20 @@ def handler(event, context):
                 'body': json.dumps({'message': 'Missing required fields'})
             }
 
-        start = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-        end = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
-        if end <= start:
+        try:
+            start_epoch = to_epoch(start_time)
+            end_epoch = to_epoch(end_time)
+        except ValueError:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+                    'Access-Control-Allow-Methods': 'POST,OPTIONS'
+                },
+                'body': json.dumps({'message': 'startTime and endTime must be ISO 8601 timestamps'})
+            }
+        if end_epoch <= start_epoch:
             return {
                 'statusCode': 400,
                 'headers': {
@@ -50,40 +57,87 @@ def handler(event, context):
                 },
                 'body': json.dumps({'message': 'End time must be after start time'})
             }
-
-        response = dynamodb.query(
-            TableName=os.environ['TABLE_NAME'],
-            IndexName='VehicleIDIndex',
-            KeyConditionExpression='vehicleID = :vehicle_id',
-            FilterExpression='#status = :status AND endTime > :start_time AND startTime < :end_time',
-            ExpressionAttributeNames={'#status': 'status'},
-            ExpressionAttributeValues={
-                ':vehicle_id': {'S': vehicle_id},
-                ':status': {'S': 'confirmed'},
-                ':start_time': {'S': start_time},
-                ':end_time': {'S': end_time}
+        # The conflict query only looks back one maximum booking length
+        if end_epoch - start_epoch > MAX_BOOKING_SECONDS:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+                    'Access-Control-Allow-Methods': 'POST,OPTIONS'
+                },
+                'body': json.dumps({'message': f'Bookings cannot be longer than {MAX_BOOKING_HOURS} hours'})
             }
-        )
 
-        if response.get('Items'):
-            conflicting_booking = response['Items'][0]
+        # Bookings carry their vehicle's operator for OperatorStatusIndex
+        vehicle = dynamodb.get_item(
+            TableName=VEHICLES_TABLE_NAME,
+            Key={'vehicleID': {'S': vehicle_id}},
+            ProjectionExpression='operatorID'
+        ).get('Item')
+        if not vehicle or 'operatorID' not in vehicle:
             return {
-                'statusCode': 409,
+                'statusCode': 404,
                 'headers': {
                     'Access-Control-Allow-Origin': '*',
                     'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
                     'Access-Control-Allow-Methods': 'POST,OPTIONS'
                 },
-                'body': json.dumps({
-                    'message': f"Vehicle is already booked from {conflicting_booking['startTime']['S'][11:16]} to {conflicting_booking['endTime']['S'][11:16]}"
-                })
+                'body': json.dumps({'message': 'Vehicle not found'})
             }
+        operator_id = vehicle['operatorID']['S']
 
-        max_attempts = 10
-        for _ in range(max_attempts):
-            booking_id = generate_booking_id()
-            if check_booking_id_unique(booking_id, os.environ['TABLE_NAME']):
+        # The request and the approval event are written atomically, checked
+        # against the slot locks of confirmed bookings; pending requests claim
+        # nothing, the locks are taken when the operator accepts. Uniqueness
+        # of the ID is enforced by the same write, no lookup needed.
+        # outbox-relay publishes the event.
+        for _ in range(MAX_ID_ATTEMPTS):
+            booking_id = new_booking_id()
+            booking_request = {
+                'bookingID': booking_id,
+                'vehicleID': vehicle_id,
+                'startTime': start_time,
+                'endTime': end_time,
+                'email': email,
+                'operatorID': operator_id,
+                'status': 'pending'
+            }
+            try:
+                reserve(
+                    dynamodb,
+                    {
+                        'bookingID': {'S': booking_id},
+                        'vehicleID': {'S': vehicle_id},
+                        'startTime': {'S': start_time},
+                        'endTime': {'S': end_time},
+                        'startEpoch': {'N': str(start_epoch)},
+                        'endEpoch': {'N': str(end_epoch)},
+                        'email': {'S': email},
+                        'operatorID': {'S': operator_id},
+                        'status': {'S': 'pending'},
+                        'createdAt': {'S': datetime.now().isoformat()}
+                    },
+                    vehicle_id, start_epoch, end_epoch,
+                    table_name=os.environ['TABLE_NAME'],
+                    extra_items=[event_put(os.environ['SNS_TOPIC_ARN'], booking_request, subject='New eBike Booking Request')],
+                    claim=False
+                )
                 break
+            except DuplicateBookingID:
+                print(f"Booking ID {booking_id} already taken, retrying")
+            except SlotUnavailable:
+                return {
+                    'statusCode': 409,
+                    'headers': {
+                        'Access-Control-Allow-Origin': '*',
+                        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+                        'Access-Control-Allow-Methods': 'POST,OPTIONS'
+                    },
+                    'body': json.dumps({
+                        'message': f"Vehicle is already booked between {start_time[11:16]} and {end_time[11:16]}"
+                    })
+                }
         else:
             return {
                 'statusCode': 500,
@@ -95,33 +149,7 @@ def handler(event, context):
                 'body': json.dumps({'message': 'Failed to generate unique booking ID'})
             }
 
-        dynamodb.put_item(
-            TableName=os.environ['TABLE_NAME'],
-            Item={
-                'bookingID': {'S': booking_id},
-                'vehicleID': {'S': vehicle_id},
-                'startTime': {'S': start_time},
-                'endTime': {'S': end_time},
-                'email': {'S': email},
-                'status': {'S': 'pending'},
-                'createdAt': {'S': datetime.now().isoformat()}
-            }
-        )
-
-        booking_request = {
-            'bookingID': booking_id,
-            'vehicleID': vehicle_id,
-            'startTime': start_time,
-            'endTime': end_time,
-            'email': email,
-            'status': 'pending'
-        }
-        sns.publish(
-            TopicArn=os.environ['SNS_TOPIC_ARN'],
-            Message=json.dumps(booking_request),
-            Subject='New eBike Booking Request'
-        )
-        print(f"Published booking request {booking_id} to SNS topic")
+        print(f"Stored booking request {booking_id} with its approval event")
 
         return {
             'statusCode': 200,
@@ -3,6 +3,8 @@ import boto3
 import os
 from botocore.exceptions import ClientError
 
+from booking_ids import lookup_candidates
+
 def lambda_handler(event, context):
     """
     Lex V2 Lambda function to handle booking lookups and return vehicle access code
@@ -23,9 +25,13 @@ def lambda_handler(event, context):
         # Initialize DynamoDB resource
         dynamodb = boto3.resource('dynamodb')
 
-        # Fetch booking details
+        # Fetch booking details; spoken or typed codes are normalized first
         bookings_table = dynamodb.Table('DALScooterBookings')
-        booking_response = bookings_table.get_item(Key={'bookingID': booking_ref})
+        booking_response = {}
+        for candidate in lookup_candidates(booking_ref):
+            booking_response = bookings_table.get_item(Key={'bookingID': candidate})
+            if 'Item' in booking_response:
+                break
 
         if 'Item' not in booking_response:
             return close_response(
@@ -0,0 +1,36 @@
+import os
+import json
+import logging
+from collections import Counter
+
+from change_markers import bump, table_name_from_arn
+from lookup_cache import VEHICLE_OPERATORS
+
+VEHICLES_DYNAMODB_TABLE = os.environ.get('VEHICLES_DYNAMODB_TABLE', 'DALScooterVehicles')
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+def lambda_handler(event, context):
+    """
+    Lambda function consuming the vehicles, bookings and feedback table
+    streams and bumping each table's change marker once per batch.
+
+    Vehicle changes also bump the vehicle -> operator lookup cache marker,
+    so every vehicle write invalidates the cached operators, whichever
+    Lambda made it. The stream is KEYS_ONLY, so any vehicle change counts.
+    """
+    changes = Counter(table_name_from_arn(record['eventSourceARN']) for record in event.get('Records', []))
+    if changes[VEHICLES_DYNAMODB_TABLE]:
+        changes[VEHICLE_OPERATORS] = changes[VEHICLES_DYNAMODB_TABLE]
+
+    versions = {}
+    for table_name, count in changes.items():
+        versions[table_name] = bump(table_name, count)
+        logger.info(f"{table_name}: {count} changes, now at version {versions[table_name]}")
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps(versions)
+    }
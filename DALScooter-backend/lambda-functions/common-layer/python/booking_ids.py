@@ -0,0 +1,44 @@
+"""
+Booking reference codes.
+
+IDs are BOOKING_ID_LENGTH (8) random symbols from Crockford's base32
+alphabet: digits and upper-case letters without I, L, O and U, so they are
+easy to read out and type into the Lex bot. 8 symbols carry 40 bits
+(~1.1 trillion codes); with a million bookings stored, a fresh code collides
+with probability ~1e-6.
+
+Uniqueness is not checked with a read: the booking is written with
+attribute_not_exists(bookingID) (see booking_reservations.reserve) and the
+rare collision is retried with a new code, so creating a booking costs one
+write.
+
+normalize_booking_id() undoes common typing mistakes (lower case, spaces,
+dashes, O/I/L for 0/1). Legacy 6-character codes used the full A-Z0-9
+alphabet, so lookups try the code as typed as well.
+"""
+import secrets
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+BOOKING_ID_LENGTH = 8
+
+# Symbols people type instead of the canonical ones
+CONFUSABLE = str.maketrans({'O': '0', 'I': '1', 'L': '1'})
+
+def new_booking_id(length=BOOKING_ID_LENGTH):
+    # 5 random bits per symbol, taken from a single draw
+    value = secrets.randbits(5 * length)
+    symbols = []
+    for _ in range(length):
+        symbols.append(ALPHABET[value & 31])
+        value >>= 5
+    return ''.join(symbols)
+
+def normalize_booking_id(text):
+    """Canonical form of a code as a customer typed it"""
+    cleaned = ''.join(character for character in str(text).upper() if character.isalnum())
+    return cleaned.translate(CONFUSABLE)
+
+def lookup_candidates(text):
+    """Codes to try for user input: the canonical form, then the code as typed (legacy IDs)"""
+    typed = ''.join(character for character in str(text).upper() if character.isalnum())
+    return list(dict.fromkeys([normalize_booking_id(text), typed]))
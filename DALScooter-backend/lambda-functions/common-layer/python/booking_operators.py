@@ -0,0 +1,71 @@
+"""
+Bookings by operator.
+
+Every booking carries the operatorID of its vehicle, copied when the booking
+is created, and OperatorStatusIndex is keyed on (operatorID, status). An
+operator's pending requests are therefore one query, however many vehicles
+the operator has, and status changes move bookings between index keys
+without any extra write.
+
+Run `python booking_operators.py --backfill` once to add operatorID to
+bookings written before it existed (they are absent from the sparse index
+until then).
+"""
+import os
+import argparse
+import logging
+from boto3.dynamodb.conditions import Key, Attr
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+BOOKING_TABLE_NAME = os.environ.get('TABLE_NAME', 'DALScooterBookings')
+VEHICLES_TABLE_NAME = os.environ.get('VEHICLES_TABLE_NAME', 'DALScooterVehicles')
+OPERATOR_STATUS_INDEX = 'OperatorStatusIndex'
+
+def operator_status_query(operator_id, status):
+    """Table.query kwargs for the bookings of operator_id in status"""
+    return {
+        'IndexName': OPERATOR_STATUS_INDEX,
+        'KeyConditionExpression': Key('operatorID').eq(operator_id) & Key('status').eq(status)
+    }
+
+def backfill(table_name=BOOKING_TABLE_NAME, vehicles_table_name=VEHICLES_TABLE_NAME):
+    """Copy operatorID from the vehicles onto bookings that lack it"""
+    import boto3
+    from pagination import items
+
+    dynamodb = boto3.resource('dynamodb')
+    table = dynamodb.Table(table_name)
+    operators = {
+        vehicle['vehicleID']: vehicle.get('operatorID')
+        for vehicle in items(dynamodb.Table(vehicles_table_name).scan, ProjectionExpression='vehicleID, operatorID')
+    }
+
+    updated = orphaned = 0
+    for booking in items(table.scan, FilterExpression=Attr('operatorID').not_exists(), ProjectionExpression='bookingID, vehicleID'):
+        operator_id = operators.get(booking.get('vehicleID'))
+        if not operator_id:
+            orphaned += 1
+            continue
+        table.update_item(
+            Key={'bookingID': booking['bookingID']},
+            UpdateExpression='SET operatorID = :operator_id',
+            ExpressionAttributeValues={':operator_id': operator_id}
+        )
+        updated += 1
+
+    logger.info(f"Added operatorID to {updated} bookings, {orphaned} bookings reference unknown vehicles")
+    return {'updated': updated, 'orphaned': orphaned}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Operator attribute on bookings')
+    parser.add_argument('--backfill', action='store_true', help='Add operatorID to existing bookings')
+    parser.add_argument('--table', default=BOOKING_TABLE_NAME)
+    parser.add_argument('--vehicles-table', default=VEHICLES_TABLE_NAME)
+    args = parser.parse_args()
+    if args.backfill:
+        logging.basicConfig(level=logging.INFO)
+        print(backfill(args.table, args.vehicles_table))
+    else:
+        parser.print_help()
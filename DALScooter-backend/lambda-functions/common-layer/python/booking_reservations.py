@@ -0,0 +1,311 @@
+"""
+Race-free slot reservation for bookings.
+
+A vehicle's timeline is split into fixed buckets of BOOKING_SLOT_MINUTES. A
+confirmed booking owns one lock item per bucket it touches in
+DALScooterBookingLocks (lockKey = "<vehicleID>#<bucket start epoch>").
+Locks are claimed when an operator accepts a booking: confirm() flips the
+booking from pending to confirmed and puts all of its locks in one
+transaction, each conditional on not existing yet. Two overlapping bookings
+always contend for at least one lock, so DynamoDB lets exactly one of them
+be confirmed, without any prior read.
+
+Pending requests hold no locks, like before reservations existed: any
+number of customers may request the same slot and the operator picks one.
+reserve(..., claim=False) writes a request together with a ConditionCheck on
+each of its slots, so a request for a slot that is already confirmed is
+rejected in the same write.
+
+Bookings are effectively rounded out to whole slots: two bookings sharing a
+slot conflict even if their exact times do not overlap (see slot_window).
+
+Confirmed bookings cannot be denied, so locks are never released; they
+expire through the table's TTL (expiresAt) some time after the slot has
+passed.
+
+reserve_batch() books several (vehicle, window) pairs all-or-nothing. They
+are packed into as few transactions as the 100-item limit allows; if a later
+transaction fails, the ones already committed are deleted again, so a failed
+batch can be visible for a moment but never stays half booked.
+
+Run `python booking_reservations.py --backfill-locks` once to create locks
+for confirmed bookings written before reservations existed.
+"""
+import os
+import time
+import argparse
+import logging
+
+from booking_times import MAX_BOOKING_SECONDS, to_epoch
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+LOCK_TABLE_NAME = os.environ.get('BOOKING_LOCK_TABLE', 'DALScooterBookingLocks')
+BOOKING_TABLE_NAME = os.environ.get('TABLE_NAME', 'DALScooterBookings')
+SLOT_SECONDS = int(os.environ.get('BOOKING_SLOT_MINUTES', '15')) * 60
+# Locks stay around this long after their slot ended, then TTL removes them
+LOCK_RETENTION_SECONDS = 7 * 24 * 3600
+
+# A transaction holds at most 100 items: the booking, its locks (one more
+# than the slot count when unaligned) and an outbox event
+MAX_TRANSACTION_ITEMS = 100
+if MAX_BOOKING_SECONDS // SLOT_SECONDS + 3 > MAX_TRANSACTION_ITEMS:
+    raise ValueError("MAX_BOOKING_HOURS / BOOKING_SLOT_MINUTES needs more locks than one transaction can hold")
+
+class SlotUnavailable(Exception):
+    """Another booking already holds one of the requested slots"""
+
+class DuplicateBookingID(Exception):
+    """The booking ID is already taken"""
+
+class NotPending(Exception):
+    """The booking to confirm is missing or no longer pending"""
+
+def slot_starts(start_epoch, end_epoch):
+    """Start epochs of every slot [start_epoch, end_epoch) touches"""
+    first = start_epoch - start_epoch % SLOT_SECONDS
+    return list(range(first, end_epoch, SLOT_SECONDS))
+
+def slot_window(start_epoch, end_epoch):
+    """[start_epoch, end_epoch) rounded out to slot boundaries"""
+    return start_epoch - start_epoch % SLOT_SECONDS, end_epoch - end_epoch % -SLOT_SECONDS
+
+def lock_key(vehicle_id, slot_start):
+    return f"{vehicle_id}#{slot_start}"
+
+def lock_puts(booking_id, vehicle_id, start_epoch, end_epoch):
+    """Conditional Put operations claiming every slot of a booking"""
+    return [
+        {
+            'Put': {
+                'TableName': LOCK_TABLE_NAME,
+                'Item': {
+                    'lockKey': {'S': lock_key(vehicle_id, slot)},
+                    'bookingID': {'S': booking_id},
+                    'vehicleID': {'S': vehicle_id},
+                    'expiresAt': {'N': str(slot + SLOT_SECONDS + LOCK_RETENTION_SECONDS)}
+                },
+                'ConditionExpression': 'attribute_not_exists(lockKey)'
+            }
+        }
+        for slot in slot_starts(start_epoch, end_epoch)
+    ]
+
+def lock_checks(vehicle_id, start_epoch, end_epoch):
+    """ConditionCheck operations requiring every slot of a window to be unclaimed"""
+    return [
+        {
+            'ConditionCheck': {
+                'TableName': LOCK_TABLE_NAME,
+                'Key': {'lockKey': {'S': lock_key(vehicle_id, slot)}},
+                'ConditionExpression': 'attribute_not_exists(lockKey)'
+            }
+        }
+        for slot in slot_starts(start_epoch, end_epoch)
+    ]
+
+def slot_operations(booking_id, vehicle_id, start_epoch, end_epoch, claim=True):
+    """Lock puts when claiming the slots, condition checks otherwise"""
+    if claim:
+        return lock_puts(booking_id, vehicle_id, start_epoch, end_epoch)
+    return lock_checks(vehicle_id, start_epoch, end_epoch)
+
+def booking_put(booking_item, table_name=None):
+    return {
+        'Put': {
+            'TableName': table_name or BOOKING_TABLE_NAME,
+            'Item': booking_item,
+            'ConditionExpression': 'attribute_not_exists(bookingID)'
+        }
+    }
+
+def reserve(client, booking_item, vehicle_id, start_epoch, end_epoch, table_name=None, extra_items=(), claim=True):
+    """
+    Write booking_item (low-level typed attributes) together with its slot
+    locks in a single transaction, or with checks that none of its slots is
+    locked when claim is False (pending requests). extra_items (e.g. outbox
+    events) are written in the same transaction.
+
+    Raises SlotUnavailable when any slot is taken and DuplicateBookingID when
+    the booking ID already exists; nothing is written in either case.
+    """
+    try:
+        client.transact_write_items(
+            TransactItems=[booking_put(booking_item, table_name)] + slot_operations(booking_item['bookingID']['S'], vehicle_id, start_epoch, end_epoch, claim) + list(extra_items)
+        )
+    except client.exceptions.TransactionCanceledException as e:
+        reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+        if reasons and reasons[0] == 'ConditionalCheckFailed':
+            raise DuplicateBookingID(booking_item['bookingID']['S'])
+        if 'ConditionalCheckFailed' in reasons:
+            raise SlotUnavailable(vehicle_id)
+        # TransactionConflict and friends: let the caller retry or fail
+        raise
+
+def confirm_update(booking_id, table_name=None):
+    """Update operation flipping a pending booking to confirmed"""
+    return {
+        'Update': {
+            'TableName': table_name or BOOKING_TABLE_NAME,
+            'Key': {'bookingID': {'S': booking_id}},
+            'UpdateExpression': 'SET #status = :confirmed',
+            'ConditionExpression': '#status = :pending',
+            'ExpressionAttributeNames': {'#status': 'status'},
+            'ExpressionAttributeValues': {':confirmed': {'S': 'confirmed'}, ':pending': {'S': 'pending'}}
+        }
+    }
+
+def confirm(client, booking_id, vehicle_id, start_epoch, end_epoch, table_name=None, extra_items=()):
+    """
+    Confirm a pending booking and claim its slot locks in one transaction,
+    with extra_items (e.g. the customer notification) written alongside.
+
+    Raises NotPending when the booking is missing or no longer pending and
+    SlotUnavailable(vehicle_id, booking_id) when another confirmed booking
+    holds one of its slots; nothing is written in either case.
+    """
+    try:
+        client.transact_write_items(
+            TransactItems=[confirm_update(booking_id, table_name)] + lock_puts(booking_id, vehicle_id, start_epoch, end_epoch) + list(extra_items)
+        )
+    except client.exceptions.TransactionCanceledException as e:
+        reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+        if reasons and reasons[0] == 'ConditionalCheckFailed':
+            raise NotPending(booking_id)
+        if 'ConditionalCheckFailed' in reasons:
+            raise SlotUnavailable(vehicle_id, booking_id)
+        raise
+
+def reservation_chunks(reservations):
+    """Group (booking_item, vehicle_id, start_epoch, end_epoch) tuples into transaction-sized lists"""
+    chunk, size = [], 0
+    for reservation in reservations:
+        count = 1 + len(slot_starts(reservation[2], reservation[3]))
+        if chunk and size + count > MAX_TRANSACTION_ITEMS:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(reservation)
+        size += count
+    if chunk:
+        yield chunk
+
+def reserve_batch(client, reservations, table_name=None, extra_items=(), claim=True):
+    """
+    Reserve every (booking_item, vehicle_id, start_epoch, end_epoch) tuple, or
+    none. With claim False the slots are only checked, as in reserve().
+
+    Windows within the batch must not share slots (the caller validates
+    this); DynamoDB rejects transactions touching an item twice. extra_items
+    go into the last transaction, or one of their own if they do not fit, so
+    they are only written once every reservation is. Raises
+    SlotUnavailable(vehicle_id, booking_id) for the first taken slot and
+    DuplicateBookingID(booking_id) for a taken ID, after undoing whatever
+    part of the batch was already written.
+    """
+    transactions = []
+    for chunk in reservation_chunks(reservations):
+        transact_items, owners = [], []
+        for booking_item, vehicle_id, start_epoch, end_epoch in chunk:
+            booking_id = booking_item['bookingID']['S']
+            locks = slot_operations(booking_id, vehicle_id, start_epoch, end_epoch, claim)
+            transact_items.append(booking_put(booking_item, table_name))
+            transact_items.extend(locks)
+            owners.append((booking_id, vehicle_id, True))
+            owners.extend([(booking_id, vehicle_id, False)] * len(locks))
+        transactions.append((chunk, transact_items, owners))
+    if extra_items:
+        if transactions and len(transactions[-1][1]) + len(extra_items) <= MAX_TRANSACTION_ITEMS:
+            transactions[-1][1].extend(extra_items)
+        else:
+            transactions.append(([], list(extra_items), []))
+
+    committed = []
+    try:
+        for chunk, transact_items, owners in transactions:
+            try:
+                client.transact_write_items(TransactItems=transact_items)
+            except client.exceptions.TransactionCanceledException as e:
+                reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+                for (booking_id, vehicle_id, is_booking), code in zip(owners, reasons):
+                    if code == 'ConditionalCheckFailed':
+                        if is_booking:
+                            raise DuplicateBookingID(booking_id)
+                        raise SlotUnavailable(vehicle_id, booking_id)
+                raise
+            committed.extend(chunk)
+    except Exception:
+        if committed:
+            cancel_batch(client, committed, table_name, claim)
+        raise
+
+def cancel_batch(client, reservations, table_name=None, claim=True):
+    """Delete bookings written by reserve_batch together with their locks, if it claimed any"""
+    for chunk in reservation_chunks(reservations):
+        transact_items = []
+        for booking_item, vehicle_id, start_epoch, end_epoch in chunk:
+            booking_id = booking_item['bookingID']['S']
+            transact_items.append({
+                'Delete': {
+                    'TableName': table_name or BOOKING_TABLE_NAME,
+                    'Key': {'bookingID': {'S': booking_id}}
+                }
+            })
+            if not claim:
+                continue
+            transact_items.extend(
+                {
+                    'Delete': {
+                        'TableName': LOCK_TABLE_NAME,
+                        'Key': {'lockKey': {'S': lock_key(vehicle_id, slot)}},
+                        'ConditionExpression': 'bookingID = :booking_id',
+                        'ExpressionAttributeValues': {':booking_id': {'S': booking_id}}
+                    }
+                }
+                for slot in slot_starts(start_epoch, end_epoch)
+            )
+        client.transact_write_items(TransactItems=transact_items)
+    logger.info(f"Rolled back {len(reservations)} reservations of a failed batch")
+
+def backfill_locks(table_name=BOOKING_TABLE_NAME):
+    """Create locks for upcoming confirmed bookings that predate reservations"""
+    import boto3
+
+    client = boto3.client('dynamodb')
+    table = boto3.resource('dynamodb').Table(table_name)
+    now = int(time.time())
+    created = conflicts = 0
+    request = {'ProjectionExpression': 'bookingID, vehicleID, startTime, endTime, #status', 'ExpressionAttributeNames': {'#status': 'status'}}
+    while True:
+        response = table.scan(**request)
+        for booking in response.get('Items', []):
+            if booking.get('status') != 'confirmed':
+                continue
+            start_epoch, end_epoch = to_epoch(booking['startTime']), to_epoch(booking['endTime'])
+            if end_epoch <= now:
+                continue
+            # Locks are claimed one by one: an existing overlap is logged, not fixed
+            for operation in lock_puts(booking['bookingID'], booking['vehicleID'], start_epoch, end_epoch):
+                try:
+                    client.put_item(**operation['Put'])
+                    created += 1
+                except client.exceptions.ConditionalCheckFailedException:
+                    conflicts += 1
+                    logger.warning(f"Slot {operation['Put']['Item']['lockKey']['S']} already locked, booking {booking['bookingID']} overlaps another")
+        if 'LastEvaluatedKey' not in response:
+            break
+        request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    logger.info(f"Created {created} locks, {conflicts} slots already held")
+    return {'created': created, 'conflicts': conflicts}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Booking slot reservations')
+    parser.add_argument('--backfill-locks', action='store_true', help='Create locks for existing upcoming bookings')
+    parser.add_argument('--table', default=BOOKING_TABLE_NAME)
+    args = parser.parse_args()
+    if args.backfill_locks:
+        logging.basicConfig(level=logging.INFO)
+        print(backfill_locks(args.table))
+    else:
+        parser.print_help()
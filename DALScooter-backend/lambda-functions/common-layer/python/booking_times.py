@@ -0,0 +1,126 @@
+"""
+Epoch-normalized booking times.
+
+Bookings store startTime/endTime as ISO strings in whatever form the client
+sent ('Z' or '+00:00', with or without milliseconds), which do not compare
+correctly as text. Every booking therefore also carries integer
+startEpoch/endEpoch attributes, and VehicleStartIndex is keyed on
+(vehicleID, startEpoch).
+
+Bookings are capped at MAX_BOOKING_HOURS, so a booking overlapping
+[start, end) must start in [start - max duration, end): the conflict check
+is a bounded range query on the index whose cost does not grow with the
+vehicle's booking history.
+
+Run `python booking_times.py --backfill` to add the epoch attributes to
+bookings written before they existed (items without startEpoch are absent
+from the sparse index until then).
+"""
+import os
+import math
+import argparse
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+BOOKING_TABLE_NAME = os.environ.get('TABLE_NAME', 'DALScooterBookings')
+VEHICLE_START_INDEX = 'VehicleStartIndex'
+MAX_BOOKING_HOURS = int(os.environ.get('MAX_BOOKING_HOURS', '24'))
+MAX_BOOKING_SECONDS = MAX_BOOKING_HOURS * 3600
+
+def parse_time(value):
+    """ISO 8601 (with or without trailing Z) or epoch seconds (int/Decimal) -> epoch seconds"""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        pass
+    else:
+        # float() also accepts 'nan' and 'inf', which no booking can start at
+        if not math.isfinite(seconds):
+            raise ValueError(f"Not a finite timestamp: {value}")
+        return seconds
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        # Naive timestamps are treated as UTC, like the ones the frontend sends
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def to_epoch(value):
+    """ISO 8601 string -> integer epoch seconds (floored, so sub-second parts never widen a booking)"""
+    return int(math.floor(parse_time(value)))
+
+def conflict_query(table_name, vehicle_id, start_epoch, end_epoch, status='confirmed'):
+    """Low-level client query kwargs finding bookings overlapping [start_epoch, end_epoch)"""
+    return {
+        'TableName': table_name,
+        'IndexName': VEHICLE_START_INDEX,
+        'KeyConditionExpression': 'vehicleID = :vehicle_id AND startEpoch BETWEEN :earliest_start AND :latest_start',
+        'FilterExpression': '#status = :status AND endEpoch > :start',
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': {
+            ':vehicle_id': {'S': vehicle_id},
+            ':earliest_start': {'N': str(start_epoch - MAX_BOOKING_SECONDS)},
+            ':latest_start': {'N': str(end_epoch - 1)},
+            ':start': {'N': str(start_epoch)},
+            ':status': {'S': status}
+        }
+    }
+
+def find_conflicts(client, table_name, vehicle_id, start_epoch, end_epoch, status='confirmed'):
+    """All bookings of vehicle_id overlapping [start_epoch, end_epoch), following pagination"""
+    request = conflict_query(table_name, vehicle_id, start_epoch, end_epoch, status)
+    conflicts = []
+    while True:
+        response = client.query(**request)
+        conflicts.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return conflicts
+        request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def backfill(table_name=BOOKING_TABLE_NAME):
+    """Add startEpoch/endEpoch to every booking that lacks them"""
+    import boto3
+    from boto3.dynamodb.conditions import Attr
+
+    table = boto3.resource('dynamodb').Table(table_name)
+    updated = skipped = 0
+    request = {
+        'FilterExpression': Attr('startEpoch').not_exists() | Attr('endEpoch').not_exists(),
+        'ProjectionExpression': 'bookingID, startTime, endTime'
+    }
+    while True:
+        response = table.scan(**request)
+        for booking in response.get('Items', []):
+            try:
+                start_epoch = to_epoch(booking['startTime'])
+                end_epoch = to_epoch(booking['endTime'])
+            except (KeyError, ValueError):
+                logger.warning(f"Skipping booking {booking['bookingID']} with unparseable times")
+                skipped += 1
+                continue
+            # Only fill attributes a concurrent writer has not set meanwhile
+            table.update_item(
+                Key={'bookingID': booking['bookingID']},
+                UpdateExpression='SET startEpoch = if_not_exists(startEpoch, :start), endEpoch = if_not_exists(endEpoch, :end)',
+                ExpressionAttributeValues={':start': start_epoch, ':end': end_epoch}
+            )
+            updated += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    logger.info(f"Backfilled {updated} bookings, skipped {skipped}")
+    return {'updated': updated, 'skipped': skipped}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Booking epoch attributes')
+    parser.add_argument('--backfill', action='store_true', help='Add startEpoch/endEpoch to existing bookings')
+    parser.add_argument('--table', default=BOOKING_TABLE_NAME)
+    args = parser.parse_args()
+    if args.backfill:
+        logging.basicConfig(level=logging.INFO)
+        print(backfill(args.table))
+    else:
+        parser.print_help()
@@ -0,0 +1,48 @@
+"""
+Per-table change markers.
+
+DALScooterChangeMarkers holds one item per source table with a version
+counter that the change-markers Lambda bumps whenever the table's stream
+reports a write. Readers derive cache validators (ETags) from the versions of
+the tables a response depends on, so an unchanged fleet can be answered
+without reading or re-serializing anything.
+"""
+import os
+import json
+import time
+import hashlib
+import boto3
+
+dynamodb = boto3.resource('dynamodb')
+
+CHANGE_MARKER_TABLE = os.environ.get('CHANGE_MARKER_TABLE', 'DALScooterChangeMarkers')
+
+def table_name_from_arn(arn):
+    """arn:aws:dynamodb:region:account:table/NAME/stream/... -> NAME"""
+    return arn.split(':table/', 1)[1].split('/', 1)[0]
+
+def bump(table_name, count=1):
+    """Increment the version of table_name and return the new version"""
+    response = dynamodb.Table(CHANGE_MARKER_TABLE).update_item(
+        Key={'tableName': table_name},
+        UpdateExpression='ADD version :count SET updatedAt = :now',
+        ExpressionAttributeValues={':count': count, ':now': int(time.time())},
+        ReturnValues='UPDATED_NEW'
+    )
+    return int(response['Attributes']['version'])
+
+def read_versions(table_names):
+    """{table_name: version} for the given tables; tables never written report 0"""
+    versions = {name: 0 for name in table_names}
+    request = {CHANGE_MARKER_TABLE: {'Keys': [{'tableName': name} for name in table_names]}}
+    while request:
+        response = dynamodb.batch_get_item(RequestItems=request)
+        for item in response.get('Responses', {}).get(CHANGE_MARKER_TABLE, []):
+            versions[item['tableName']] = int(item['version'])
+        request = response.get('UnprocessedKeys')
+    return versions
+
+def etag(versions, *extra):
+    """Strong ETag over table versions plus anything else the body depends on"""
+    payload = json.dumps([sorted(versions.items()), extra], default=str)
+    return '"' + hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32] + '"'
@@ -0,0 +1,41 @@
+"""
+Batched DynamoDB reads.
+
+batch_get() resolves any number of keys with as few BatchGetItem calls as
+the 100-key limit allows, retrying UnprocessedKeys with exponential backoff.
+It works with both boto3.resource('dynamodb') (plain keys and items) and
+boto3.client('dynamodb') (typed keys and items).
+"""
+import json
+import time
+
+MAX_BATCH_GET_KEYS = 100
+
+class UnprocessedKeysError(Exception):
+    """DynamoDB kept returning UnprocessedKeys after every retry"""
+
+def chunks(sequence, size):
+    sequence = list(sequence)
+    return [sequence[start:start + size] for start in range(0, len(sequence), size)]
+
+def batch_get(dynamodb, table_name, keys, projection=None, names=None, max_attempts=5):
+    """Items for keys in table_name (missing keys are simply absent); duplicate keys are requested once"""
+    unique = list({json.dumps(key, sort_keys=True, default=str): key for key in keys}.values())
+    found = []
+    for chunk in chunks(unique, MAX_BATCH_GET_KEYS):
+        request = {table_name: {'Keys': chunk}}
+        if projection:
+            request[table_name]['ProjectionExpression'] = projection
+        if names:
+            request[table_name]['ExpressionAttributeNames'] = names
+        attempt = 0
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            found.extend(response.get('Responses', {}).get(table_name, []))
+            request = response.get('UnprocessedKeys')
+            if request:
+                attempt += 1
+                if attempt >= max_attempts:
+                    raise UnprocessedKeysError(f"{table_name}: keys still unprocessed after {attempt} attempts")
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+    return found
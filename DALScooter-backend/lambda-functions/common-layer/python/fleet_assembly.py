@@ -0,0 +1,70 @@
+"""
+Assemble the vehicle listing from the vehicles, bookings and feedback tables.
+
+Feedback only references a booking (bookingReferenceCode), so attaching it to
+vehicles is a join through bookings. It is done as a hash join:
+
+- every table is read lazily, page by page (pagination.items), so no read is
+  silently truncated at 1 MB and nothing is materialized twice
+- feedback is grouped by vehicleID in one pass; items already resolved by the
+  feedback aggregator carry their vehicleID and skip the lookup
+- the bookingID -> vehicleID index is only built (with a projected scan)
+  when some feedback item still needs it
+
+Total work is O(vehicles + bookings + feedback) instead of
+O(vehicles x feedback).
+"""
+from pagination import items
+
+def scan_items(table, **kwargs):
+    """Lazily yield every item of a table scan, following LastEvaluatedKey"""
+    return items(table.scan, **kwargs)
+
+def booking_vehicle_index(bookings):
+    """Build {bookingID: vehicleID} from an iterable of bookings"""
+    return {booking['bookingID']: booking.get('vehicleID') for booking in bookings}
+
+class LazyBookingIndex:
+    """bookingID -> vehicleID mapping that is only loaded on first lookup"""
+
+    def __init__(self, load_bookings):
+        self.load_bookings = load_bookings
+        self.index = None
+
+    def get(self, booking_id):
+        if self.index is None:
+            self.index = booking_vehicle_index(self.load_bookings())
+        return self.index.get(booking_id)
+
+    @property
+    def loaded(self):
+        return self.index is not None
+
+def group_feedback_by_vehicle(feedbacks, booking_index):
+    """
+    One pass over feedback: {vehicleID: [feedback, ...]}.
+
+    booking_index is anything with get(bookingID) -> vehicleID (a dict or a
+    LazyBookingIndex). Feedback whose booking cannot be resolved is dropped.
+    """
+    grouped = {}
+    for feedback in feedbacks:
+        vehicle_id = feedback.get('vehicleID') or booking_index.get(feedback.get('bookingReferenceCode'))
+        if vehicle_id:
+            grouped.setdefault(vehicle_id, []).append(feedback)
+    return grouped
+
+def assemble_fleet(vehicles_table, bookings_table, feedback_table, aggregate_table):
+    """
+    Read all four tables and return (vehicles, feedback_by_vehicle, aggregates).
+
+    Bookings are scanned with a projection of just the two join columns.
+    """
+    booking_index = LazyBookingIndex(lambda: scan_items(
+        bookings_table,
+        ProjectionExpression='bookingID, vehicleID'
+    ))
+    feedback_by_vehicle = group_feedback_by_vehicle(scan_items(feedback_table), booking_index)
+    aggregates = {item['vehicleID']: item for item in scan_items(aggregate_table)}
+    vehicles = list(scan_items(vehicles_table))
+    return vehicles, feedback_by_vehicle, aggregates
@@ -0,0 +1,206 @@
+"""
+Precomputed fleet snapshot.
+
+The fully assembled vehicle list served by get-vehicles (vehicles with their
+feedback and sentiment) is materialized as a JSON object in the versioned
+S3 bucket. The snapshot builder Lambda regenerates it whenever a change
+marker moves, and get-vehicles serves it with a single GET.
+
+Every snapshot records the change-marker versions it was built from (read
+before any table), so it can be compared with the current versions:
+
+- equal versions: the snapshot is current
+- otherwise it is at most (now - builtAt) seconds stale, and get-vehicles
+  only serves it within SNAPSHOT_MAX_STALENESS
+
+Rebuilds are incremental where possible. Bookings only feed the feedback
+join, and feedback always references a booking made before it (whose vehicle
+never changes), so booking writes on their own cannot change the fleet:
+
+- only bookings moved: the previous snapshot is re-stamped with the new
+  versions without reading any table
+- only vehicles (and bookings) moved: feedback and sentiment are carried over
+  from the previous snapshot and just the vehicles table is re-read
+- feedback moved: full rebuild
+"""
+import os
+import json
+import time
+from decimal import Decimal
+import boto3
+from botocore.exceptions import ClientError
+
+from sentiment import analyze_sentiments, cache_stats
+from sentiment_aggregates import summarize
+from fleet_assembly import assemble_fleet, scan_items
+from change_markers import read_versions, etag
+
+dynamodb = boto3.resource('dynamodb')
+s3 = boto3.client('s3')
+
+VEHICLE_TABLE = os.environ.get('VEHICLE_TABLE', 'DALScooterVehicles')
+BOOKING_TABLE = os.environ.get('BOOKING_TABLE', 'DALScooterBookings')
+FEEDBACK_TABLE = os.environ.get('FEEDBACK_TABLE_NAME', 'DALScooter-FeedbackTable')
+SENTIMENT_AGGREGATE_TABLE = os.environ.get('SENTIMENT_AGGREGATE_TABLE', 'DALScooter-VehicleSentiment')
+SNAPSHOT_BUCKET = os.environ.get('SNAPSHOT_BUCKET', 'dalscooter-vehicle-images-eab8dd1b0fadbd67')
+SNAPSHOT_KEY = os.environ.get('SNAPSHOT_KEY', 'fleet-snapshots/latest.json')
+SNAPSHOT_MAX_STALENESS = int(os.environ.get('SNAPSHOT_MAX_STALENESS', '60'))
+
+# Tables the fleet is assembled from; sentiment aggregates only change
+# together with a feedback item, so the feedback marker covers them
+SOURCE_TABLES = [VEHICLE_TABLE, BOOKING_TABLE, FEEDBACK_TABLE]
+# Tables whose changes never require re-reading feedback
+INCREMENTAL_TABLES = {VEHICLE_TABLE, BOOKING_TABLE}
+# Bump when the response shape changes so cached bodies are not revalidated
+RESPONSE_VERSION = 2
+
+# Helper function to convert Decimal to float/int for JSON serialization
+def decimal_to_json_serializable(obj):
+    if isinstance(obj, Decimal):
+        if obj % 1 == 0:
+            return int(obj)
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+def fleet_etag(versions):
+    """
+    ETag of the fleet at versions. It depends on nothing but the versions and
+    the response shape, so the snapshot builder and get-vehicles agree on it
+    whatever their environments.
+    """
+    return etag(versions, RESPONSE_VERSION)
+
+def render_fleet(vehicles, vehicle_feedbacks, aggregates):
+    """Attach feedback and overall_sentiment to every vehicle (in place)"""
+    # Feedback not aggregated yet (stream lag or pre-backfill item) is scored
+    # inline, for all vehicles in one concurrent batch
+    unscored = [
+        f for vehicle in vehicles for f in vehicle_feedbacks.get(vehicle.get('vehicleID'), [])
+        if 'sentimentScore' not in f
+    ]
+    for feedback, (score, magnitude) in zip(unscored, analyze_sentiments([f['feedbackMessage'] for f in unscored])):
+        feedback['inlineSentiment'] = (score, magnitude)
+    print("Sentiment cache stats:", cache_stats())
+
+    for vehicle in vehicles:
+        aggregate = dict(aggregates.get(vehicle.get('vehicleID'), {}))
+        feedback_with_sentiment = []
+        for feedback in vehicle_feedbacks.get(vehicle.get('vehicleID'), []):
+            if 'sentimentScore' in feedback:
+                score = feedback['sentimentScore']
+                magnitude = feedback['sentimentMagnitude']
+            else:
+                # Fold inline scores into this response only
+                score, magnitude = feedback['inlineSentiment']
+                aggregate['feedbackCount'] = int(aggregate.get('feedbackCount', 0)) + 1
+                aggregate['scoreSum'] = float(aggregate.get('scoreSum', 0)) + score
+                aggregate['magnitudeSum'] = float(aggregate.get('magnitudeSum', 0)) + magnitude
+            feedback_with_sentiment.append({
+                'message': feedback['feedbackMessage'],
+                'timestamp': feedback['timestamp'],
+                'sentiment_score': score,
+                'sentiment_magnitude': magnitude
+            })
+        vehicle['feedbacks'] = feedback_with_sentiment
+        vehicle['overall_sentiment'] = summarize(aggregate)
+    return vehicles
+
+def build_fleet():
+    """Assemble the vehicle list from the tables"""
+    vehicles, vehicle_feedbacks, aggregates = assemble_fleet(
+        dynamodb.Table(VEHICLE_TABLE),
+        dynamodb.Table(BOOKING_TABLE),
+        dynamodb.Table(FEEDBACK_TABLE),
+        dynamodb.Table(SENTIMENT_AGGREGATE_TABLE)
+    )
+    print(f"Fetched {len(vehicles)} vehicles, feedback for {len(vehicle_feedbacks)} vehicles")
+    return render_fleet(vehicles, vehicle_feedbacks, aggregates)
+
+def rebuild_vehicles(previous_vehicles):
+    """Re-read only the vehicles table, reusing feedback and sentiment per vehicle"""
+    previous = {vehicle['vehicleID']: vehicle for vehicle in previous_vehicles}
+    vehicles = list(scan_items(dynamodb.Table(VEHICLE_TABLE)))
+    for vehicle in vehicles:
+        known = previous.get(vehicle['vehicleID'], {})
+        vehicle['feedbacks'] = known.get('feedbacks', [])
+        vehicle['overall_sentiment'] = known.get('overall_sentiment') or summarize(None)
+    return vehicles
+
+# Last snapshot read by this container: (S3 ETag, body, metadata)
+_cached = None
+
+def load_snapshot():
+    """
+    Return (body_bytes, metadata) of the latest snapshot, or (None, None).
+
+    Warm containers revalidate their copy with a conditional GET, so an
+    unchanged snapshot is not downloaded again.
+    """
+    global _cached
+    request = {'Bucket': SNAPSHOT_BUCKET, 'Key': SNAPSHOT_KEY}
+    if _cached:
+        request['IfNoneMatch'] = _cached[0]
+    try:
+        response = s3.get_object(**request)
+    except ClientError as e:
+        code = e.response['Error']['Code']
+        if code in ('304', 'NotModified') and _cached:
+            return _cached[1], _cached[2]
+        if code in ('NoSuchKey', '404'):
+            return None, None
+        raise
+    metadata = response.get('Metadata', {})
+    body = response['Body'].read()
+    metadata = {
+        'versions': json.loads(metadata.get('versions', '{}')),
+        'built_at': float(metadata.get('built-at', 0)),
+        'etag': metadata.get('fleet-etag')
+    }
+    _cached = (response['ETag'], body, metadata)
+    return body, metadata
+
+def write_snapshot(vehicles, versions, built_at):
+    body = json.dumps(vehicles, default=decimal_to_json_serializable).encode('utf-8')
+    s3.put_object(
+        Bucket=SNAPSHOT_BUCKET,
+        Key=SNAPSHOT_KEY,
+        Body=body,
+        ContentType='application/json',
+        Metadata={
+            'versions': json.dumps(versions, sort_keys=True),
+            'built-at': str(built_at),
+            'fleet-etag': fleet_etag(versions)
+        }
+    )
+    return len(body)
+
+def refresh_snapshot(force=False):
+    """
+    Bring the snapshot up to date with the change markers.
+
+    Returns a short summary of what was done: 'current' when the snapshot
+    already matched, 'bookings' when only the versions were re-stamped,
+    'vehicles' for an incremental rebuild, 'full' otherwise.
+    """
+    # Staleness is measured from before the markers are read
+    started_at = time.time()
+    versions = read_versions(SOURCE_TABLES)
+    body, metadata = (None, None) if force else load_snapshot()
+
+    if metadata and metadata['versions'] == versions:
+        return {'mode': 'current', 'versions': versions}
+
+    changed = {table for table in SOURCE_TABLES if metadata and metadata['versions'].get(table) != versions[table]}
+    if metadata and changed <= INCREMENTAL_TABLES and VEHICLE_TABLE not in changed:
+        mode = 'bookings'
+        vehicles = json.loads(body)
+    elif metadata and changed <= INCREMENTAL_TABLES:
+        mode = 'vehicles'
+        vehicles = rebuild_vehicles(json.loads(body))
+    else:
+        mode = 'full'
+        vehicles = build_fleet()
+
+    size = write_snapshot(vehicles, versions, started_at)
+    print(f"Snapshot rebuilt ({mode}): {len(vehicles)} vehicles, {size} bytes")
+    return {'mode': mode, 'versions': versions, 'vehicles': len(vehicles), 'bytes': size}
@@ -0,0 +1,101 @@
+"""
+Idempotency ledger for queue consumers.
+
+SQS delivers at least once, and with partial batch failure reporting a
+retried message may already have been handled before. process_once(key, ...)
+records each unit of work in DALScooterIdempotency:
+
+- claim:    conditional put of an IN_PROGRESS item with a lease; fails if
+            the key is COMPLETED (skip) or leased by a live invocation
+- complete: mark COMPLETED once the side effects happened
+- abandon:  delete the claim after a failure so a redelivery can retry
+
+A claim whose lease ran out (the invocation crashed or timed out) can be
+taken over. Items expire through TTL after RECORD_RETENTION_SECONDS, which
+outlives the queues' message retention.
+"""
+import os
+import time
+import logging
+import boto3
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.client('dynamodb')
+
+IDEMPOTENCY_TABLE_NAME = os.environ.get('IDEMPOTENCY_TABLE', 'DALScooterIdempotency')
+# Longer than the consumers' Lambda timeout
+LEASE_SECONDS = int(os.environ.get('IDEMPOTENCY_LEASE_SECONDS', '180'))
+RECORD_RETENTION_SECONDS = 7 * 24 * 3600
+
+IN_PROGRESS = 'IN_PROGRESS'
+COMPLETED = 'COMPLETED'
+
+class AlreadyInProgress(Exception):
+    """Another invocation holds a live claim on the key"""
+
+def claim(key):
+    """True if the work for key should run now, False if it was already completed"""
+    now = int(time.time())
+    try:
+        dynamodb.put_item(
+            TableName=IDEMPOTENCY_TABLE_NAME,
+            Item={
+                'idempotencyKey': {'S': key},
+                'status': {'S': IN_PROGRESS},
+                'leaseExpiresAt': {'N': str(now + LEASE_SECONDS)},
+                'expiresAt': {'N': str(now + RECORD_RETENTION_SECONDS)}
+            },
+            ConditionExpression='attribute_not_exists(idempotencyKey) OR (#status = :in_progress AND leaseExpiresAt < :now)',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':in_progress': {'S': IN_PROGRESS}, ':now': {'N': str(now)}},
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+        return True
+    except dynamodb.exceptions.ConditionalCheckFailedException as e:
+        if e.response.get('Item', {}).get('status', {}).get('S') == COMPLETED:
+            return False
+        raise AlreadyInProgress(key)
+
+def complete(key):
+    dynamodb.update_item(
+        TableName=IDEMPOTENCY_TABLE_NAME,
+        Key={'idempotencyKey': {'S': key}},
+        UpdateExpression='SET #status = :completed, completedAt = :now REMOVE leaseExpiresAt',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':completed': {'S': COMPLETED}, ':now': {'N': str(int(time.time()))}}
+    )
+
+def abandon(key):
+    """Drop our claim so that the next delivery retries the work"""
+    try:
+        dynamodb.delete_item(
+            TableName=IDEMPOTENCY_TABLE_NAME,
+            Key={'idempotencyKey': {'S': key}},
+            ConditionExpression='#status = :in_progress',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':in_progress': {'S': IN_PROGRESS}}
+        )
+    except dynamodb.exceptions.ConditionalCheckFailedException:
+        pass
+
+def process_once(key, function, *args, **kwargs):
+    """
+    Run function(*args, **kwargs) unless key was already processed.
+
+    Returns True if it ran, False if it was skipped as a duplicate. Raises
+    AlreadyInProgress while another invocation works on key, and re-raises
+    errors of function after abandoning the claim; callers report either as
+    a failed batch item.
+    """
+    if not claim(key):
+        logger.info(f"Skipping {key}: already processed")
+        return False
+    try:
+        function(*args, **kwargs)
+    except Exception:
+        abandon(key)
+        raise
+    complete(key)
+    return True
@@ -0,0 +1,135 @@
+"""
+Warm-container cache for lookups that almost never change.
+
+Notification handlers map vehicleID -> operatorID for every message. A
+LookupCache keeps those answers in the container between invocations:
+
+- entries expire after ttl_seconds; keys the table does not have are cached
+  as absent for the shorter negative_ttl_seconds
+- at most max_entries keys, the least recently used are evicted first
+- the change-markers stream handler bumps a mapping's marker in
+  DALScooterChangeMarkers whenever its source table changes (the vehicles
+  table for VEHICLE_OPERATORS), whichever Lambda wrote it; every cache
+  re-reads its marker at most every MARKER_CHECK_SECONDS and drops all
+  entries when the version moved
+- stats() reports hits, negative hits, misses and the hit rate
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from change_markers import read_versions
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+LOOKUP_CACHE_TTL = int(os.environ.get('LOOKUP_CACHE_TTL', '900'))
+LOOKUP_CACHE_NEGATIVE_TTL = int(os.environ.get('LOOKUP_CACHE_NEGATIVE_TTL', '60'))
+LOOKUP_CACHE_SIZE = int(os.environ.get('LOOKUP_CACHE_SIZE', '10000'))
+MARKER_CHECK_SECONDS = int(os.environ.get('LOOKUP_CACHE_MARKER_CHECK', '30'))
+
+# Change markers of the shared mappings
+VEHICLE_OPERATORS = 'cache:vehicle-operators'
+
+# Stored for keys the loader did not return
+ABSENT = object()
+
+class LookupCache:
+    def __init__(self, name, marker=None, ttl_seconds=None, negative_ttl_seconds=None, max_entries=None):
+        self.name = name
+        self.marker = marker
+        self.ttl_seconds = LOOKUP_CACHE_TTL if ttl_seconds is None else ttl_seconds
+        self.negative_ttl_seconds = LOOKUP_CACHE_NEGATIVE_TTL if negative_ttl_seconds is None else negative_ttl_seconds
+        self.max_entries = LOOKUP_CACHE_SIZE if max_entries is None else max_entries
+        self.entries = OrderedDict()  # key -> (value, expires_at)
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+        self.marker_version = None
+        self.marker_checked_at = None
+
+    def get_many(self, keys, loader):
+        """
+        {key: value} for keys. Misses are resolved with one loader(missing_keys)
+        call returning {key: value}; keys it leaves out are cached as absent
+        and are missing from the result as well.
+        """
+        self._check_marker()
+        now = time.monotonic()
+        found, missing = {}, []
+        with self.lock:
+            for key in dict.fromkeys(keys):
+                entry = self.entries.get(key)
+                if entry and entry[1] > now:
+                    self.entries.move_to_end(key)
+                    if entry[0] is ABSENT:
+                        self.counters['negative_hits'] += 1
+                    else:
+                        found[key] = entry[0]
+                        self.counters['hits'] += 1
+                    continue
+                if entry:
+                    del self.entries[key]
+                    self.counters['expirations'] += 1
+                missing.append(key)
+            self.counters['misses'] += len(missing)
+
+        if missing:
+            loaded = loader(missing)
+            self._remember({key: loaded.get(key, ABSENT) for key in missing})
+            found.update({key: loaded[key] for key in missing if key in loaded})
+        return found
+
+    def get(self, key, load):
+        """Value for key or None, with load(key) returning the value or None on a miss"""
+        def loader(keys):
+            value = load(keys[0])
+            return {} if value is None else {keys[0]: value}
+        return self.get_many([key], loader).get(key)
+
+    def invalidate(self, keys=None):
+        """Drop keys (or everything) from this container's cache"""
+        with self.lock:
+            if keys is None:
+                self.entries.clear()
+            else:
+                for key in keys:
+                    self.entries.pop(key, None)
+            self.counters['invalidations'] += 1
+
+    def stats(self):
+        lookups = self.counters['hits'] + self.counters['negative_hits'] + self.counters['misses']
+        hits = lookups - self.counters['misses']
+        return dict(self.counters, name=self.name, size=len(self.entries), hit_rate=hits / lookups if lookups else 0.0)
+
+    def _remember(self, values):
+        if self.max_entries <= 0:
+            return
+        now = time.monotonic()
+        with self.lock:
+            for key, value in values.items():
+                ttl = self.negative_ttl_seconds if value is ABSENT else self.ttl_seconds
+                self.entries[key] = (value, now + ttl)
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def _check_marker(self):
+        if not self.marker:
+            return
+        now = time.monotonic()
+        if self.marker_checked_at is not None and now - self.marker_checked_at < MARKER_CHECK_SECONDS:
+            return
+        self.marker_checked_at = now
+        try:
+            version = read_versions([self.marker])[self.marker]
+        except Exception as e:
+            # Keep serving; the TTL still bounds how stale an entry can get
+            logger.warning(f"Could not read change marker {self.marker}: {str(e)}")
+            return
+        if self.marker_version is not None and version != self.marker_version:
+            logger.info(f"{self.marker} moved from {self.marker_version} to {version}, dropping {self.name} cache")
+            self.invalidate()
+        self.marker_version = version
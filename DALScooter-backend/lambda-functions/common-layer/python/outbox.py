@@ -0,0 +1,176 @@
+"""
+Transactional outbox for SNS events.
+
+Request handlers do not publish to SNS themselves. They add event_put() to
+the DynamoDB transaction that writes the state the event describes, so the
+record and its event are stored together or not at all, and the request
+never waits on SNS.
+
+The outbox-relay Lambda consumes the DALScooterOutbox stream and publishes
+new events with SNS PublishBatch, up to 10 per call and topic, then marks
+them published by removing their `pending` attribute. Events whose stream
+delivery ran out of retries stay in the sparse PendingIndex, and the
+scheduled sweep() republishes them.
+
+Delivery is at least once. Every message carries its eventID as a message
+attribute, so consumers can drop redeliveries.
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+
+from dynamo_batch import chunks
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.client('dynamodb')
+sns = boto3.client('sns')
+deserializer = TypeDeserializer()
+
+OUTBOX_TABLE_NAME = os.environ.get('OUTBOX_TABLE', 'DALScooterOutbox')
+PENDING_INDEX = 'PendingIndex'
+# Published events are kept this long for inspection, then expire through TTL
+EVENT_RETENTION_SECONDS = 7 * 24 * 3600
+# The sweep leaves younger events to the stream relay
+SWEEP_AFTER_SECONDS = int(os.environ.get('OUTBOX_SWEEP_AFTER', '300'))
+# Entries per SNS PublishBatch call
+PUBLISH_BATCH_SIZE = 10
+
+def event_put(topic_arn, message, subject=None, message_type=None, attributes=None):
+    """
+    TransactWriteItems Put storing an event to publish to topic_arn; message is
+    a str or JSON-serializable, attributes are extra string message attributes
+    """
+    now = int(time.time())
+    item = {
+        'eventID': {'S': str(uuid.uuid4())},
+        'topicArn': {'S': topic_arn},
+        'message': {'S': message if isinstance(message, str) else json.dumps(message)},
+        'createdAt': {'N': str(now)},
+        'pending': {'S': '1'},
+        'expiresAt': {'N': str(now + EVENT_RETENTION_SECONDS)}
+    }
+    if subject:
+        item['subject'] = {'S': subject}
+    if message_type:
+        item['messageType'] = {'S': message_type}
+    if attributes:
+        item['attributes'] = {'M': {name: {'S': value} for name, value in attributes.items()}}
+    return {
+        'Put': {
+            'TableName': OUTBOX_TABLE_NAME,
+            'Item': item,
+            'ConditionExpression': 'attribute_not_exists(eventID)'
+        }
+    }
+
+def batch_entry(event):
+    """PublishBatch entry for one stored event (plain attribute values)"""
+    attributes = {'eventID': {'DataType': 'String', 'StringValue': event['eventID']}}
+    if event.get('messageType'):
+        attributes['MessageType'] = {'DataType': 'String', 'StringValue': event['messageType']}
+    for name, value in (event.get('attributes') or {}).items():
+        attributes[name] = {'DataType': 'String', 'StringValue': value}
+    entry = {
+        'Id': event['eventID'],
+        'Message': event['message'],
+        'MessageAttributes': attributes
+    }
+    if event.get('subject'):
+        entry['Subject'] = event['subject']
+    return entry
+
+def mark_published(event_id):
+    try:
+        dynamodb.update_item(
+            TableName=OUTBOX_TABLE_NAME,
+            Key={'eventID': {'S': event_id}},
+            UpdateExpression='SET publishedAt = :now REMOVE pending',
+            ConditionExpression='attribute_exists(pending)',
+            ExpressionAttributeValues={':now': {'N': str(int(time.time()))}}
+        )
+    except dynamodb.exceptions.ConditionalCheckFailedException:
+        # Published concurrently by the sweep or a retried batch
+        pass
+
+def publish(events):
+    """
+    Publish stored events, grouped by topic, PUBLISH_BATCH_SIZE per call, and
+    mark the published ones. Returns the set of eventIDs that failed.
+    """
+    by_topic = {}
+    for event in events:
+        by_topic.setdefault(event['topicArn'], []).append(event)
+    failed = set()
+    for topic_arn, topic_events in by_topic.items():
+        for chunk in chunks(topic_events, PUBLISH_BATCH_SIZE):
+            try:
+                response = sns.publish_batch(TopicArn=topic_arn, PublishBatchRequestEntries=[batch_entry(event) for event in chunk])
+            except Exception as e:
+                logger.error(f"Publishing {len(chunk)} outbox events to {topic_arn} failed: {str(e)}")
+                failed.update(event['eventID'] for event in chunk)
+                continue
+            for entry in response.get('Failed', []):
+                logger.error(f"Publishing outbox event {entry['Id']} failed: {entry.get('Code')} {entry.get('Message')}")
+                failed.add(entry['Id'])
+            for event in chunk:
+                if event['eventID'] in failed:
+                    continue
+                try:
+                    mark_published(event['eventID'])
+                except Exception as e:
+                    # Still pending, so the sweep publishes it again later
+                    logger.error(f"Marking outbox event {event['eventID']} published failed: {str(e)}")
+    return failed
+
+def relay_stream(records):
+    """
+    Publish the events inserted in a stream batch.
+
+    Returns batchItemFailures for a ReportBatchItemFailures mapping. Lambda
+    retries from the first failed record, so only that record's sequence
+    number is reported; events after it that were published are delivered
+    again on the retry (consumers drop them by eventID).
+    """
+    inserted = [
+        (record, {key: deserializer.deserialize(value) for key, value in record['dynamodb']['NewImage'].items()})
+        for record in records
+        if record.get('eventName') == 'INSERT'
+    ]
+    failed = publish([event for _, event in inserted]) if inserted else set()
+    logger.info(f"Published {len(inserted) - len(failed)} outbox events, {len(failed)} failed")
+    for record, event in inserted:
+        if event['eventID'] in failed:
+            return [{'itemIdentifier': record['dynamodb']['SequenceNumber']}]
+    return []
+
+def sweep(older_than=SWEEP_AFTER_SECONDS):
+    """Publish events still pending older_than seconds after they were written"""
+    request = {
+        'TableName': OUTBOX_TABLE_NAME,
+        'IndexName': PENDING_INDEX,
+        'KeyConditionExpression': 'pending = :pending AND createdAt < :cutoff',
+        'ExpressionAttributeValues': {
+            ':pending': {'S': '1'},
+            ':cutoff': {'N': str(int(time.time()) - older_than)}
+        }
+    }
+    published = failed = 0
+    while True:
+        response = dynamodb.query(**request)
+        events = [{key: deserializer.deserialize(value) for key, value in item.items()} for item in response.get('Items', [])]
+        if events:
+            page_failed = len(publish(events))
+            published += len(events) - page_failed
+            failed += page_failed
+        if 'LastEvaluatedKey' not in response:
+            break
+        request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    logger.info(f"Outbox sweep published {published} events, {failed} failed")
+    return {'published': published, 'failed': failed}
@@ -0,0 +1,95 @@
+"""
+DynamoDB pagination helpers.
+
+- pages() walks a query/scan lazily, one DynamoDB page at a time, so callers
+  never hold more than a page in memory and never hit the silent 1 MB
+  truncation of a single scan() call
+- fetch_page() collects up to `limit` items for an API response and returns
+  an opaque cursor to resume from
+- encode_cursor()/decode_cursor() turn a LastEvaluatedKey into a URL-safe
+  token; the token is bound to the query it came from, so it cannot be
+  replayed against a different filter
+"""
+import json
+import base64
+import hashlib
+from decimal import Decimal
+
+class InvalidCursor(ValueError):
+    pass
+
+def pages(operation, **kwargs):
+    """Yield the Items of each page returned by a paginated query/scan call"""
+    while True:
+        response = operation(**kwargs)
+        yield response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        kwargs['ExclusiveStartKey'] = last_key
+
+def items(operation, **kwargs):
+    """Yield items one by one across all pages"""
+    for page in pages(operation, **kwargs):
+        yield from page
+
+def _fingerprint(scope):
+    return hashlib.sha256(json.dumps(scope, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def _encode_value(value):
+    if isinstance(value, Decimal):
+        return {'N': str(value)}
+    return {'S': value}
+
+def _decode_value(value):
+    if 'N' in value:
+        return Decimal(value['N'])
+    return value['S']
+
+def encode_cursor(last_evaluated_key, scope=None):
+    """Opaque token for a LastEvaluatedKey; scope is any JSON value identifying the query"""
+    if not last_evaluated_key:
+        return None
+    payload = {
+        'k': {name: _encode_value(value) for name, value in last_evaluated_key.items()},
+        'q': _fingerprint(scope)
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, scope=None):
+    """Return the ExclusiveStartKey encoded in cursor, or None for an empty cursor"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        key = {name: _decode_value(value) for name, value in payload['k'].items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise InvalidCursor("Malformed cursor")
+    if payload.get('q') != _fingerprint(scope):
+        raise InvalidCursor("Cursor does not belong to this query")
+    return key
+
+def fetch_page(operation, limit, cursor=None, scope=None, **kwargs):
+    """
+    Collect up to `limit` items starting at cursor.
+
+    Each request asks DynamoDB for at most the number of items still missing,
+    so the returned cursor always points right after the last item returned
+    (a FilterExpression may make individual requests come back short).
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    start_key = decode_cursor(cursor, scope)
+    if start_key:
+        kwargs['ExclusiveStartKey'] = start_key
+
+    collected = []
+    last_key = None
+    while len(collected) < limit:
+        response = operation(Limit=limit - len(collected), **kwargs)
+        collected.extend(response.get('Items', []))
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+        kwargs['ExclusiveStartKey'] = last_key
+    return collected, encode_cursor(last_key, scope)
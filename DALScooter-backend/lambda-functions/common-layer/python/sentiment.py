@@ -0,0 +1,206 @@
+"""
+Sentiment scoring for vehicle feedback.
+
+Scoring goes through a pluggable backend selected with the SENTIMENT_BACKEND
+environment variable:
+
+- "google"  (default) Google Cloud Natural Language, one API call per message,
+            dispatched concurrently through a bounded thread pool
+- "lexicon" local lexicon scorer, batched, no network round trip
+
+Backends are created on first use and reused across warm invocations; the
+Google client library and the service account key are only loaded when the
+Google backend is actually needed, so cold starts that never score anything
+pay for neither.
+Results are cached by message hash (see sentiment_cache), so each unique
+message is scored at most once per backend version.
+
+Every backend returns (score, magnitude) pairs with the same contract as
+Google NL: score in [-1, 1], magnitude >= 0. sentiment_label maps a score to
+the label shown on the dashboard.
+"""
+import os
+import re
+import math
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from sentiment_lexicon import LEXICON, NEGATIONS, BOOSTERS
+from sentiment_cache import CachedSentimentBackend
+
+SENTIMENT_BACKEND = os.environ.get('SENTIMENT_BACKEND', 'google')
+SENTIMENT_MAX_WORKERS = int(os.environ.get('SENTIMENT_MAX_WORKERS', '8'))
+SENTIMENT_CALL_TIMEOUT = float(os.environ.get('SENTIMENT_CALL_TIMEOUT', '5'))
+SENTIMENT_CACHE_ENABLED = os.environ.get('SENTIMENT_CACHE_ENABLED', 'true').lower() == 'true'
+
+# Service account key for the Google backend
+bucket_name = 'dalscooter-vehicle-images-eab8dd1b0fadbd67'  # Replace with your bucket name
+object_key = 'service-account-key.json'      # Replace with your object key
+local_path = '/tmp/service-account-key.json'
+
+def service_account_key_path():
+    """
+    Return the local path of the Google service account key, downloading it
+    from S3 only if this container has not fetched it already (/tmp survives
+    across warm invocations).
+    """
+    if not os.path.exists(local_path):
+        import boto3
+        # Download to a temp name first so a failed transfer never leaves a partial key behind
+        boto3.client('s3').download_file(bucket_name, object_key, local_path + '.part')
+        os.replace(local_path + '.part', local_path)
+    return local_path
+
+def sentiment_label(score):
+    if score >= 0.6:
+        return "Excellent"
+    elif score >= 0.3:
+        return "Good"
+    elif score >= 0.0:
+        return "Moderate"
+    elif score >= -0.3:
+        return "Reasonable"
+    else:
+        return "Bad"
+
+class SentimentBackend:
+    """Base class for sentiment backends"""
+    name = None
+    version = None
+
+    def analyze_batch(self, texts):
+        """Return one (score, magnitude) tuple per text, in order"""
+        raise NotImplementedError
+
+    def analyze(self, text):
+        return self.analyze_batch([text])[0]
+
+class GoogleNLBackend(SentimentBackend):
+    """Google Cloud Natural Language, authenticated with the service account key stored in S3"""
+    name = 'google'
+    version = 'language_v1'
+
+    def __init__(self, max_workers=None, timeout=None):
+        # Heavy import deferred until the backend is first requested
+        from google.cloud import language_v1
+
+        self.language_v1 = language_v1
+        # gRPC clients are thread-safe, so one client serves every worker thread
+        self.client = language_v1.LanguageServiceClient.from_service_account_json(service_account_key_path())
+        self.timeout = timeout or SENTIMENT_CALL_TIMEOUT
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or SENTIMENT_MAX_WORKERS)
+
+    def analyze_one(self, text):
+        document = self.language_v1.Document(content=text, type_=self.language_v1.Document.Type.PLAIN_TEXT)
+        response = self.client.analyze_sentiment(request={"document": document}, timeout=self.timeout)
+        return response.document_sentiment.score, response.document_sentiment.magnitude
+
+    def analyze_batch(self, texts):
+        # Calls run concurrently, so a batch takes about as long as its slowest call
+        return list(self.executor.map(self.analyze_one, texts))
+
+class LexiconBackend(SentimentBackend):
+    """
+    Local lexicon scorer (VADER-style valences, negation and booster handling).
+
+    A batch is flattened into one array of token valences plus an offsets
+    array, so thousands of messages are scored in a single pass without any
+    network call.
+    """
+    name = 'lexicon'
+    version = 'lexicon-1'
+
+    TOKEN_PATTERN = re.compile(r"[a-z']+|!")
+    NEGATION_SCALAR = -0.74
+    NORMALIZATION_ALPHA = 25.0
+    EXCLAMATION_BOOST = 0.292
+    MAX_EXCLAMATIONS = 4
+    # Google NL magnitudes are roughly the sum of per-sentence strengths (each <= 1)
+    MAGNITUDE_SCALE = 4.0
+
+    def token_valences(self, text):
+        """Valence of each sentiment-bearing token, with negation/booster/'but' rules applied"""
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        words = [token for token in tokens if token != '!']
+        but_index = words.index('but') if 'but' in words else -1
+
+        valences = []
+        for index, word in enumerate(words):
+            valence = LEXICON.get(word)
+            if valence is None:
+                continue
+            for distance, previous in enumerate(reversed(words[max(0, index - 3):index])):
+                if previous in BOOSTERS:
+                    # Boosters further away have less effect
+                    boost = BOOSTERS[previous] * (1.0, 0.95, 0.9)[distance]
+                    valence += boost if valence > 0 else -boost
+                if previous in NEGATIONS:
+                    valence *= self.NEGATION_SCALAR
+                    break
+            if but_index != -1:
+                valence *= 1.5 if index > but_index else 0.5
+            valences.append(valence)
+
+        exclamations = min(tokens.count('!'), self.MAX_EXCLAMATIONS)
+        if exclamations and valences:
+            total = sum(valences)
+            valences.append(math.copysign(exclamations * self.EXCLAMATION_BOOST, total) if total else 0.0)
+        return valences
+
+    def analyze_batch(self, texts):
+        valences = array('d')
+        offsets = array('l', [0])
+        for text in texts:
+            valences.extend(self.token_valences(text or ''))
+            offsets.append(len(valences))
+
+        results = []
+        for start, end in zip(offsets, offsets[1:]):
+            document = valences[start:end]
+            total = sum(document)
+            score = total / math.sqrt(total * total + self.NORMALIZATION_ALPHA) if total else 0.0
+            magnitude = sum(map(abs, document)) / self.MAGNITUDE_SCALE
+            results.append((max(-1.0, min(1.0, score)), magnitude))
+        return results
+
+BACKENDS = {
+    GoogleNLBackend.name: GoogleNLBackend,
+    LexiconBackend.name: LexiconBackend,
+}
+
+# Backend instances reused across warm invocations, keyed by (name, cached)
+_backends = {}
+
+def get_backend(name=None, cached=None):
+    """Return the configured sentiment backend, creating it on first use"""
+    name = (name or SENTIMENT_BACKEND).lower()
+    cached = SENTIMENT_CACHE_ENABLED if cached is None else cached
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown sentiment backend: {name}")
+    if (name, cached) not in _backends:
+        backend = BACKENDS[name]()
+        _backends[(name, cached)] = CachedSentimentBackend(backend) if cached else backend
+    return _backends[(name, cached)]
+
+def cache_stats():
+    """Hit/miss counters of every cached backend used by this container"""
+    return {
+        backend.cache.namespace: backend.cache.stats()
+        for backend in _backends.values() if isinstance(backend, CachedSentimentBackend)
+    }
+
+def analyze_sentiment(text):
+    return get_backend().analyze(text)
+
+def analyze_sentiments(texts):
+    """
+    Score many messages in one backend batch.
+
+    Identical texts are scored once and the result is shared, so repeated
+    feedback ("Great ride!") costs a single call per request.
+    """
+    if not texts:
+        return []
+    unique_texts = list(dict.fromkeys(texts))
+    scores = dict(zip(unique_texts, get_backend().analyze_batch(unique_texts)))
+    return [scores[text] for text in texts]
@@ -0,0 +1,281 @@
+"""
+Per-vehicle sentiment read model.
+
+Each feedback item is scored exactly once, when it is written, and folded into
+a running aggregate (feedbackCount, scoreSum, magnitudeSum) keyed by
+vehicleID. get-vehicles reads the aggregates instead of re-scoring every
+message on every request; the average and label are derived from the sums
+with summarize() when read, so they are never stored and never stale.
+
+Every increment also bumps the aggregate's `version`, so a bulk rebuild can
+write its recomputed sums conditionally and detect increments that landed
+while it was scanning.
+
+Run `python sentiment_aggregates.py --rebuild` to recompute all aggregates
+from DALScooter-FeedbackTable in bulk (backfill).
+"""
+import os
+import argparse
+import logging
+from decimal import Decimal
+import boto3
+from botocore.exceptions import ClientError
+
+from sentiment import analyze_sentiment, analyze_sentiments, sentiment_label
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource('dynamodb')
+
+FEEDBACK_TABLE_NAME = os.environ.get('FEEDBACK_TABLE_NAME', 'DALScooter-FeedbackTable')
+BOOKING_TABLE_NAME = os.environ.get('BOOKING_TABLE_NAME', 'DALScooterBookings')
+AGGREGATE_TABLE_NAME = os.environ.get('SENTIMENT_AGGREGATE_TABLE', 'DALScooter-VehicleSentiment')
+# Passes over the vehicles whose aggregate moved during a rebuild
+MAX_REBUILD_ATTEMPTS = 3
+
+def to_decimal(value):
+    """DynamoDB rejects floats, so store scores as Decimals"""
+    return Decimal(str(round(float(value), 6)))
+
+def summarize(aggregate):
+    """Build the overall_sentiment block returned by get-vehicles from an aggregate item"""
+    count = int((aggregate or {}).get('feedbackCount', 0))
+    score_sum = float((aggregate or {}).get('scoreSum', 0))
+    magnitude_sum = float((aggregate or {}).get('magnitudeSum', 0))
+    average_score = score_sum / count if count else 0.0
+    return {
+        'average_score': average_score,
+        'total_magnitude': magnitude_sum if count else 0.0,
+        'label': sentiment_label(average_score)
+    }
+
+def resolve_vehicle_id(booking_reference):
+    """Map a feedback bookingReferenceCode to the booked vehicleID"""
+    booking_table = dynamodb.Table(BOOKING_TABLE_NAME)
+    booking = booking_table.get_item(Key={'bookingID': booking_reference}).get('Item')
+    if not booking:
+        return None
+    return booking.get('vehicleID')
+
+def record_feedback(feedback_id, booking_reference, message, sentiment=None):
+    """
+    Score a newly written feedback item and fold it into its vehicle's aggregate.
+
+    The score is stored on the feedback item and the aggregate counters are
+    incremented in the same transaction. The feedback update is conditional on
+    the item not being scored yet, so stream redeliveries never double count.
+    Pass a precomputed (score, magnitude) as sentiment when the caller has
+    already scored a batch. Returns True when the aggregate was updated.
+    """
+    vehicle_id = resolve_vehicle_id(booking_reference)
+    if not vehicle_id:
+        logger.warning(f"No vehicle found for booking {booking_reference}, skipping feedback {feedback_id}")
+        return False
+
+    score, magnitude = sentiment or analyze_sentiment(message)
+    score = to_decimal(score)
+    magnitude = to_decimal(magnitude)
+
+    try:
+        dynamodb.meta.client.transact_write_items(
+            TransactItems=[
+                {
+                    'Update': {
+                        'TableName': FEEDBACK_TABLE_NAME,
+                        'Key': {'feedbackId': feedback_id},
+                        'UpdateExpression': 'SET sentimentScore = :score, sentimentMagnitude = :magnitude, vehicleID = :vehicle_id',
+                        'ConditionExpression': 'attribute_exists(feedbackId) AND attribute_not_exists(sentimentScore)',
+                        'ExpressionAttributeValues': {
+                            ':score': score,
+                            ':magnitude': magnitude,
+                            ':vehicle_id': vehicle_id
+                        }
+                    }
+                },
+                {
+                    'Update': {
+                        'TableName': AGGREGATE_TABLE_NAME,
+                        'Key': {'vehicleID': vehicle_id},
+                        'UpdateExpression': 'ADD feedbackCount :one, scoreSum :score, magnitudeSum :magnitude, version :one',
+                        'ExpressionAttributeValues': {
+                            ':one': 1,
+                            ':score': score,
+                            ':magnitude': magnitude
+                        }
+                    }
+                }
+            ]
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'TransactionCanceledException':
+            raise
+        reasons = e.response.get('CancellationReasons', [])
+        if reasons and reasons[0].get('Code') == 'ConditionalCheckFailed':
+            logger.info(f"Feedback {feedback_id} already aggregated, skipping")
+            return False
+        raise
+
+    return True
+
+def scan_all(table, **kwargs):
+    """Every item of a strongly consistent table scan"""
+    kwargs['ConsistentRead'] = True
+    while True:
+        response = table.scan(**kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def aggregate_versions(aggregate_table, vehicle_ids=None):
+    """{vehicleID: version} of the stored aggregates (0 for items written before versioning)"""
+    if vehicle_ids is None:
+        items = scan_all(aggregate_table, ProjectionExpression='vehicleID, version')
+    else:
+        items = filter(None, (
+            aggregate_table.get_item(Key={'vehicleID': vehicle_id}, ConsistentRead=True).get('Item')
+            for vehicle_id in vehicle_ids
+        ))
+    return {item['vehicleID']: int(item.get('version', 0)) for item in items}
+
+def feedback_totals(feedback_table, booking_to_vehicle_map, vehicle_ids=None):
+    """
+    ({vehicleID: totals}, feedback items counted) over the feedback table,
+    restricted to vehicle_ids when given. Feedback items that were never
+    scored (written before the aggregator existed) are scored here and the
+    score is persisted on the item.
+    """
+    totals = {}
+    feedback_count = 0
+    page = []
+
+    def fold(page):
+        # Score everything on this page that was never scored, in one backend batch
+        unscored = [feedback for _, feedback in page if 'sentimentScore' not in feedback]
+        for feedback, (score, magnitude) in zip(unscored, analyze_sentiments([f['feedbackMessage'] for f in unscored])):
+            feedback['sentimentScore'] = to_decimal(score)
+            feedback['sentimentMagnitude'] = to_decimal(magnitude)
+            try:
+                feedback_table.update_item(
+                    Key={'feedbackId': feedback['feedbackId']},
+                    UpdateExpression='SET sentimentScore = :score, sentimentMagnitude = :magnitude, vehicleID = :vehicle_id',
+                    ConditionExpression='attribute_not_exists(sentimentScore)',
+                    ExpressionAttributeValues={
+                        ':score': feedback['sentimentScore'],
+                        ':magnitude': feedback['sentimentMagnitude'],
+                        ':vehicle_id': feedback['vehicleID']
+                    }
+                )
+            except ClientError as e:
+                # Scored by the aggregator meanwhile; its increment moves the
+                # aggregate version, so this vehicle is recomputed
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+
+        for vehicle_id, feedback in page:
+            total = totals.setdefault(vehicle_id, {'feedbackCount': 0, 'scoreSum': Decimal(0), 'magnitudeSum': Decimal(0)})
+            total['feedbackCount'] += 1
+            total['scoreSum'] += feedback['sentimentScore']
+            total['magnitudeSum'] += feedback['sentimentMagnitude']
+        return len(page)
+
+    for feedback in scan_all(feedback_table):
+        vehicle_id = feedback.get('vehicleID') or booking_to_vehicle_map.get(feedback.get('bookingReferenceCode'))
+        if not vehicle_id or (vehicle_ids is not None and vehicle_id not in vehicle_ids):
+            continue
+        feedback['vehicleID'] = vehicle_id
+        page.append((vehicle_id, feedback))
+        if len(page) >= 100:
+            feedback_count += fold(page)
+            page = []
+    feedback_count += fold(page)
+    return totals, feedback_count
+
+def write_aggregate(aggregate_table, vehicle_id, total, seen_version):
+    """
+    Replace (or with total None, delete) the aggregate of vehicle_id unless it
+    moved since seen_version was read (None: there was no item). Returns
+    False when it moved.
+    """
+    if seen_version is None:
+        condition = {'ConditionExpression': 'attribute_not_exists(vehicleID)'}
+    elif seen_version == 0:
+        condition = {'ConditionExpression': 'attribute_exists(vehicleID) AND attribute_not_exists(version)'}
+    else:
+        condition = {'ConditionExpression': 'version = :version', 'ExpressionAttributeValues': {':version': seen_version}}
+    try:
+        if total is None:
+            aggregate_table.delete_item(Key={'vehicleID': vehicle_id}, **condition)
+        else:
+            aggregate_table.put_item(Item={
+                'vehicleID': vehicle_id,
+                'feedbackCount': total['feedbackCount'],
+                'scoreSum': total['scoreSum'],
+                'magnitudeSum': total['magnitudeSum'],
+                'version': (seen_version or 0) + 1
+            }, **condition)
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+    return True
+
+def rebuild():
+    """
+    Recompute every vehicle aggregate from the feedback table.
+
+    Aggregate versions are read before the feedback is scanned and every
+    rebuilt aggregate is written conditionally on its version, so an increment
+    that lands during the rebuild is never overwritten: the vehicles it
+    touched are recomputed in another pass. Aggregates of vehicles without
+    any feedback left are deleted. Returns the number of feedback items and
+    vehicles processed, of aggregates deleted, and of vehicles still moving
+    after MAX_REBUILD_ATTEMPTS passes (left as the aggregator wrote them).
+    """
+    feedback_table = dynamodb.Table(FEEDBACK_TABLE_NAME)
+    booking_table = dynamodb.Table(BOOKING_TABLE_NAME)
+    aggregate_table = dynamodb.Table(AGGREGATE_TABLE_NAME)
+
+    booking_to_vehicle_map = {
+        booking.get('bookingID'): booking.get('vehicleID')
+        for booking in scan_all(booking_table, ProjectionExpression='bookingID, vehicleID')
+    }
+
+    vehicle_ids = None
+    rebuilt, deleted, feedback_count = set(), set(), 0
+    for _ in range(MAX_REBUILD_ATTEMPTS):
+        versions = aggregate_versions(aggregate_table, vehicle_ids)
+        totals, counted = feedback_totals(feedback_table, booking_to_vehicle_map, vehicle_ids)
+        if vehicle_ids is None:
+            feedback_count = counted
+        moved = set()
+        for vehicle_id in set(totals) | set(versions):
+            total = totals.get(vehicle_id)
+            if total is None and vehicle_id not in versions:
+                continue
+            if not write_aggregate(aggregate_table, vehicle_id, total, versions.get(vehicle_id)):
+                moved.add(vehicle_id)
+            elif total is None:
+                deleted.add(vehicle_id)
+            else:
+                rebuilt.add(vehicle_id)
+        if not moved:
+            break
+        logger.info(f"{len(moved)} aggregates moved during the rebuild, recomputing them")
+        vehicle_ids = moved
+    else:
+        logger.warning(f"Aggregates of {len(moved)} vehicles kept moving, left as aggregated: {sorted(moved)}")
+
+    logger.info(f"Rebuilt sentiment aggregates for {len(rebuilt)} vehicles from {feedback_count} feedback items, deleted {len(deleted)}")
+    return {'feedbackItems': feedback_count, 'vehicles': len(rebuilt), 'deleted': len(deleted), 'conflicts': len(moved)}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintain the per-vehicle sentiment read model')
+    parser.add_argument('--rebuild', action='store_true', help='Recompute all aggregates from the feedback table')
+    args = parser.parse_args()
+    if args.rebuild:
+        logging.basicConfig(level=logging.INFO)
+        print(rebuild())
+    else:
+        parser.print_help()
@@ -0,0 +1,142 @@
+"""
+Content-addressed cache for sentiment results.
+
+Feedback messages never change once written, so a (backend, version, text)
+triple always scores the same. Results are cached under a SHA-256 of that
+triple in two tiers:
+
+- an in-process LRU (bounded by SENTIMENT_CACHE_SIZE entries) that lives as
+  long as the warm container
+- an optional DynamoDB table (SENTIMENT_CACHE_TABLE) with a TTL attribute, so
+  each unique message is scored at most once per model version across
+  containers
+
+Hit/miss counters are kept per tier and exposed through stats().
+"""
+import os
+import time
+import hashlib
+import threading
+from decimal import Decimal
+from collections import OrderedDict
+
+SENTIMENT_CACHE_SIZE = int(os.environ.get('SENTIMENT_CACHE_SIZE', '10000'))
+SENTIMENT_CACHE_TABLE = os.environ.get('SENTIMENT_CACHE_TABLE')
+SENTIMENT_CACHE_TTL_DAYS = int(os.environ.get('SENTIMENT_CACHE_TTL_DAYS', '90'))
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_LIMIT = 100
+
+class SentimentCache:
+    def __init__(self, namespace, max_entries=None, table_name=None, ttl_seconds=None):
+        self.namespace = namespace
+        self.max_entries = SENTIMENT_CACHE_SIZE if max_entries is None else max_entries
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds or SENTIMENT_CACHE_TTL_DAYS * 24 * 3600
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'table_hits': 0, 'misses': 0, 'evictions': 0}
+        self.dynamodb = None
+        if table_name:
+            import boto3
+            self.dynamodb = boto3.resource('dynamodb')
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.namespace}\x00{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, texts):
+        """Return {text: (score, magnitude)} for every text found in either tier"""
+        found = {}
+        missing = {}
+        with self.lock:
+            for text in texts:
+                key = self.key(text)
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    found[text] = self.entries[key]
+                    self.counters['memory_hits'] += 1
+                else:
+                    missing[key] = text
+
+        table_hits = 0
+        if missing and self.dynamodb:
+            for key, value in self._table_get(list(missing)).items():
+                found[missing.pop(key)] = value
+                table_hits += 1
+            # Promote persistent hits into the in-process tier
+            self._remember({self.key(text): found[text] for text in texts if text in found})
+
+        with self.lock:
+            self.counters['table_hits'] += table_hits
+            self.counters['misses'] += len(missing)
+        return found
+
+    def put_many(self, results):
+        """Store {text: (score, magnitude)} in both tiers"""
+        keyed = {self.key(text): (float(score), float(magnitude)) for text, (score, magnitude) in results.items()}
+        self._remember(keyed)
+        if self.dynamodb and keyed:
+            expires_at = int(time.time()) + self.ttl_seconds
+            with self.dynamodb.Table(self.table_name).batch_writer(overwrite_by_pkeys=['cacheKey']) as batch:
+                for key, (score, magnitude) in keyed.items():
+                    batch.put_item(Item={
+                        'cacheKey': key,
+                        'namespace': self.namespace,
+                        'score': Decimal(str(score)),
+                        'magnitude': Decimal(str(magnitude)),
+                        'expiresAt': expires_at
+                    })
+
+    def stats(self):
+        lookups = self.counters['memory_hits'] + self.counters['table_hits'] + self.counters['misses']
+        hits = lookups - self.counters['misses']
+        return dict(self.counters, size=len(self.entries), hit_rate=hits / lookups if lookups else 0.0)
+
+    def _remember(self, keyed):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            for key, value in keyed.items():
+                self.entries[key] = value
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def _table_get(self, keys):
+        found = {}
+        now = int(time.time())
+        for start in range(0, len(keys), BATCH_GET_LIMIT):
+            request = {self.table_name: {'Keys': [{'cacheKey': key} for key in keys[start:start + BATCH_GET_LIMIT]]}}
+            while request:
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(self.table_name, []):
+                    # TTL deletion is lazy, so skip entries that already expired
+                    if int(item.get('expiresAt', now)) >= now:
+                        found[item['cacheKey']] = (float(item['score']), float(item['magnitude']))
+                request = response.get('UnprocessedKeys')
+        return found
+
+class CachedSentimentBackend:
+    """Wraps a sentiment backend so each unique message is scored at most once per backend version"""
+
+    def __init__(self, backend, cache=None):
+        self.backend = backend
+        self.name = backend.name
+        self.version = backend.version
+        self.cache = cache or SentimentCache(
+            f"{backend.name}:{backend.version}",
+            table_name=SENTIMENT_CACHE_TABLE
+        )
+
+    def analyze_batch(self, texts):
+        found = self.cache.get_many(texts)
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        if missing:
+            scored = dict(zip(missing, self.backend.analyze_batch(missing)))
+            self.cache.put_many(scored)
+            found.update(scored)
+        return [found[text] for text in texts]
+
+    def analyze(self, text):
+        return self.analyze_batch([text])[0]
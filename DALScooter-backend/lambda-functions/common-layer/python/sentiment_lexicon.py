@@ -0,0 +1,52 @@
+"""
+Word valences for the local lexicon sentiment backend.
+
+Valences range from -4 (very negative) to +4 (very positive) and follow the
+VADER conventions. The list is biased towards vocabulary that shows up in
+rental feedback (battery, brakes, pickup, support, ...).
+"""
+
+LEXICON = {
+    # Positive
+    'amazing': 3.1, 'awesome': 3.1, 'excellent': 3.2, 'fantastic': 3.3, 'outstanding': 3.2,
+    'perfect': 3.0, 'superb': 3.1, 'wonderful': 3.1, 'brilliant': 2.9, 'best': 3.2,
+    'love': 3.2, 'loved': 2.9, 'loves': 2.7, 'great': 3.1, 'good': 1.9, 'nice': 1.8,
+    'fine': 0.8, 'okay': 0.9, 'ok': 0.9, 'decent': 1.2, 'fun': 2.3, 'enjoyed': 2.3,
+    'enjoy': 2.2, 'happy': 2.7, 'pleased': 2.1, 'satisfied': 1.8, 'glad': 2.0,
+    'recommend': 1.7, 'recommended': 1.6, 'smooth': 1.6, 'clean': 1.7, 'comfortable': 1.6,
+    'easy': 1.9, 'convenient': 1.7, 'quick': 1.0, 'fast': 1.3, 'friendly': 2.2,
+    'helpful': 1.8, 'reliable': 1.9, 'affordable': 1.3, 'cheap': 0.6, 'powerful': 1.7,
+    'quiet': 0.8, 'safe': 1.9, 'responsive': 1.4, 'fresh': 1.3, 'thanks': 1.9,
+    'thank': 1.5, 'worth': 0.9, 'impressed': 2.4, 'flawless': 2.8, 'seamless': 2.1,
+    'efficient': 1.8, 'professional': 1.6, 'beautiful': 2.9, 'cool': 1.3, 'like': 1.3,
+    'liked': 1.6, 'well': 1.1, 'works': 0.8, 'working': 0.6, 'charged': 0.6,
+    # Negative
+    'terrible': -3.3, 'horrible': -3.3, 'awful': -3.1, 'worst': -3.1, 'hate': -3.0,
+    'hated': -3.0, 'bad': -2.5, 'poor': -2.1, 'disappointing': -2.2, 'disappointed': -2.1,
+    'broken': -2.1, 'broke': -1.8, 'dirty': -1.9, 'slow': -1.2, 'late': -1.1,
+    'dead': -2.0, 'died': -2.3, 'drained': -1.6, 'unsafe': -2.4, 'dangerous': -2.5,
+    'rude': -2.0, 'unhelpful': -1.9, 'useless': -2.4, 'expensive': -1.2, 'overpriced': -1.8,
+    'problem': -1.7, 'problems': -1.7, 'issue': -1.2, 'issues': -1.3, 'fault': -1.6,
+    'faulty': -2.0, 'failed': -2.3, 'fail': -2.3, 'fails': -2.2, 'error': -1.6,
+    'stuck': -1.6, 'uncomfortable': -1.6, 'wobbly': -1.3, 'noisy': -1.2, 'loud': -0.6,
+    'annoying': -1.9, 'frustrating': -2.1, 'frustrated': -2.0, 'confusing': -1.3,
+    'difficult': -1.5, 'hard': -0.4, 'worse': -2.1, 'unreliable': -2.0, 'scratched': -1.0,
+    'damaged': -1.9, 'flat': -0.9, 'squeaky': -1.0, 'shaky': -1.3, 'angry': -2.3,
+    'refund': -0.8, 'complaint': -1.5, 'waste': -1.8, 'sucks': -1.5, 'mediocre': -0.3,
+    'unacceptable': -2.6, 'nightmare': -2.9, 'avoid': -1.4, 'crash': -2.1,
+    'crashed': -2.3, 'hurt': -2.4, 'injured': -2.6, 'missing': -1.2, 'wrong': -2.1,
+}
+
+NEGATIONS = {
+    'not', 'no', 'never', 'none', 'nobody', 'nothing', 'neither', 'nor', 'without',
+    "isn't", "wasn't", "aren't", "weren't", "don't", "doesn't", "didn't", "can't",
+    "couldn't", "won't", "wouldn't", "shouldn't", 'cannot', 'isnt', 'wasnt', 'dont',
+    'doesnt', 'didnt', 'cant', 'couldnt', 'wont', 'wouldnt',
+}
+
+BOOSTERS = {
+    'very': 0.293, 'really': 0.293, 'extremely': 0.293, 'super': 0.293, 'so': 0.293,
+    'incredibly': 0.293, 'absolutely': 0.293, 'totally': 0.293, 'completely': 0.293,
+    'highly': 0.293, 'quite': 0.1, 'barely': -0.293, 'slightly': -0.293,
+    'somewhat': -0.293, 'kinda': -0.293, 'little': -0.293,
+}
@@ -0,0 +1,145 @@
+"""
+Per-user notifications over one shared SNS topic.
+
+Users used to get a topic each (DALScooter-Notifications-<email>), which runs
+into the SNS topic quota and forces every notifier to read the user's
+topicArn first. Instead, every user's email subscription sits on
+USER_NOTIFICATIONS_TOPIC_ARN with a filter policy on the userID message
+attribute. Notifiers publish with the recipient's userID and need no lookup;
+SNS delivers each message only to that user's subscription.
+
+Run `python user_notifications.py --migrate` once to subscribe existing
+users to the shared topic. Each user has to confirm the new subscription
+from their inbox. Then `--delete-topics` removes the old per-user topics of
+the users who confirmed; run it again later for the rest.
+
+Until then, a user whose item still has a topicArn is notified on that
+topic instead, so nobody misses messages while their shared subscription
+is unconfirmed (or not created yet). `--delete-topics` removes the topicArn
+before deleting the topic, which moves the user to the shared topic only
+once SNS reports the subscription confirmed. Set
+USER_NOTIFICATIONS_LEGACY_TOPICS=off once no user has a topicArn left, to
+skip the per-message lookup.
+"""
+import os
+import json
+import argparse
+import logging
+import boto3
+
+from outbox import event_put
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+sns = boto3.client('sns')
+dynamodb = boto3.resource('dynamodb')
+
+USER_NOTIFICATIONS_TOPIC_ARN = os.environ.get('USER_NOTIFICATIONS_TOPIC_ARN')
+USER_TABLE_NAME = os.environ.get('DYNAMODB_TABLE', 'DALScooterUsers')
+# 'on' while per-user topics remain: users that still have a topicArn are
+# notified there rather than on the shared topic
+LEGACY_TOPICS = os.environ.get('USER_NOTIFICATIONS_LEGACY_TOPICS', 'on') != 'off'
+
+def filter_policy(user_id):
+    return json.dumps({'userID': [user_id]})
+
+def message_attributes(user_id):
+    return {'userID': {'DataType': 'String', 'StringValue': user_id}}
+
+def subscribe(user_id, email=None):
+    """Subscribe email (the userID by default) to the messages addressed to user_id; returns the subscription ARN"""
+    response = sns.subscribe(
+        TopicArn=USER_NOTIFICATIONS_TOPIC_ARN,
+        Protocol='email',
+        Endpoint=email or user_id,
+        Attributes={'FilterPolicy': filter_policy(user_id)},
+        ReturnSubscriptionArn=True
+    )
+    return response['SubscriptionArn']
+
+def legacy_topic(user_id):
+    """The per-user topic user_id is still notified on, or None once migrated"""
+    if not LEGACY_TOPICS:
+        return None
+    response = dynamodb.Table(USER_TABLE_NAME).get_item(Key={'userID': user_id}, ProjectionExpression='topicArn')
+    return response.get('Item', {}).get('topicArn')
+
+def topic_for(user_id):
+    return legacy_topic(user_id) or USER_NOTIFICATIONS_TOPIC_ARN
+
+def publish(user_id, message, subject=None):
+    """Send message to user_id right away"""
+    request = {
+        'TopicArn': topic_for(user_id),
+        'Message': message,
+        'MessageAttributes': message_attributes(user_id)
+    }
+    if subject:
+        request['Subject'] = subject
+    return sns.publish(**request)
+
+def notification_put(user_id, message, subject=None):
+    """Outbox Put sending message to user_id once the surrounding transaction commits"""
+    return event_put(topic_for(user_id), message, subject=subject, attributes={'userID': user_id})
+
+def migrate(table_name=USER_TABLE_NAME, delete_topics=False):
+    """
+    Subscribe users that still have a per-user topic to the shared topic.
+
+    With delete_topics, each user whose shared subscription is confirmed has
+    the topicArn removed from their item, which moves their notifications to
+    the shared topic, and then their old topic deleted. Users still pending
+    keep getting notifications on their old topic.
+    """
+    from pagination import items
+
+    table = dynamodb.Table(table_name)
+    subscribed = deleted = pending = 0
+    for user in items(
+        table.scan,
+        FilterExpression='attribute_exists(topicArn)',
+        ProjectionExpression='userID, topicArn, notificationSubscriptionArn'
+    ):
+        subscription_arn = user.get('notificationSubscriptionArn')
+        if not subscription_arn:
+            subscription_arn = subscribe(user['userID'])
+            table.update_item(
+                Key={'userID': user['userID']},
+                UpdateExpression='SET notificationSubscriptionArn = :arn',
+                ExpressionAttributeValues={':arn': subscription_arn}
+            )
+            subscribed += 1
+
+        if not delete_topics:
+            continue
+        attributes = sns.get_subscription_attributes(SubscriptionArn=subscription_arn)['Attributes']
+        if attributes.get('PendingConfirmation') != 'false':
+            pending += 1
+            continue
+        # Notifiers stop using the topic before it goes away
+        table.update_item(
+            Key={'userID': user['userID']},
+            UpdateExpression='REMOVE topicArn'
+        )
+        sns.delete_topic(TopicArn=user['topicArn'])
+        deleted += 1
+
+    logger.info(f"Subscribed {subscribed} users, deleted {deleted} per-user topics, {pending} subscriptions awaiting confirmation")
+    return {'subscribed': subscribed, 'deleted': deleted, 'pending': pending}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Shared user notification topic')
+    parser.add_argument('--migrate', action='store_true', help='Subscribe users with a per-user topic to the shared topic')
+    parser.add_argument('--delete-topics', action='store_true', help='Also delete per-user topics of users who confirmed')
+    parser.add_argument('--table', default=USER_TABLE_NAME)
+    parser.add_argument('--topic-arn', default=USER_NOTIFICATIONS_TOPIC_ARN)
+    args = parser.parse_args()
+    if args.migrate:
+        if not args.topic_arn:
+            parser.error('--topic-arn or USER_NOTIFICATIONS_TOPIC_ARN is required')
+        USER_NOTIFICATIONS_TOPIC_ARN = args.topic_arn
+        logging.basicConfig(level=logging.INFO)
+        print(migrate(args.table, args.delete_topics))
+    else:
+        parser.print_help()
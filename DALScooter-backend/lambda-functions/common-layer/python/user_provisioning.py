@@ -0,0 +1,68 @@
+"""
+Asynchronous user provisioning.
+
+Signup only waits on Cognito and one DynamoDB transaction, which stores the
+user item (provisioningStatus 'pending') together with a provisioning job in
+the outbox. The outbox relay publishes the job to DALScooterUserProvisioning,
+whose queue feeds the user-provisioning worker. The worker subscribes the
+user's email to the shared notification topic and records the outcome on
+the user item. The Cognito post-confirmation trigger queues a job for users
+that signed up any other way.
+
+provisioningStatus on the user item tracks the job:
+
+- pending:     written at signup, the job has not run yet
+- provisioned: subscribed; notificationSubscriptionArn is set
+- retrying:    the last attempt failed (provisioningError), SQS redelivers
+- failed:      MAX_PROVISIONING_ATTEMPTS deliveries failed, the job is in the DLQ
+
+Nothing here talks to AWS directly, the worker passes its table and
+subscribe function in.
+"""
+import os
+import time
+
+PENDING = 'pending'
+PROVISIONED = 'provisioned'
+RETRYING = 'retrying'
+FAILED = 'failed'
+
+# maxReceiveCount of the provisioning queue
+MAX_PROVISIONING_ATTEMPTS = int(os.environ.get('MAX_PROVISIONING_ATTEMPTS', '5'))
+
+def provisioning_job(user_id, email=None):
+    """Message describing the provisioning of user_id"""
+    return {'userID': user_id, 'email': email or user_id}
+
+def provision(table, subscribe, job, attempt=1):
+    """
+    Provision one user: subscribe(userID, email) and record the outcome on the
+    user item in table (a DynamoDB Table resource). Failures are recorded
+    and re-raised so that the queue redelivers the job. Subscribing is
+    idempotent, so redeliveries are harmless.
+    """
+    try:
+        subscription_arn = subscribe(job['userID'], job.get('email'))
+    except Exception as e:
+        table.update_item(
+            Key={'userID': job['userID']},
+            UpdateExpression='SET provisioningStatus = :status, provisioningError = :error, provisioningAttempts = :attempt',
+            ExpressionAttributeValues={
+                ':status': FAILED if attempt >= MAX_PROVISIONING_ATTEMPTS else RETRYING,
+                ':error': str(e),
+                ':attempt': attempt
+            }
+        )
+        raise
+
+    table.update_item(
+        Key={'userID': job['userID']},
+        UpdateExpression='SET provisioningStatus = :status, notificationSubscriptionArn = :arn, provisionedAt = :now, provisioningAttempts = :attempt REMOVE provisioningError',
+        ExpressionAttributeValues={
+            ':status': PROVISIONED,
+            ':arn': subscription_arn,
+            ':now': int(time.time()),
+            ':attempt': attempt
+        }
+    )
+    return subscription_arn
@@ -0,0 +1,52 @@
+import json
+import logging
+from boto3.dynamodb.types import TypeDeserializer
+
+from sentiment import analyze_sentiments, cache_stats
+from sentiment_aggregates import record_feedback, rebuild
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+deserializer = TypeDeserializer()
+
+def lambda_handler(event, context):
+    """
+    Lambda function consuming the feedback table stream and keeping the
+    per-vehicle sentiment aggregates up to date.
+
+    Invoke with {"action": "rebuild"} to recompute all aggregates in bulk.
+    """
+    if event.get('action') == 'rebuild':
+        result = rebuild()
+        return {
+            'statusCode': 200,
+            'body': json.dumps(result)
+        }
+
+    feedbacks = []
+    for record in event.get('Records', []):
+        # Feedback items are immutable; MODIFY events come from the aggregator itself
+        if record.get('eventName') != 'INSERT':
+            continue
+
+        image = record['dynamodb']['NewImage']
+        feedbacks.append({key: deserializer.deserialize(value) for key, value in image.items()})
+
+    # Score the whole stream batch in one backend call
+    sentiments = analyze_sentiments([feedback.get('feedbackMessage', '') for feedback in feedbacks])
+    logger.info(f"Sentiment cache stats: {cache_stats()}")
+
+    processed = 0
+    for feedback, sentiment in zip(feedbacks, sentiments):
+        logger.info(f"Aggregating feedback {feedback.get('feedbackId')}")
+
+        # Let errors propagate so the stream retries the batch
+        if record_feedback(feedback['feedbackId'], feedback.get('bookingReferenceCode'), feedback.get('feedbackMessage', ''), sentiment):
+            processed += 1
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({'message': f'Aggregated {processed} feedback items'})
+    }
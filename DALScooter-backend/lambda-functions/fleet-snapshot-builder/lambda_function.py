@@ -0,0 +1,34 @@
+import json
+import logging
+
+from fleet_snapshot import refresh_snapshot, SOURCE_TABLES
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+def lambda_handler(event, context):
+    """
+    Lambda function regenerating the fleet snapshot in S3.
+
+    Triggered by the change-marker table stream; the batching window on the
+    mapping coalesces bursts of writes into one rebuild. Batches that only
+    moved other markers (lookup cache invalidations) are skipped. Invoke with
+    {"action": "rebuild"} to force a full rebuild.
+    """
+    force = event.get('action') == 'rebuild'
+    if 'Records' in event:
+        markers = {record['dynamodb']['Keys']['tableName']['S'] for record in event['Records']}
+        if not markers & set(SOURCE_TABLES):
+            logger.info(f"Skipping snapshot refresh, no source table changed: {sorted(markers)}")
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'mode': 'skipped'})
+            }
+    result = refresh_snapshot(force=force)
+    logger.info(f"Snapshot refresh: {json.dumps(result)}")
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps(result)
+    }
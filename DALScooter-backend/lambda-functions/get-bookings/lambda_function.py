@@ -0,0 +1,109 @@
+import json
+import boto3
+import os
+from decimal import Decimal
+from boto3.dynamodb.conditions import Key, Attr
+
+from pagination import items, fetch_page, InvalidCursor
+
+dynamodb = boto3.resource('dynamodb')
+bookings_table = dynamodb.Table(os.environ['TABLE_NAME'])
+
+EMAIL_CREATED_AT_INDEX = 'EmailCreatedAtIndex'
+DEFAULT_LIMIT = int(os.environ.get('DEFAULT_PAGE_SIZE', '20'))
+MAX_LIMIT = int(os.environ.get('MAX_PAGE_SIZE', '100'))
+STATUSES = ('pending', 'confirmed', 'denied')
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'GET,OPTIONS'
+}
+
+# Helper function to convert Decimal to float/int for JSON serialization
+def decimal_to_json_serializable(obj):
+    if isinstance(obj, Decimal):
+        if obj % 1 == 0:
+            return int(obj)
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+def history_query(email, status):
+    """Newest-first query of one customer's bookings, optionally of one status"""
+    query = {
+        'IndexName': EMAIL_CREATED_AT_INDEX,
+        'KeyConditionExpression': Key('email').eq(email),
+        'ScanIndexForward': False
+    }
+    if status:
+        query['FilterExpression'] = Attr('status').eq(status)
+    return query
+
+def handler(event, context):
+    """
+    Booking history of one customer, newest first.
+
+    ?email=...&status=pending|confirmed|denied. Without limit/cursor the whole
+    history is returned as a list; with ?limit=N (and the returned cursor)
+    the response is {"items": [...], "nextCursor": ...}.
+    """
+    try:
+        params = event.get('queryStringParameters') or {}
+        email = params.get('email')
+        status = params.get('status')
+        if not email:
+            return {
+                'statusCode': 400,
+                'headers': CORS_HEADERS,
+                'body': json.dumps({'error': 'Email parameter is required'})
+            }
+        if status and status not in STATUSES:
+            return {
+                'statusCode': 400,
+                'headers': CORS_HEADERS,
+                'body': json.dumps({'error': f"status must be one of {', '.join(STATUSES)}"})
+            }
+
+        query = history_query(email, status)
+
+        if 'limit' not in params and 'cursor' not in params:
+            bookings = list(items(bookings_table.query, **query))
+            return {
+                'statusCode': 200,
+                'headers': CORS_HEADERS,
+                'body': json.dumps(bookings, default=decimal_to_json_serializable)
+            }
+
+        try:
+            limit = int(params.get('limit') or DEFAULT_LIMIT)
+        except ValueError:
+            limit = 0
+        if limit < 1 or limit > MAX_LIMIT:
+            return {
+                'statusCode': 400,
+                'headers': CORS_HEADERS,
+                'body': json.dumps({'error': f"limit must be between 1 and {MAX_LIMIT}"})
+            }
+
+        bookings, next_cursor = fetch_page(
+            bookings_table.query, limit, params.get('cursor'),
+            scope={'email': email, 'status': status},
+            **query
+        )
+        return {
+            'statusCode': 200,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'items': bookings, 'nextCursor': next_cursor}, default=decimal_to_json_serializable)
+        }
+    except InvalidCursor as e:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': str(e)})
+        }
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': str(e)})
+        }
@@ -1,69 +1,88 @@
 import json
 import boto3
 import os
+from decimal import Decimal
+
+from pagination import items, fetch_page, InvalidCursor
+from booking_operators import operator_status_query
 
 dynamodb = boto3.resource('dynamodb')
 bookings_table = dynamodb.Table(os.environ['TABLE_NAME'])
-vehicles_table = dynamodb.Table(os.environ['VEHICLES_TABLE_NAME'])
+
+# A page is one query against OperatorStatusIndex
+MAX_LIMIT = int(os.environ.get('MAX_PAGE_SIZE', '100'))
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'GET,OPTIONS'
+}
+
+# Helper function to convert Decimal to float/int for JSON serialization
+def decimal_to_json_serializable(obj):
+    if isinstance(obj, Decimal):
+        if obj % 1 == 0:
+            return int(obj)
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
 
 def handler(event, context):
+    """
+    Pending booking requests for the vehicles of one operator.
+
+    Without limit/cursor the response is the full list, as before. With
+    ?limit=N (and the returned cursor) it is {"items": [...], "nextCursor": ...}.
+    """
     try:
-        email = event['queryStringParameters'].get('email')
+        params = event.get('queryStringParameters') or {}
+        email = params.get('email')
         if not email:
             return {
                 'statusCode': 400,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'GET,OPTIONS'
-                },
+                'headers': CORS_HEADERS,
                 'body': json.dumps({'error': 'Email parameter is required'})
             }
 
-        # Fetch vehicles managed by the operator
-        vehicles_response = vehicles_table.scan(
-            FilterExpression='operatorID = :email',
-            ExpressionAttributeValues={':email': email}
-        )
-        print("vehicles response:",vehicles_response)
-        operator_vehicle_ids = [item['vehicleID'] for item in vehicles_response.get('Items', [])]
+        query = operator_status_query(email, 'pending')
 
-        if not operator_vehicle_ids:
+        if 'limit' not in params and 'cursor' not in params:
+            pending_bookings = list(items(bookings_table.query, **query))
             return {
                 'statusCode': 200,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'GET,OPTIONS'
-                },
-                'body': json.dumps([])
+                'headers': CORS_HEADERS,
+                'body': json.dumps(pending_bookings, default=decimal_to_json_serializable)
             }
 
-        # Fetch pending bookings for those vehicles
-        bookings_response = bookings_table.scan(
-            FilterExpression='vehicleID IN ({}) AND #status = :status'.format(', '.join(':' + str(i) for i in range(len(operator_vehicle_ids)))),
-            ExpressionAttributeNames={'#status': 'status'},
-            ExpressionAttributeValues={':status': 'pending', **{f':{i}': vid for i, vid in enumerate(operator_vehicle_ids)}}
-        )
-        print("bookings response:", bookings_response)
-        pending_bookings = bookings_response.get('Items', [])
+        try:
+            limit = int(params.get('limit') or MAX_LIMIT)
+        except ValueError:
+            limit = 0
+        if limit < 1 or limit > MAX_LIMIT:
+            return {
+                'statusCode': 400,
+                'headers': CORS_HEADERS,
+                'body': json.dumps({'error': f"limit must be between 1 and {MAX_LIMIT}"})
+            }
 
+        pending_bookings, next_cursor = fetch_page(
+            bookings_table.query, limit, params.get('cursor'),
+            scope={'operatorID': email, 'status': 'pending'},
+            **query
+        )
         return {
             'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'GET,OPTIONS'
-            },
-            'body': json.dumps(pending_bookings)
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'items': pending_bookings, 'nextCursor': next_cursor}, default=decimal_to_json_serializable)
+        }
+    except InvalidCursor as e:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': str(e)})
         }
     except Exception as e:
         return {
             'statusCode': 500,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'GET,OPTIONS'
-            },
+            'headers': CORS_HEADERS,
             'body': json.dumps({'error': str(e)})
-        }
\ No newline at end of file
+        }
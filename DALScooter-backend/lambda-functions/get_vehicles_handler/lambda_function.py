@@ -1,106 +1,104 @@
 import os
 import json
-import boto3
-from decimal import Decimal
+import gzip
+import time
+import base64
 from botocore.exceptions import ClientError
-from google.cloud import language_v1
 
-# Initialize S3 and other clients
-s3_client = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb')
-
-# Download the JSON file from S3 to /tmp
-bucket_name = 'dalscooter-vehicle-images-eab8dd1b0fadbd67'  # Replace with your bucket name
-object_key = 'service-account-key.json'      # Replace with your object key
-local_path = '/tmp/service-account-key.json'
-
-s3_client.download_file(bucket_name, object_key, local_path)
-
-def sentiment_label(score):
-    if score >= 0.6:
-        return "Excellent"
-    elif score >= 0.3:
-        return "Good"
-    elif score >= 0.0:
-        return "Moderate"
-    elif score >= -0.3:
-        return "Reasonable"
-    else:
-        return "Bad"
-
-# Helper function to convert Decimal to float/int for JSON serialization
-def decimal_to_json_serializable(obj):
-    if isinstance(obj, Decimal):
-        if obj % 1 == 0:
-            return int(obj)
-        return float(obj)
-    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
-
-def analyze_sentiment(text):
-    client = language_v1.LanguageServiceClient.from_service_account_json(local_path)
-    document = language_v1.Document(content=text, type_=language_v1.Document.Type.PLAIN_TEXT)
-    response = client.analyze_sentiment(request={"document": document})
-    return response.document_sentiment.score, response.document_sentiment.magnitude
+from fleet_snapshot import (
+    SOURCE_TABLES, SNAPSHOT_MAX_STALENESS, build_fleet, load_snapshot, fleet_etag, decimal_to_json_serializable
+)
+from change_markers import read_versions
+
+# Only enable where the gateway decodes isBase64Encoded bodies (HTTP API, function URL);
+# the REST API compresses responses itself via minimum_compression_size
+GZIP_RESPONSES = os.environ.get('GZIP_RESPONSES', 'false').lower() == 'true'
+GZIP_MIN_BYTES = int(os.environ.get('GZIP_MIN_BYTES', '1024'))
+# Set to false to always assemble the fleet from the tables
+SERVE_SNAPSHOT = os.environ.get('SERVE_SNAPSHOT', 'true').lower() == 'true'
+
+RESPONSE_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET,OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type',
+    # Clients may keep the body but must revalidate it with If-None-Match
+    'Cache-Control': 'no-cache'
+}
+
+def request_header(event, name):
+    headers = event.get('headers') or {}
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+def etag_matches(if_none_match, current):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    # Compression-aware proxies may weaken the validator to W/"..."
+    return '*' in candidates or any(tag == current or tag == 'W/' + current for tag in candidates)
+
+def accepts_gzip(event):
+    accept_encoding = request_header(event, 'accept-encoding') or ''
+    return any(part.split(';')[0].strip() == 'gzip' for part in accept_encoding.split(','))
+
+def fleet_body(versions):
+    """
+    Return (body, etag) for the current fleet.
+
+    The precomputed snapshot is served when it matches the change markers or
+    is within the staleness bound; otherwise the fleet is assembled live.
+    """
+    if SERVE_SNAPSHOT:
+        body, metadata = load_snapshot()
+        if body is not None:
+            age = time.time() - metadata['built_at']
+            if metadata['versions'] == versions or age <= SNAPSHOT_MAX_STALENESS:
+                print(f"Serving snapshot built {age:.0f}s ago")
+                return body.decode('utf-8'), metadata['etag']
+            print(f"Snapshot is {age:.0f}s old and behind the change markers, assembling live")
+
+    vehicles = build_fleet()
+    return json.dumps(vehicles, default=decimal_to_json_serializable), fleet_etag(versions)
 
 def handler(event, context):
     try:
-        vehicles_table = dynamodb.Table('DALScooterVehicles')
-        bookings_table = dynamodb.Table('DALScooterBookings')
-        feedback_table = dynamodb.Table('DALScooter-FeedbackTable')
-
-        vehicles_response = vehicles_table.scan()
-        vehicles = vehicles_response.get('Items', [])
-
-        bookings_response = bookings_table.scan()
-        bookings = bookings_response.get('Items', [])
-        print("Fetched bookings:", bookings)
-
-        feedback_response = feedback_table.scan()
-        feedbacks = feedback_response.get('Items', [])
-        print("Fetched feedbacks:", feedbacks)
-
-        booking_to_vehicle_map = {}
-        for booking in bookings:
-            booking_to_vehicle_map[booking.get('bookingID')] = booking.get('vehicleID')
-
-        for vehicle in vehicles:
-            vehicle_feedbacks = [
-                {
-                    'message': f['feedbackMessage'],
-                    'timestamp': f['timestamp']
-                } for f in feedbacks if f.get('bookingReferenceCode') in booking_to_vehicle_map and booking_to_vehicle_map[f.get('bookingReferenceCode')] == vehicle.get('vehicleID')
-            ]
-            total_score = 0.0
-            total_magnitude = 0.0
-            feedback_with_sentiment = []
-            for feedback in vehicle_feedbacks:
-                score, magnitude = analyze_sentiment(feedback['message'])
-                feedback_with_sentiment.append({
-                    'message': feedback['message'],
-                    'timestamp': feedback['timestamp'],
-                    'sentiment_score': score,
-                    'sentiment_magnitude': magnitude
-                })
-                total_score += score
-                total_magnitude += magnitude
-            vehicle['feedbacks'] = feedback_with_sentiment
-            vehicle['overall_sentiment'] = {
-                'average_score': total_score / len(vehicle_feedbacks) if vehicle_feedbacks else 0.0,
-                'total_magnitude': total_magnitude if vehicle_feedbacks else 0.0
+        # Check the validator before reading any table
+        versions = read_versions(SOURCE_TABLES)
+        current_etag = fleet_etag(versions)
+        if_none_match = request_header(event, 'if-none-match')
+        if etag_matches(if_none_match, current_etag):
+            return {
+                'statusCode': 304,
+                'headers': dict(RESPONSE_HEADERS, ETag=current_etag),
+                'body': ''
             }
-            vehicle['overall_sentiment']['label'] = sentiment_label(vehicle['overall_sentiment']['average_score'])
 
+        body, body_etag = fleet_body(versions)
+        headers = dict(RESPONSE_HEADERS, ETag=body_etag)
+        # A client may already hold the (slightly stale) snapshot being served
+        if etag_matches(if_none_match, body_etag):
+            return {
+                'statusCode': 304,
+                'headers': headers,
+                'body': ''
+            }
 
-        body = json.dumps(vehicles, default=decimal_to_json_serializable)
+        if GZIP_RESPONSES and len(body) >= GZIP_MIN_BYTES and accepts_gzip(event):
+            headers['Content-Encoding'] = 'gzip'
+            headers['Vary'] = 'Accept-Encoding'
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': base64.b64encode(gzip.compress(body.encode('utf-8'), compresslevel=6)).decode('ascii'),
+                'isBase64Encoded': True
+            }
 
         return {
             'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET,OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            },
+            'headers': headers,
             'body': body
         }
 
@@ -5,6 +5,9 @@ import random
 from datetime import datetime
 import logging
 
+from idempotency import process_once
+from lookup_cache import LookupCache, VEHICLE_OPERATORS
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -22,41 +25,43 @@ FROM_EMAIL = os.environ.get('FROM_EMAIL')
 BOOKING_TABLE_NAME = os.environ.get('BOOKING_TABLE_NAME')
 VEHICLE_TABLE_NAME = os.environ.get('VEHICLE_TABLE_NAME')  # New environment variable
 
+# vehicle -> franchise operator, kept across invocations
+vehicle_operators = LookupCache('vehicle-operators', marker=VEHICLE_OPERATORS)
+
 def lambda_handler(event, context):
     """
     Lambda function to process messages from SQS queue
-    and forward them to the responsible franchise operator
+    and forward them to the responsible franchise operator.
+
+    Each record is processed on its own: failed records are reported in
+    batchItemFailures so SQS retries only those, and the idempotency ledger
+    skips concerns an earlier delivery already assigned and notified.
     """
-    try:
-        logger.info("Received event: %s", json.dumps(event))
-        
-        if 'Records' in event:
-            for record in event['Records']:
-                if 'body' in record:
-                    if record.get('eventSource') == 'aws:sqs':
-                        body = json.loads(record['body'])
-                        if 'Message' in body:
-                            message_payload = json.loads(body['Message'])
-                        else:
-                            message_payload = body
-                        process_customer_concern(message_payload)
-        
-        return {
-            'statusCode': 200,
-            'body': json.dumps({'message': 'Messages processed successfully'})
-        }
-        
-    except Exception as e:
-        logger.error(f"Error processing messages: {str(e)}")
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
-        }
+    logger.info("Received event: %s", json.dumps(event))
+
+    failures = []
+    for record in event.get('Records', []):
+        if 'body' not in record or record.get('eventSource') != 'aws:sqs':
+            continue
+        try:
+            body = json.loads(record['body'])
+            if 'Message' in body:
+                message_payload = json.loads(body['Message'])
+            else:
+                message_payload = body
+            key = f"concern#{message_payload.get('messageId') or record['messageId']}"
+            process_once(key, process_customer_concern, message_payload)
+        except Exception as e:
+            logger.error(f"Error processing message {record.get('messageId')}: {str(e)}")
+            failures.append({'itemIdentifier': record['messageId']})
+
+    logger.info(f"Lookup cache: {vehicle_operators.stats()}")
+    return {'batchItemFailures': failures}
 
 def process_customer_concern(message):
     """Process a customer concern and assign it to the responsible franchise operator"""
+    message_id = message.get('messageId')
     try:
-        message_id = message.get('messageId')
         booking_reference = message.get('bookingReferenceCode')
         customer_id = message.get('customerId')
         concern_message = message.get('concernMessage')
@@ -94,7 +99,12 @@ def process_customer_concern(message):
     except Exception as e:
         logger.error(f"Error processing customer concern: {str(e)}")
         if message_id:
-            update_message_status(message_id, 'ERROR', str(e))
+            try:
+                update_message_status(message_id, 'ERROR', str(e))
+            except Exception:
+                pass
+        # Surface the failure so that this record is retried
+        raise
 
 def get_responsible_franchise_operator(booking_reference):
     """Get the franchise operator responsible for the given booking"""
@@ -114,17 +124,12 @@ def get_responsible_franchise_operator(booking_reference):
         logger.info(f"Found vehicleId: {vehicle_id} for booking: {booking_reference}")
         
         # Step 2: Look up the vehicle to get franchiseOperatorId
-        vehicle_table = dynamodb.Table(VEHICLE_TABLE_NAME)
-        vehicle_response = vehicle_table.get_item(
-            Key={'vehicleID': vehicle_id}
-        )
-        vehicle_item = vehicle_response.get('Item')
+        franchise_operator_id = vehicle_operators.get(vehicle_id, load_vehicle_operator)
         
-        if not vehicle_item or 'operatorID' not in vehicle_item:
+        if not franchise_operator_id:
             logger.warning(f"No franchiseOperatorId found for vehicle: {vehicle_id}")
             return None
         
-        franchise_operator_id = vehicle_item['operatorID']
         logger.info(f"Found franchiseOperatorId: {franchise_operator_id} for vehicle: {vehicle_id}")
         
         # # Step 3: Look up the operator details
@@ -137,7 +142,16 @@ def get_responsible_franchise_operator(booking_reference):
         
     except Exception as e:
         logger.error(f"Error getting responsible franchise operator: {str(e)}")
-        return None
+        raise
+
+def load_vehicle_operator(vehicle_id):
+    """operatorID of the vehicle, or None"""
+    vehicle_table = dynamodb.Table(VEHICLE_TABLE_NAME)
+    vehicle_response = vehicle_table.get_item(
+        Key={'vehicleID': vehicle_id},
+        ProjectionExpression='operatorID'
+    )
+    return vehicle_response.get('Item', {}).get('operatorID')
 
 # [Keep the remaining functions (update_message_status, notify_franchise_operator, send_email_notification) unchanged]
 def update_message_status(message_id, status, status_message, franchise_operator_id=None):
@@ -167,6 +181,7 @@ def update_message_status(message_id, status, status_message, franchise_operator
         
     except Exception as e:
         logger.error(f"Error updating message status: {str(e)}")
+        raise
 
 def notify_franchise_operator(operator, message_id, booking_reference, customer_id, concern_message):
     """Notify the franchise operator about the new customer concern"""
@@ -213,6 +228,7 @@ def notify_franchise_operator(operator, message_id, booking_reference, customer_
         
     except Exception as e:
         logger.error(f"Error sending notification: {str(e)}")
+        raise
 
 # def send_email_notification(email, message_id, booking_reference, concern_message):
 #     """Send an email notification to the franchise operator"""
@@ -4,14 +4,17 @@ import uuid
 import os
 from datetime import datetime
 import logging
+from boto3.dynamodb.types import TypeSerializer
+
+from outbox import event_put
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Initialize AWS clients
-sns_client = boto3.client('sns')
-dynamodb = boto3.resource('dynamodb')
+dynamodb = boto3.client('dynamodb')
+serializer = TypeSerializer()
 
 # Get environment variables
 SNS_TOPIC_ARN = os.environ.get('SNS_TOPIC_ARN')
@@ -68,22 +71,9 @@ def lambda_handler(event, context):
             'status': 'SUBMITTED'
         }
         
-        # Publish message to SNS topic
-        logger.info(f"Publishing message to SNS topic: {SNS_TOPIC_ARN}")
-        response = sns_client.publish(
-            TopicArn=SNS_TOPIC_ARN,
-            Message=json.dumps(message_payload),
-            MessageAttributes={
-                'MessageType': {
-                    'DataType': 'String',
-                    'StringValue': 'CustomerConcern'
-                }
-            }
-        )
-        
-        # Log message to DynamoDB
-        table = dynamodb.Table(MESSAGE_TABLE_NAME)
-        table.put_item(Item={
+        # Log message to DynamoDB together with its SNS event; outbox-relay
+        # publishes the event, so the request does not wait on SNS
+        message_item = {
             'messageId': message_id,
             'customerId': body['customerId'],
             'bookingReferenceCode': body['bookingReferenceCode'],
@@ -95,9 +85,18 @@ def lambda_handler(event, context):
             'franchiseOperatorId': None,
             'responseMessage': None,
             'responseTimestamp': None
-        })
-        
-        logger.info(f"Message published successfully with MessageId: {response['MessageId']}")
+        }
+        dynamodb.transact_write_items(TransactItems=[
+            {
+                'Put': {
+                    'TableName': MESSAGE_TABLE_NAME,
+                    'Item': {key: serializer.serialize(value) for key, value in message_item.items()}
+                }
+            },
+            event_put(SNS_TOPIC_ARN, message_payload, message_type='CustomerConcern')
+        ])
+
+        logger.info(f"Concern {message_id} stored for publishing")
         
         return {
             'statusCode': 200,
@@ -1,20 +1,16 @@
 import json
 import logging
-import boto3
-import os
+
+import user_notifications
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize clients
-sns_client = boto3.client('sns')
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['DYNAMODB_TABLE'])
-
 def lambda_handler(event, context):
     """
-    Lambda function to process SNS notifications and publish to user-specific topic
+    Lambda function to process SNS notifications and forward them to the
+    operator through the shared user notification topic
     """
     try:
         logger.info("Received event: %s", json.dumps(event))
@@ -44,7 +40,7 @@ def lambda_handler(event, context):
         }
 
 def process_notification(message, franchise_operator_email):
-    """Process the notification and publish to the user-specific topic"""
+    """Process the notification and publish it to the operator, addressed by email"""
     try:
         # Use the raw message as is since it's plain text
         booking_reference = None
@@ -58,23 +54,15 @@ def process_notification(message, franchise_operator_email):
             elif 'Concern:' in line:
                 concern_message = line.replace('Concern:', '').strip()
         
-        # Retrieve the topic ARN from DynamoDB
-        response = table.get_item(Key={'userID': franchise_operator_email})
-        item = response.get('Item')
-        if not item or 'topicArn' not in item:
-            logger.error(f"No topic ARN found for email: {franchise_operator_email}")
-            return
-        
-        topic_arn = item['topicArn']
         readable_message = f"New Customer Concern for Booking {booking_reference or 'N/A'}:\nConcern: {concern_message}"
         
-        sns_client.publish(
-            TopicArn=topic_arn,
-            Message=readable_message,
-            Subject="New Customer Concern"
+        user_notifications.publish(
+            franchise_operator_email,
+            readable_message,
+            subject="New Customer Concern"
         )
         
-        logger.info(f"Notification published to {topic_arn} for {franchise_operator_email}")
+        logger.info(f"Notification published for {franchise_operator_email}")
         
     except Exception as e:
         logger.error(f"Error processing notification for {franchise_operator_email}: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,25 @@
+import json
+import logging
+
+from outbox import relay_stream, sweep
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+def lambda_handler(event, context):
+    """
+    Lambda function draining the outbox table to SNS.
+
+    Triggered by the outbox table stream, it reports failed records so that
+    only the unpublished part of a batch is retried. The scheduled rule
+    (or {"action": "sweep"}) republishes events the stream gave up on.
+    """
+    if event.get('action') == 'sweep' or event.get('source') == 'aws.events':
+        result = sweep()
+        return {
+            'statusCode': 200,
+            'body': json.dumps(result)
+        }
+
+    return {'batchItemFailures': relay_stream(event.get('Records', []))}
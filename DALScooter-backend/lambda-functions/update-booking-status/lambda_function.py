@@ -2,87 +2,407 @@ import json
 import boto3
 import os
 
+from booking_times import to_epoch, find_conflicts
+from booking_reservations import confirm_update, lock_puts, slot_starts, slot_window, lock_key, MAX_TRANSACTION_ITEMS
+from dynamo_batch import batch_get
+from user_notifications import notification_put
+
 dynamodb = boto3.resource('dynamodb')
+dynamodb_client = boto3.client('dynamodb')
 bookings_table = dynamodb.Table(os.environ['TABLE_NAME'])
-users_table = dynamodb.Table(os.environ['USERS_TABLE_NAME'])
-sns = boto3.client('sns')
 
-def handler(event, context):
-    try:
-        body = json.loads(event.get('body', '{}'))
-        booking_id = body.get('bookingID')
-        action = body.get('action').lower()
+# Bookings per bulk request; each takes an update, a notification and, when
+# accepted, one slot lock per slot it covers
+MAX_BULK_UPDATES = int(os.environ.get('MAX_BULK_UPDATES', '100'))
+MAX_TRANSACTION_ATTEMPTS = 3
 
-        if not booking_id or action not in ['accept', 'deny']:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'POST,OPTIONS'
-                },
-                'body': json.dumps({'error': 'bookingID and valid action (accept/deny) are required'})
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'POST,OPTIONS'
+}
+
+def requested_updates(body):
+    """
+    ([(bookingID, new_status)], invalid results) from {"updates": [{"bookingID", "action"}, ...]}
+    or {"bookingIDs": [...], "action": ...}. Entries without a string bookingID
+    or with an action other than accept/deny are reported as invalid.
+    """
+    if 'updates' in body:
+        updates = body['updates'] if isinstance(body['updates'], list) else []
+        entries = [(update.get('bookingID'), update.get('action')) if isinstance(update, dict) else (update, None) for update in updates]
+    else:
+        booking_ids = body['bookingIDs'] if isinstance(body['bookingIDs'], list) else []
+        entries = [(booking_id, body.get('action')) for booking_id in booking_ids]
+    wanted, invalid = [], []
+    for booking_id, action in entries:
+        action = action.lower() if isinstance(action, str) else None
+        if isinstance(booking_id, str) and booking_id and action in ['accept', 'deny']:
+            wanted.append((booking_id, 'confirmed' if action == 'accept' else 'denied'))
+        else:
+            invalid.append({'bookingID': booking_id, 'result': 'invalid'})
+    return wanted, invalid
+
+def booking_window(booking):
+    return (
+        int(booking.get('startEpoch') or to_epoch(booking['startTime'])),
+        int(booking.get('endEpoch') or to_epoch(booking['endTime']))
+    )
+
+def notification(email, booking_id, new_status):
+    return notification_put(email, f'Your booking {booking_id} has been {new_status}.', subject=f'Booking {booking_id} Update')
+
+def overlapping_pending(confirmed):
+    """Pending bookings overlapping any of the confirmed bookings, which now can never be accepted"""
+    confirmed_ids = {booking['bookingID'] for booking in confirmed}
+    overlapping = set()
+    for booking in confirmed:
+        if 'vehicleID' not in booking:
+            continue
+        # Sharing a slot is enough to conflict with the booking's locks
+        start_epoch, end_epoch = slot_window(*booking_window(booking))
+        for item in find_conflicts(dynamodb_client, os.environ['TABLE_NAME'], booking['vehicleID'], start_epoch, end_epoch, status='pending'):
+            if item['bookingID']['S'] not in confirmed_ids:
+                overlapping.add(item['bookingID']['S'])
+    if not overlapping:
+        return []
+    # The index does not project email; read the full bookings in one batch
+    return batch_get(dynamodb, os.environ['TABLE_NAME'], [{'bookingID': booking_id} for booking_id in overlapping])
+
+def claims_slots(booking, new_status):
+    # Legacy bookings without a vehicleID have no slots to lock; they are
+    # confirmed without claiming any
+    return new_status == 'confirmed' and 'vehicleID' in booking
+
+def status_operations(booking, new_status):
+    """
+    Transaction items of one status change as [(operation, kind)], kind being
+    'status', 'lock' or None. Confirming also claims the booking's slot locks.
+    """
+    booking_id = booking['bookingID']
+    if new_status == 'confirmed':
+        update = confirm_update(booking_id, os.environ['TABLE_NAME'])
+    else:
+        update = {
+            'Update': {
+                'TableName': os.environ['TABLE_NAME'],
+                'Key': {'bookingID': {'S': booking_id}},
+                'UpdateExpression': 'SET #status = :status',
+                'ConditionExpression': '#status = :pending',
+                'ExpressionAttributeNames': {'#status': 'status'},
+                'ExpressionAttributeValues': {':status': {'S': new_status}, ':pending': {'S': 'pending'}}
             }
+        }
+    # A failed condition returns the booking's current state with the cancellation
+    update['Update']['ReturnValuesOnConditionCheckFailure'] = 'ALL_OLD'
+    operations = [(update, 'status')]
+    if claims_slots(booking, new_status):
+        operations.extend((lock, 'lock') for lock in lock_puts(booking_id, booking['vehicleID'], *booking_window(booking)))
+    if booking.get('email'):
+        operations.append((notification(booking['email'], booking_id, new_status), None))
+    return operations
 
-        new_status = 'confirmed' if action == 'accept' else 'denied'
-        bookings_table.update_item(
-            Key={'bookingID': booking_id},
-            UpdateExpression='SET #status = :status',
-            ExpressionAttributeNames={'#status': 'status'},
-            ExpressionAttributeValues={':status': new_status}
+def change_chunks(changes):
+    """Split (booking, new_status) pairs into lists that fit one transaction each"""
+    chunk, size = [], 0
+    for booking, new_status in changes:
+        count = len(status_operations(booking, new_status))
+        if chunk and size + count > MAX_TRANSACTION_ITEMS:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append((booking, new_status))
+        size += count
+    if chunk:
+        yield chunk
+
+def status_transaction(chunk):
+    """Conditional status updates for (booking, new_status) pairs, with their locks and customer notifications"""
+    transact_items, owners = [], []
+    for booking, new_status in chunk:
+        for operation, kind in status_operations(booking, new_status):
+            transact_items.append(operation)
+            owners.append((booking['bookingID'], kind) if kind else None)
+    return transact_items, owners
+
+def rejections(owners, reasons):
+    """
+    {bookingID: result} for the changes a cancelled status transaction
+    rejected: 'not_found' or 'not_pending' (with the current status) when the
+    status condition failed, 'slot_taken' when a slot lock was held
+    """
+    rejected = {}
+    for owner, reason in zip(owners, reasons):
+        if not owner or reason.get('Code') != 'ConditionalCheckFailed':
+            continue
+        booking_id, kind = owner
+        if kind == 'lock':
+            # A booking that is no longer pending may hold these locks itself
+            rejected.setdefault(booking_id, {'bookingID': booking_id, 'result': 'slot_taken'})
+        elif not reason.get('Item'):
+            rejected[booking_id] = {'bookingID': booking_id, 'result': 'not_found'}
+        else:
+            status = reason['Item'].get('status', {}).get('S')
+            rejected[booking_id] = {'bookingID': booking_id, 'result': 'not_pending', 'status': status}
+    return rejected
+
+def apply_status_changes(changes, results, extra_items=()):
+    """
+    Write (booking, new_status) pairs in conditional transactions, recording
+    each outcome in results. Bookings that stopped being pending, or whose
+    slots another confirmed booking holds, are dropped from their chunk and
+    the rest is retried. extra_items (notifications of the caller) ride along
+    with the first transaction when they fit.
+    """
+    applied = []
+    extra_items = list(extra_items)
+    for chunk in list(change_chunks(changes)) or [[]]:
+        for _ in range(MAX_TRANSACTION_ATTEMPTS):
+            transact_items, owners = status_transaction(chunk)
+            extra = extra_items if len(transact_items) + len(extra_items) <= MAX_TRANSACTION_ITEMS else []
+            if not transact_items and not extra:
+                break
+            try:
+                dynamodb_client.transact_write_items(TransactItems=transact_items + extra)
+            except dynamodb_client.exceptions.TransactionCanceledException as e:
+                rejected = rejections(owners, e.response.get('CancellationReasons', []))
+                results.update(rejected)
+                # Otherwise a concurrent transaction got in the way: retry as is
+                chunk = [(booking, new_status) for booking, new_status in chunk if booking['bookingID'] not in rejected]
+                continue
+            for booking, new_status in chunk:
+                results[booking['bookingID']] = {
+                    'bookingID': booking['bookingID'],
+                    'result': 'updated',
+                    'status': new_status,
+                    'notified': bool(booking.get('email'))
+                }
+            applied.extend(chunk)
+            if extra:
+                extra_items = []
+            break
+        else:
+            for booking, _ in chunk:
+                results[booking['bookingID']] = {'bookingID': booking['bookingID'], 'result': 'failed'}
+    if extra_items:
+        dynamodb_client.transact_write_items(TransactItems=extra_items)
+    return applied
+
+def deny_overlapping(confirmed, results, losers=()):
+    """
+    Deny every pending booking overlapping a confirmed one, plus the losers
+    (accepts whose slots another confirmed booking already held), and notify
+    their customers. Neither can ever be confirmed any more.
+    """
+    overlapping = overlapping_pending(confirmed)
+    denied_ids = {booking['bookingID'] for booking in overlapping}
+    denials = overlapping + [booking for booking in losers if booking['bookingID'] not in denied_ids]
+    if not denials:
+        return []
+    applied = apply_status_changes([(booking, 'denied') for booking in denials], results)
+    return [booking for booking, _ in applied]
+
+def confirm_resolving_overlaps(booking):
+    """
+    Confirm a pending booking and deny the pending requests overlapping it in
+    one transaction, together with every customer notification.
+
+    Returns (outcome, denied): outcome is {'result': 'updated'} or the
+    rejection of the booking (see rejections()), denied the overlapping
+    bookings that were denied. A request that stopped being pending is left
+    out and the transaction retried. Only denials that do not fit next to the
+    booking's slot locks (a long booking with many overlaps) follow in
+    further transactions, after the confirmation committed.
+    """
+    overlapping = overlapping_pending([booking])
+    for _ in range(MAX_TRANSACTION_ATTEMPTS):
+        first, *rest = change_chunks([(booking, 'confirmed')] + [(other, 'denied') for other in overlapping])
+        transact_items, owners = status_transaction(first)
+        try:
+            dynamodb_client.transact_write_items(TransactItems=transact_items)
+        except dynamodb_client.exceptions.TransactionCanceledException as e:
+            rejected = rejections(owners, e.response.get('CancellationReasons', []))
+            if booking['bookingID'] in rejected:
+                return rejected[booking['bookingID']], []
+            # Otherwise a denial went stale or a concurrent transaction got in the way
+            overlapping = [other for other in overlapping if other['bookingID'] not in rejected]
+            continue
+        spilled = apply_status_changes([change for chunk in rest for change in chunk], {})
+        return {'result': 'updated'}, [other for other, _ in first[1:]] + [other for other, _ in spilled]
+    return {'result': 'failed'}, []
+
+def bulk_update(updates):
+    """Apply many (bookingID, new_status) changes with batched reads and writes; one result per bookingID"""
+    results = {}
+    wanted = []
+    for booking_id, new_status in updates:
+        # The first action for a booking wins
+        if booking_id not in results:
+            wanted.append((booking_id, new_status))
+            results[booking_id] = None
+
+    bookings = {
+        booking['bookingID']: booking
+        for booking in batch_get(
+            dynamodb, os.environ['TABLE_NAME'], [{'bookingID': booking_id} for booking_id, _ in wanted],
+            projection='bookingID, email, vehicleID, #status, startTime, endTime, startEpoch, endEpoch',
+            names={'#status': 'status'}
         )
+    }
+    changes = []
+    claimed = set()
+    for booking_id, new_status in wanted:
+        booking = bookings.get(booking_id)
+        if not booking:
+            results[booking_id] = {'bookingID': booking_id, 'result': 'not_found'}
+        elif booking.get('status') != 'pending':
+            results[booking_id] = {'bookingID': booking_id, 'result': 'not_pending', 'status': booking.get('status')}
+        elif claims_slots(booking, new_status):
+            # Of two accepted bookings sharing a slot only the first can be
+            # confirmed; a transaction also cannot put the same lock twice
+            locks = {lock_key(booking['vehicleID'], slot) for slot in slot_starts(*booking_window(booking))}
+            if locks & claimed:
+                results[booking_id] = {'bookingID': booking_id, 'result': 'slot_taken'}
+                continue
+            claimed |= locks
+            changes.append((booking, new_status))
+        else:
+            changes.append((booking, new_status))
 
-        # Fetch booking to get the email
-        booking = bookings_table.get_item(Key={'bookingID': booking_id}).get('Item', {})
-        if not booking or 'email' not in booking:
+    applied = apply_status_changes(changes, results)
+
+    # Accepts that lost their slot (to another booking of this request or an
+    # earlier confirmation) can never be confirmed and are denied with the
+    # overlapping requests. They are reported once, in their own result.
+    losers = [bookings[booking_id] for booking_id, result in results.items() if result['result'] == 'slot_taken']
+    denied = deny_overlapping([booking for booking, new_status in applied if new_status == 'confirmed'], {}, losers)
+    auto_denied = []
+    for booking in denied:
+        if booking['bookingID'] in results:
+            results[booking['bookingID']]['status'] = 'denied'
+        else:
+            auto_denied.append(booking['bookingID'])
+
+    return list(results.values()), auto_denied
+
+def handler(event, context):
+    try:
+        body = json.loads(event.get('body', '{}'))
+
+        # Bulk form: many bookingIDs in one request, one result per booking
+        if 'updates' in body or 'bookingIDs' in body:
+            updates, invalid = requested_updates(body)
+            if not 0 < len(updates) + len(invalid) <= MAX_BULK_UPDATES:
+                return {
+                    'statusCode': 400,
+                    'headers': CORS_HEADERS,
+                    'body': json.dumps({'error': f'Between 1 and {MAX_BULK_UPDATES} bookings per request'})
+                }
+            results, auto_denied = bulk_update(updates)
+            results = invalid + results
             return {
-                'statusCode': 400,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'POST,OPTIONS'
-                },
-                'body': json.dumps({'error': 'Booking or email not found'})
+                'statusCode': 200,
+                'headers': CORS_HEADERS,
+                'body': json.dumps({
+                    'updated': sum(result['result'] == 'updated' for result in results),
+                    'results': results,
+                    'autoDenied': auto_denied
+                })
             }
 
-        # Lookup user data to get topicArn
-        user_data = users_table.get_item(Key={'userID': booking['email']}).get('Item', {})
-        topic_arn = user_data.get('topicArn')
-        if not topic_arn:
+        booking_id = body.get('bookingID')
+        action = body.get('action')
+        action = action.lower() if isinstance(action, str) else None
+
+        if not isinstance(booking_id, str) or not booking_id or action not in ['accept', 'deny']:
             return {
                 'statusCode': 400,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'POST,OPTIONS'
-                },
-                'body': json.dumps({'message': 'Topic ARN not found. Subscription may not be set up.'})
+                'headers': CORS_HEADERS,
+                'body': json.dumps({'error': 'bookingID and valid action (accept/deny) are required'})
             }
 
-        # Send notification via SNS
-        notification_message = f'Your booking {booking_id} has been {new_status}.'
-        sns.publish(
-            TopicArn=topic_arn,
-            Message=notification_message,
-            Subject=f'Booking {booking_id} Update'
-        )
+        new_status = 'confirmed' if action == 'accept' else 'denied'
+        if new_status == 'confirmed':
+            # Confirming claims the booking's slot locks and denies the
+            # overlapping requests, which needs the vehicle and window up
+            # front. Those never change once a booking is written, so this read
+            # needs no consistency and no status: whether the booking is still
+            # pending is decided by the transaction's condition alone.
+            booking = bookings_table.get_item(
+                Key={'bookingID': booking_id},
+                ProjectionExpression='bookingID, vehicleID, email, startTime, endTime, startEpoch, endEpoch'
+            ).get('Item')
+            outcome, auto_denied = confirm_resolving_overlaps(booking) if booking else ({'result': 'not_found'}, [])
+            if outcome['result'] == 'not_found':
+                return {
+                    'statusCode': 404,
+                    'headers': CORS_HEADERS,
+                    'body': json.dumps({'error': 'Booking not found'})
+                }
+            if outcome['result'] == 'not_pending':
+                return {
+                    'statusCode': 409,
+                    'headers': CORS_HEADERS,
+                    'body': json.dumps({'error': f"Booking {booking_id} is already {outcome['status']}"})
+                }
+            if outcome['result'] == 'slot_taken':
+                # Another confirmed booking holds one of its slots: it lost
+                response = {'error': f"Vehicle {booking['vehicleID']} is already booked in an overlapping slot"}
+                if deny_overlapping([], {}, losers=[booking]):
+                    response['status'] = 'denied'
+                return {
+                    'statusCode': 409,
+                    'headers': CORS_HEADERS,
+                    'body': json.dumps(response)
+                }
+            if outcome['result'] == 'failed':
+                return {
+                    'statusCode': 500,
+                    'headers': CORS_HEADERS,
+                    'body': json.dumps({'error': f'Booking {booking_id} could not be confirmed, please retry'})
+                }
+        else:
+            # Flip the status in place and get the booking back from the same write.
+            # Only a pending booking can be denied, as in the bulk form; the
+            # condition also keeps a deny from creating an item.
+            try:
+                booking = bookings_table.update_item(
+                    Key={'bookingID': booking_id},
+                    UpdateExpression='SET #status = :status',
+                    ConditionExpression='#status = :pending',
+                    ExpressionAttributeNames={'#status': 'status'},
+                    ExpressionAttributeValues={':status': new_status, ':pending': 'pending'},
+                    ReturnValues='ALL_NEW',
+                    ReturnValuesOnConditionCheckFailure='ALL_OLD'
+                )['Attributes']
+            except bookings_table.meta.client.exceptions.ConditionalCheckFailedException as e:
+                current = e.response.get('Item')
+                if not current:
+                    return {
+                        'statusCode': 404,
+                        'headers': CORS_HEADERS,
+                        'body': json.dumps({'error': 'Booking not found'})
+                    }
+                return {
+                    'statusCode': 409,
+                    'headers': CORS_HEADERS,
+                    'body': json.dumps({'error': f"Booking {booking_id} is already {current.get('status', {}).get('S')}"})
+                }
+            # The customer is only known from the update, so the notification follows it
+            if booking.get('email'):
+                dynamodb_client.transact_write_items(TransactItems=[notification(booking['email'], booking_id, new_status)])
+            auto_denied = []
 
         return {
             'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'POST,OPTIONS'
-            },
-            'body': json.dumps({'message': f'Booking {booking_id} {new_status} successfully'})
+            'headers': CORS_HEADERS,
+            'body': json.dumps({
+                'message': f'Booking {booking_id} {new_status} successfully',
+                'autoDenied': [other['bookingID'] for other in auto_denied]
+            })
         }
     except Exception as e:
         return {
             'statusCode': 500,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'POST,OPTIONS'
-            },
+            'headers': CORS_HEADERS,
             'body': json.dumps({'error': str(e)})
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,37 @@
+import json
+import os
+import logging
+import boto3
+
+from user_notifications import subscribe
+from user_provisioning import provision
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource('dynamodb')
+table = dynamodb.Table(os.environ['DYNAMODB_TABLE'])
+
+def lambda_handler(event, context):
+    """
+    Lambda function provisioning new users off the signup path.
+
+    Each SQS record carries one provisioning job published by the outbox
+    relay. Failed jobs are reported in batchItemFailures, so SQS retries only
+    those until they land in the DLQ; the user item tracks the status.
+    """
+    failures = []
+    provisioned = 0
+    for record in event.get('Records', []):
+        try:
+            job = json.loads(json.loads(record['body'])['Message'])
+            attempt = int(record.get('attributes', {}).get('ApproximateReceiveCount', '1'))
+            provision(table, subscribe, job, attempt)
+            provisioned += 1
+        except Exception as e:
+            logger.error(f"Provisioning from message {record.get('messageId')} failed: {str(e)}")
+            failures.append({'itemIdentifier': record['messageId']})
+
+    logger.info(f"Provisioned {provisioned} users, {len(failures)} failed")
+    return {'batchItemFailures': failures}
@@ -0,0 +1,142 @@
+import os
+import json
+import math
+import boto3
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from pagination import fetch_page, InvalidCursor
+from booking_times import parse_time, find_conflicts
+from booking_reservations import slot_window
+
+# Initialize DynamoDB resource
+dynamodb = boto3.resource('dynamodb')
+dynamodb_client = boto3.client('dynamodb')
+
+VEHICLE_TABLE = os.environ.get('VEHICLE_TABLE', 'DALScooterVehicles')
+BOOKING_TABLE = os.environ.get('BOOKING_TABLE', 'DALScooterBookings')
+# Conflict queries in flight at once
+QUERY_CONCURRENCY = int(os.environ.get('AVAILABILITY_QUERY_CONCURRENCY', '16'))
+DEFAULT_LIMIT = int(os.environ.get('DEFAULT_PAGE_SIZE', '20'))
+# Every vehicle on a page costs one conflict query, which bounds the page size
+MAX_LIMIT = int(os.environ.get('MAX_PAGE_SIZE', '100'))
+
+vehicles_table = dynamodb.Table(VEHICLE_TABLE)
+
+CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET,OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type'
+}
+
+# Helper function to convert Decimal to float/int for JSON serialization
+def decimal_to_json_serializable(obj):
+    if isinstance(obj, Decimal):
+        if obj % 1 == 0:
+            return int(obj)
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+def is_available(vehicle_id, start_epoch, end_epoch):
+    """
+    True when no confirmed booking of the vehicle overlaps [start_epoch,
+    end_epoch): one bounded range query on VehicleStartIndex, the same check
+    book_vehicle's slot locks enforce. Confirmed bookings are exactly the
+    ones holding slot locks; pending requests do not make a vehicle
+    unavailable.
+    """
+    return not find_conflicts(dynamodb_client, BOOKING_TABLE, vehicle_id, start_epoch, end_epoch)
+
+def load_vehicles(vehicle_type, limit, cursor):
+    """(vehicles, next_cursor) for one page of the fleet, or of one type via TypeIndex"""
+    if vehicle_type:
+        operation, request = vehicles_table.query, {'IndexName': 'TypeIndex', 'KeyConditionExpression': Key('type').eq(vehicle_type)}
+    else:
+        operation, request = vehicles_table.scan, {}
+    return fetch_page(operation, limit, cursor, scope={'type': vehicle_type}, **request)
+
+def handler(event, context):
+    """
+    Vehicles free for the whole [start, end) window, one page of the fleet at
+    a time: GET /availability?start=&end=[&type=][&limit=][&cursor=].
+
+    Each request reads one page of vehicles (at most `limit`) and runs one
+    bounded conflict query per vehicle on it, so its cost does not grow with
+    the fleet. Booked vehicles are left out, so a page can hold fewer than
+    `limit` items; follow nextCursor until it is null to see every vehicle.
+    """
+    params = event.get('queryStringParameters') or {}
+    if not params.get('start') or not params.get('end'):
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': 'start and end are required'})
+        }
+
+    try:
+        start = parse_time(params['start'])
+        end = parse_time(params['end'])
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': 'start and end must be ISO 8601 timestamps'})
+        }
+    if end <= start:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': 'End time must be after start time'})
+        }
+
+    try:
+        limit = int(params.get('limit') or DEFAULT_LIMIT)
+    except ValueError:
+        limit = 0
+    if limit < 1 or limit > MAX_LIMIT:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': f"limit must be between 1 and {MAX_LIMIT}"})
+        }
+
+    try:
+        # book_vehicle rejects any window sharing a slot with a confirmed
+        # booking, so the window is rounded out to whole slots (from the same
+        # floored epochs as booking_times.to_epoch) before checking
+        window = slot_window(math.floor(start), math.floor(end))
+        vehicles, next_cursor = load_vehicles(params.get('type'), limit, params.get('cursor'))
+        free = []
+        if vehicles:
+            with ThreadPoolExecutor(max_workers=min(QUERY_CONCURRENCY, len(vehicles))) as executor:
+                free = list(executor.map(lambda vehicle: is_available(vehicle['vehicleID'], *window), vehicles))
+        available = [vehicle for vehicle, is_free in zip(vehicles, free) if is_free]
+
+        return {
+            'statusCode': 200,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'items': available, 'nextCursor': next_cursor}, default=decimal_to_json_serializable)
+        }
+
+    except InvalidCursor as e:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': str(e)})
+        }
+
+    except ClientError as e:
+        return {
+            'statusCode': 500,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': f"DynamoDB error: {str(e)}"})
+        }
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': f"Internal server error: {str(e)}"})
+        }
@@ -0,0 +1,118 @@
+import os
+import json
+import boto3
+from decimal import Decimal
+from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
+
+from pagination import fetch_page, InvalidCursor
+from sentiment_aggregates import summarize
+
+# Initialize DynamoDB resource
+dynamodb = boto3.resource('dynamodb')
+
+VEHICLE_TABLE = os.environ.get('TABLE_NAME', 'DALScooterVehicles')
+SENTIMENT_AGGREGATE_TABLE = os.environ.get('SENTIMENT_AGGREGATE_TABLE', 'DALScooter-VehicleSentiment')
+DEFAULT_LIMIT = int(os.environ.get('DEFAULT_PAGE_SIZE', '20'))
+# BatchGetItem takes at most 100 keys, which bounds the page size
+MAX_LIMIT = min(int(os.environ.get('MAX_PAGE_SIZE', '100')), 100)
+
+vehicles_table = dynamodb.Table(VEHICLE_TABLE)
+
+CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET,OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type'
+}
+
+# Helper function to convert Decimal to float/int for JSON serialization
+def decimal_to_json_serializable(obj):
+    if isinstance(obj, Decimal):
+        if obj % 1 == 0:
+            return int(obj)
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+def build_request(vehicle_type, operator_id):
+    """
+    Pick the cheapest read for the requested filters.
+
+    Operator fleets are much smaller than a whole vehicle type, so when both
+    filters are given the OperatorIndex is queried and type is filtered.
+    Without any filter the table is scanned, one bounded page at a time.
+    """
+    if operator_id:
+        request = {'IndexName': 'OperatorIndex', 'KeyConditionExpression': Key('operatorID').eq(operator_id)}
+        if vehicle_type:
+            request['FilterExpression'] = Attr('type').eq(vehicle_type)
+        return vehicles_table.query, request
+    if vehicle_type:
+        return vehicles_table.query, {'IndexName': 'TypeIndex', 'KeyConditionExpression': Key('type').eq(vehicle_type)}
+    return vehicles_table.scan, {}
+
+def load_sentiment(vehicle_ids):
+    """Fetch the sentiment aggregates for one page of vehicles"""
+    if not vehicle_ids:
+        return {}
+    request = {SENTIMENT_AGGREGATE_TABLE: {'Keys': [{'vehicleID': vehicle_id} for vehicle_id in vehicle_ids]}}
+    aggregates = {}
+    while request:
+        response = dynamodb.batch_get_item(RequestItems=request)
+        for item in response.get('Responses', {}).get(SENTIMENT_AGGREGATE_TABLE, []):
+            aggregates[item['vehicleID']] = item
+        request = response.get('UnprocessedKeys')
+    return aggregates
+
+def handler(event, context):
+    params = event.get('queryStringParameters') or {}
+    vehicle_type = params.get('type')
+    operator_id = params.get('operatorID')
+
+    try:
+        limit = int(params.get('limit') or DEFAULT_LIMIT)
+    except ValueError:
+        limit = 0
+    if limit < 1 or limit > MAX_LIMIT:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': f"limit must be between 1 and {MAX_LIMIT}"})
+        }
+
+    try:
+        operation, request = build_request(vehicle_type, operator_id)
+        vehicles, next_cursor = fetch_page(
+            operation, limit, params.get('cursor'),
+            scope={'type': vehicle_type, 'operatorID': operator_id},
+            **request
+        )
+
+        aggregates = load_sentiment([vehicle['vehicleID'] for vehicle in vehicles])
+        for vehicle in vehicles:
+            vehicle['overall_sentiment'] = summarize(aggregates.get(vehicle['vehicleID']))
+
+        return {
+            'statusCode': 200,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'items': vehicles, 'nextCursor': next_cursor}, default=decimal_to_json_serializable)
+        }
+
+    except InvalidCursor as e:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': str(e)})
+        }
+    except ClientError as e:
+        return {
+            'statusCode': 500,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': f"DynamoDB error: {str(e)}"})
+        }
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': f"Internal server error: {str(e)}"})
+        }
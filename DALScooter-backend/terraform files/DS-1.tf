@@ -14,15 +14,21 @@ resource "aws_dynamodb_table" "dalscooter_users" {
   }
 }
 
+data "archive_file" "auth_handler_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/auth-handler"
+  output_path = "${path.module}/auth_handler.zip"
+}
+
 # Lambda Function for Auth Handler (NO cycle-inducing env vars)
 resource "aws_lambda_function" "auth_handler_lambda" {
-  filename         = "auth_handler.zip"
+  filename         = data.archive_file.auth_handler_zip.output_path
   function_name    = "DALScooterAuthHandler"
   role             = "arn:aws:iam::101784748999:role/LabRole"
   handler          = "lambda_function.lambda_handler"
   runtime          = "python3.9"
   timeout          = 30
-  source_code_hash = filebase64sha256("auth_handler.zip")
+  source_code_hash = data.archive_file.auth_handler_zip.output_base64sha256
 
   environment {
     variables = {
@@ -30,8 +36,14 @@ resource "aws_lambda_function" "auth_handler_lambda" {
       USER_POOL_ID        = "us-east-1_HEWUlCpbQ"
       USER_POOL_CLIENT_ID = "1k0g35186fql2ksgc3j3db11k9"
       # USER_POOL_ID and CLIENT_ID intentionally omitted to avoid dependency cycle
+      USER_NOTIFICATIONS_TOPIC_ARN = aws_sns_topic.user_notifications.arn
+      USER_NOTIFICATIONS_LEGACY_TOPICS = local.user_notifications.legacy_topics
+      USER_PROVISIONING_TOPIC_ARN  = aws_sns_topic.user_provisioning.arn # Published through the outbox
+      OUTBOX_TABLE                 = aws_dynamodb_table.outbox.name
     }
   }
+
+  layers = [aws_lambda_layer_version.common.arn]
 }
 
 # Cognito User Pool
@@ -115,6 +127,9 @@ resource "aws_lambda_permission" "cognito_invoke" {
 resource "aws_api_gateway_rest_api" "dalscooter_api" {
   name        = "DALScooterAPI"
   description = "API for DALScooter application"
+
+  # Gzip responses of 1 KB or more for clients sending Accept-Encoding
+  minimum_compression_size = 1024
 }
 
 # API Gateway Resource (/auth)
@@ -278,10 +293,16 @@ resource "aws_api_gateway_deployment" "dalscooter_api_deployment" {
     aws_api_gateway_integration.add_vehicle_lambda_integration,
     aws_api_gateway_integration.add_vehicle_options_integration,
     aws_api_gateway_integration.get_vehicles_integration,
+    aws_api_gateway_integration.vehicle_catalog_integration,
+    aws_api_gateway_integration.vehicle_catalog_options_integration,
+    aws_api_gateway_integration.vehicle_availability_integration,
+    aws_api_gateway_integration.vehicle_availability_options_integration,
     aws_api_gateway_method.book_vehicle_method,
     aws_api_gateway_integration.book_vehicle_integration,
     aws_api_gateway_method.book_vehicle_options_method,
     aws_api_gateway_integration.book_vehicle_options_integration,
+    aws_api_gateway_integration.batch_book_vehicles_integration,
+    aws_api_gateway_integration.batch_book_vehicles_options_integration,
     aws_api_gateway_method.get_bookings_method,
     aws_api_gateway_integration.get_bookings_integration,
     aws_api_gateway_method.get_bookings_options_method,
@@ -301,6 +322,10 @@ resource "aws_dynamodb_table" "dalscooter_vehicles" {
   billing_mode = "PAY_PER_REQUEST"
   hash_key     = "vehicleID"
 
+  # Stream writes to the change-marker Lambda
+  stream_enabled   = true
+  stream_view_type = "KEYS_ONLY"
+
   attribute {
     name = "vehicleID"
     type = "S"
@@ -338,14 +363,20 @@ resource "aws_api_gateway_authorizer" "cognito_auth" {
 }
 
 # Lambda Function to Add Vehicle
+data "archive_file" "add_vehicle_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/add_vehicle_handler"
+  output_path = "${path.module}/add_vehicle_handler.zip"
+}
+
 resource "aws_lambda_function" "add_vehicle_lambda" {
-  filename         = "add_vehicle_handler.zip" # Zip your add_vehicle_lambda.py
+  filename         = data.archive_file.add_vehicle_zip.output_path
   function_name    = "DALScooterAddVehicle"
   role             = "arn:aws:iam::101784748999:role/LabRole"
   handler          = "lambda_function.lambda_handler"
   runtime          = "python3.9"
   timeout          = 30
-  source_code_hash = filebase64sha256("add_vehicle_handler.zip")
+  source_code_hash = data.archive_file.add_vehicle_zip.output_base64sha256
 
   environment {
     variables = {
@@ -353,6 +384,8 @@ resource "aws_lambda_function" "add_vehicle_lambda" {
       USER_TABLE = aws_dynamodb_table.dalscooter_users.name
     }
   }
+
+  layers = [aws_lambda_layer_version.common.arn]
 }
 
 # Lambda Permission for API Gateway (Add Vehicle)
@@ -187,9 +187,12 @@ resource "aws_lambda_function" "message_publisher" {
     variables = {
       SNS_TOPIC_ARN     = aws_sns_topic.customer_concerns.arn
       MESSAGE_TABLE_NAME = aws_dynamodb_table.dalscooter_messages.name
+      OUTBOX_TABLE      = aws_dynamodb_table.outbox.name
     }
   }
 
+  layers = [aws_lambda_layer_version.common.arn]
+
   tags = {
     Name        = "DALScooter-MessagePublisher"
     Environment = "dev"
@@ -216,9 +219,13 @@ resource "aws_lambda_function" "message_processor" {
       FROM_EMAIL           = "noreply@dalscooter.example.com"  # Update with a valid email
       BOOKING_TABLE_NAME   = aws_dynamodb_table.dalscooter_bookings.name
       VEHICLE_TABLE_NAME   = aws_dynamodb_table.dalscooter_vehicles.name
+      IDEMPOTENCY_TABLE    = aws_dynamodb_table.idempotency.name
+      CHANGE_MARKER_TABLE  = aws_dynamodb_table.change_markers.name # Lookup cache invalidation
     }
   }
 
+  layers = [aws_lambda_layer_version.common.arn]
+
   tags = {
     Name        = "DALScooter-MessageProcessor"
     Environment = "dev"
@@ -234,6 +241,9 @@ resource "aws_lambda_event_source_mapping" "sqs_to_message_processor" {
   function_name    = aws_lambda_function.message_processor.function_name
   batch_size       = 10
   enabled          = true
+
+  # Only the records listed in batchItemFailures are retried
+  function_response_types = ["ReportBatchItemFailures"]
 }
 
 # -----------------------------------------------------
@@ -383,10 +393,14 @@ resource "aws_lambda_function" "notification_processor" {
   environment {
     variables = {
       NOTIFICATION_TOPIC_ARN = aws_sns_topic.notifications.arn
-      DYNAMODB_TABLE = aws_dynamodb_table.dalscooter_users.name
+      USER_NOTIFICATIONS_TOPIC_ARN = aws_sns_topic.user_notifications.arn
+      DYNAMODB_TABLE = aws_dynamodb_table.dalscooter_users.name # Per-user topics of users not migrated yet
+      USER_NOTIFICATIONS_LEGACY_TOPICS = local.user_notifications.legacy_topics
     }
   }
 
+  layers = [aws_lambda_layer_version.common.arn]
+
   tags = {
     Name        = "DALScooter-NotificationProcessor"
     Environment = "dev"
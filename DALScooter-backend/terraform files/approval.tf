@@ -15,7 +15,11 @@ resource "aws_sns_topic_policy" "booking_requests_policy" {
         Resource  = aws_sns_topic.booking_requests.arn
         Condition = {
           ArnLike = {
-            "aws:SourceArn" = "${aws_lambda_function.book_vehicle.arn}"
+            "aws:SourceArn" = [
+              aws_lambda_function.book_vehicle.arn,
+              aws_lambda_function.batch_book_vehicles.arn,
+              aws_lambda_function.outbox_relay.arn
+            ]
           }
         }
       }
@@ -26,7 +30,7 @@ resource "aws_sns_topic_policy" "booking_requests_policy" {
 # sqs.tf
 resource "aws_sqs_queue" "booking_queue" {
   name                       = "DALScooterBookingQueue"
-  visibility_timeout_seconds = 30
+  visibility_timeout_seconds = max(30, 6 * local.approval_timeout) # AWS recommends 6x the Lambda timeout
   message_retention_seconds  = 345600 # 4 days
   delay_seconds              = 0
   receive_wait_time_seconds  = 10
@@ -87,23 +91,50 @@ data "archive_file" "approval_zip" {
   output_path = "${path.module}/approval_lambda.zip"
 }
 
+# Operator digest mode. "off" notifies operators once per booking request;
+# "batch" sends one summary per operator for each SQS batch. The trigger then
+# collects requests for up to window_seconds (the maximum delay of a request)
+# and flushes early once flush_threshold requests are waiting.
+locals {
+  approval_digest = {
+    mode            = "off"
+    window_seconds  = 60
+    flush_threshold = 200
+  }
+  # A digest batch carries up to flush_threshold requests instead of 10, so
+  # the approval Lambda gets more time, and the queue hides in-flight
+  # messages for at least as long as the Lambda may run.
+  approval_timeout = local.approval_digest.mode == "off" ? 10 : 60
+}
+
 resource "aws_lambda_function" "approve_booking" {
   function_name = "DALScooterApproveBooking"
   handler       = "lambda_function.handler"
   runtime       = "python3.12"
   role          = "arn:aws:iam::101784748999:role/LabRole" # Using existing LabRole
   filename      = data.archive_file.approval_zip.output_path
-  timeout       = 10
+  source_code_hash = data.archive_file.approval_zip.output_base64sha256
+  timeout       = local.approval_timeout
 
   environment {
     variables = {
       TABLE_NAME       = aws_dynamodb_table.dalscooter_bookings.name
       OPERATOR_TOPIC_ARN = aws_sns_topic.booking_requests.arn # Reuse for simplicity
-      USER_DYNAMODB_TABLE = aws_dynamodb_table.dalscooter_users.name
       VEHICLES_DYNAMODB_TABLE = aws_dynamodb_table.dalscooter_vehicles.name
+      PUBLISH_CONCURRENCY = "10" # Whole batch at once without digest mode; 10 operators at a time in digest mode
+      PUBLISH_RESERVE_MS = "3000" # Leave later notifications to redelivery this close to the timeout
+      IDEMPOTENCY_TABLE = aws_dynamodb_table.idempotency.name
+      DIGEST_MODE = local.approval_digest.mode
+      DIGEST_MAX_REQUESTS = "50" # Booking requests listed per summary email
+      CHANGE_MARKER_TABLE = aws_dynamodb_table.change_markers.name # Lookup cache invalidation
+      USER_NOTIFICATIONS_TOPIC_ARN = aws_sns_topic.user_notifications.arn
+      DYNAMODB_TABLE = aws_dynamodb_table.dalscooter_users.name # Per-user topics of users not migrated yet
+      USER_NOTIFICATIONS_LEGACY_TOPICS = local.user_notifications.legacy_topics
     }
   }
 
+  layers = [aws_lambda_layer_version.common.arn]
+
   tags = {
     Name = "DALScooterApproveBooking"
   }
@@ -112,7 +143,12 @@ resource "aws_lambda_function" "approve_booking" {
 resource "aws_lambda_event_source_mapping" "sqs_trigger" {
   event_source_arn = aws_sqs_queue.booking_queue.arn
   function_name    = aws_lambda_function.approve_booking.arn
-  batch_size       = 10
+  batch_size       = local.approval_digest.mode == "off" ? 10 : local.approval_digest.flush_threshold
+
+  maximum_batching_window_in_seconds = local.approval_digest.mode == "off" ? 0 : local.approval_digest.window_seconds
+
+  # Only the records listed in batchItemFailures are retried
+  function_response_types = ["ReportBatchItemFailures"]
 }
 
 # New Lambda for fetching pending bookings
@@ -128,15 +164,19 @@ resource "aws_lambda_function" "get_pending_bookings" {
   runtime       = "python3.12"
   role          = "arn:aws:iam::101784748999:role/LabRole" # Using existing LabRole
   filename      = data.archive_file.get_pending_bookings_zip.output_path
+  source_code_hash = data.archive_file.get_pending_bookings_zip.output_base64sha256
   timeout       = 10
 
   environment {
     variables = {
       TABLE_NAME           = aws_dynamodb_table.dalscooter_bookings.name
       VEHICLES_TABLE_NAME  = aws_dynamodb_table.dalscooter_vehicles.name # Assuming vehicles table exists
+      MAX_PAGE_SIZE        = "100"
     }
   }
 
+  layers = [aws_lambda_layer_version.common.arn]
+
   tags = {
     Name = "DALScooterGetPendingBookings"
   }
@@ -155,16 +195,26 @@ resource "aws_lambda_function" "update_booking_status" {
   runtime       = "python3.12"
   role          = "arn:aws:iam::101784748999:role/LabRole" # Using existing LabRole
   filename      = data.archive_file.update_booking_status_zip.output_path
-  timeout       = 10
+  source_code_hash = data.archive_file.update_booking_status_zip.output_base64sha256
+  timeout       = 30 # Bulk requests update up to MAX_BULK_UPDATES bookings
 
   environment {
     variables = {
       TABLE_NAME          = aws_dynamodb_table.dalscooter_bookings.name
       OPERATOR_TOPIC_ARN  = aws_sns_topic.booking_requests.arn # For notifications if needed
-      USERS_TABLE_NAME    = aws_dynamodb_table.dalscooter_users.name
+      BOOKING_LOCK_TABLE  = aws_dynamodb_table.booking_locks.name
+      BOOKING_SLOT_MINUTES = "15" # Must match book_vehicle; accepting claims the slot locks
+      OUTBOX_TABLE        = aws_dynamodb_table.outbox.name
+      MAX_BULK_UPDATES    = "100"
+      MAX_BOOKING_HOURS   = "24" # Must match book_vehicle; bounds the overlap query
+      USER_NOTIFICATIONS_TOPIC_ARN = aws_sns_topic.user_notifications.arn
+      DYNAMODB_TABLE = aws_dynamodb_table.dalscooter_users.name # Per-user topics of users not migrated yet
+      USER_NOTIFICATIONS_LEGACY_TOPICS = local.user_notifications.legacy_topics
     }
   }
 
+  layers = [aws_lambda_layer_version.common.arn]
+
   tags = {
     Name = "DALScooterUpdateBookingStatus"
   }
@@ -0,0 +1,128 @@
+data "archive_file" "batch_book_vehicles_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/batch-book-vehicles"
+  output_path = "${path.module}/batch_book_vehicles_handler.zip"
+}
+
+# Lambda Function for group bookings: several vehicles/windows in one request
+resource "aws_lambda_function" "batch_book_vehicles" {
+  function_name    = "DALScooterBatchBookVehicles"
+  handler          = "lambda_function.handler"
+  runtime          = "python3.12"
+  role             = "arn:aws:iam::101784748999:role/LabRole"
+  filename         = data.archive_file.batch_book_vehicles_zip.output_path
+  source_code_hash = data.archive_file.batch_book_vehicles_zip.output_base64sha256
+  timeout          = 15
+
+  environment {
+    variables = {
+      TABLE_NAME           = aws_dynamodb_table.dalscooter_bookings.name
+      VEHICLES_TABLE_NAME  = aws_dynamodb_table.dalscooter_vehicles.name
+      SNS_TOPIC_ARN        = aws_sns_topic.booking_requests.arn
+      MAX_BOOKING_HOURS    = "24"
+      BOOKING_LOCK_TABLE   = aws_dynamodb_table.booking_locks.name
+      BOOKING_SLOT_MINUTES = "15"
+      MAX_BATCH_BOOKINGS   = "25"
+      OUTBOX_TABLE         = aws_dynamodb_table.outbox.name
+    }
+  }
+
+  layers = [aws_lambda_layer_version.common.arn]
+}
+
+resource "aws_api_gateway_resource" "batch_book_vehicles_resource" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  parent_id   = aws_api_gateway_rest_api.dalscooter_api.root_resource_id
+  path_part   = "batch-book-vehicles"
+}
+
+resource "aws_api_gateway_method" "batch_book_vehicles_method" {
+  rest_api_id   = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id   = aws_api_gateway_resource.batch_book_vehicles_resource.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "batch_book_vehicles_integration" {
+  rest_api_id             = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id             = aws_api_gateway_resource.batch_book_vehicles_resource.id
+  http_method             = aws_api_gateway_method.batch_book_vehicles_method.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.batch_book_vehicles.invoke_arn
+}
+
+resource "aws_api_gateway_method_response" "batch_book_vehicles_response_200" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.batch_book_vehicles_resource.id
+  http_method = aws_api_gateway_method.batch_book_vehicles_method.http_method
+  status_code = "200"
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin"  = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Headers" = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "batch_book_vehicles_integration_response_200" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.batch_book_vehicles_resource.id
+  http_method = aws_api_gateway_method.batch_book_vehicles_method.http_method
+  status_code = aws_api_gateway_method_response.batch_book_vehicles_response_200.status_code
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+    "method.response.header.Access-Control-Allow-Methods" = "'POST,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token'"
+  }
+  depends_on = [aws_api_gateway_integration.batch_book_vehicles_integration]
+}
+
+resource "aws_api_gateway_method" "batch_book_vehicles_options_method" {
+  rest_api_id   = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id   = aws_api_gateway_resource.batch_book_vehicles_resource.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "batch_book_vehicles_options_integration" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.batch_book_vehicles_resource.id
+  http_method = aws_api_gateway_method.batch_book_vehicles_options_method.http_method
+  type        = "MOCK"
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "batch_book_vehicles_options_response_200" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.batch_book_vehicles_resource.id
+  http_method = aws_api_gateway_method.batch_book_vehicles_options_method.http_method
+  status_code = "200"
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin"  = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Headers" = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "batch_book_vehicles_options_integration_response_200" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.batch_book_vehicles_resource.id
+  http_method = aws_api_gateway_method.batch_book_vehicles_options_method.http_method
+  status_code = aws_api_gateway_method_response.batch_book_vehicles_options_response_200.status_code
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+    "method.response.header.Access-Control-Allow-Methods" = "'POST,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token'"
+  }
+  depends_on = [aws_api_gateway_integration.batch_book_vehicles_options_integration]
+}
+
+resource "aws_lambda_permission" "apigw_batch_book_vehicles" {
+  statement_id  = "AllowAPIGatewayInvokeBatchBookVehicles"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.batch_book_vehicles.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.dalscooter_api.execution_arn}/*/batch-book-vehicles"
+}
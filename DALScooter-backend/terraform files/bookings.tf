@@ -4,6 +4,10 @@ resource "aws_dynamodb_table" "dalscooter_bookings" {
   billing_mode   = "PAY_PER_REQUEST"
   hash_key       = "bookingID"
 
+  # Stream writes to the change-marker Lambda
+  stream_enabled   = true
+  stream_view_type = "KEYS_ONLY"
+
   attribute {
     name = "bookingID"
     type = "S"
@@ -14,6 +18,31 @@ resource "aws_dynamodb_table" "dalscooter_bookings" {
     type = "S"
   }
 
+  attribute {
+    name = "startEpoch"
+    type = "N"
+  }
+
+  attribute {
+    name = "operatorID"
+    type = "S"
+  }
+
+  attribute {
+    name = "status"
+    type = "S"
+  }
+
+  attribute {
+    name = "email"
+    type = "S"
+  }
+
+  attribute {
+    name = "createdAt"
+    type = "S"
+  }
+
   global_secondary_index {
     name               = "VehicleIDIndex"
     hash_key           = "vehicleID"
@@ -22,42 +51,114 @@ resource "aws_dynamodb_table" "dalscooter_bookings" {
     write_capacity     = 0
   }
 
+  # Conflict checks: bounded range query on (vehicleID, startEpoch)
+  global_secondary_index {
+    name               = "VehicleStartIndex"
+    hash_key           = "vehicleID"
+    range_key          = "startEpoch"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["endEpoch", "status", "startTime", "endTime"]
+  }
+
+  # Operator booking queues: one query per (operatorID, status)
+  global_secondary_index {
+    name            = "OperatorStatusIndex"
+    hash_key        = "operatorID"
+    range_key       = "status"
+    projection_type = "ALL"
+  }
+
+  # Customer booking history, newest first
+  global_secondary_index {
+    name            = "EmailCreatedAtIndex"
+    hash_key        = "email"
+    range_key       = "createdAt"
+    projection_type = "ALL"
+  }
+
   tags = {
     Name = "DALScooterBookings"
   }
 }
 
+# One item per (vehicle, 15 minute slot) held by a confirmed booking; pending
+# requests are only checked against them
+resource "aws_dynamodb_table" "booking_locks" {
+  name         = "DALScooterBookingLocks"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "lockKey"
+
+  attribute {
+    name = "lockKey"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = {
+    Name = "DALScooterBookingLocks"
+  }
+}
+
+data "archive_file" "book_vehicle_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/book_vehicle"
+  output_path = "${path.module}/book_vehicle_handler.zip"
+}
+
 # Lambda Function for Book Vehicle
 resource "aws_lambda_function" "book_vehicle" {
-  function_name = "DALScooterBookVehicle"
-  handler       = "lambda_function.handler"
-  runtime       = "python3.12"
-  role          = "arn:aws:iam::101784748999:role/LabRole"
-  filename      = "book_vehicle_handler.zip"
-  timeout       = 10
+  function_name    = "DALScooterBookVehicle"
+  handler          = "lambda_function.handler"
+  runtime          = "python3.12"
+  role             = "arn:aws:iam::101784748999:role/LabRole"
+  filename         = data.archive_file.book_vehicle_zip.output_path
+  source_code_hash = data.archive_file.book_vehicle_zip.output_base64sha256
+  timeout          = 10
 
   environment {
     variables = {
       TABLE_NAME = aws_dynamodb_table.dalscooter_bookings.name
+      VEHICLES_TABLE_NAME = aws_dynamodb_table.dalscooter_vehicles.name
       SNS_TOPIC_ARN = "arn:aws:sns:us-east-1:101784748999:DALScooterBookingRequests"
+      MAX_BOOKING_HOURS = "24"  # Bounds the conflict range query on VehicleStartIndex
+      BOOKING_LOCK_TABLE = aws_dynamodb_table.booking_locks.name
+      BOOKING_SLOT_MINUTES = "15"  # 24h / 15min = 96 locks, within the 100-item transaction limit
+      OUTBOX_TABLE = aws_dynamodb_table.outbox.name
     }
   }
+
+  layers = [aws_lambda_layer_version.common.arn]
+}
+
+data "archive_file" "get_bookings_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/get-bookings"
+  output_path = "${path.module}/get_bookings_handler.zip"
 }
 
 # Lambda Function for Get Bookings
 resource "aws_lambda_function" "get_bookings" {
-  function_name = "DALScooterGetBookings"
-  handler       = "lambda_function.handler"
-  runtime       = "python3.12"
-  role          = "arn:aws:iam::101784748999:role/LabRole"
-  filename      = "book_vehicle_handler.zip"
-  timeout       = 10
+  function_name    = "DALScooterGetBookings"
+  handler          = "lambda_function.handler"
+  runtime          = "python3.12"
+  role             = "arn:aws:iam::101784748999:role/LabRole"
+  filename         = data.archive_file.get_bookings_zip.output_path
+  source_code_hash = data.archive_file.get_bookings_zip.output_base64sha256
+  timeout          = 10
 
   environment {
     variables = {
-      TABLE_NAME = aws_dynamodb_table.dalscooter_bookings.name
+      TABLE_NAME        = aws_dynamodb_table.dalscooter_bookings.name
+      DEFAULT_PAGE_SIZE = "20"
+      MAX_PAGE_SIZE     = "100"
     }
   }
+
+  layers = [aws_lambda_layer_version.common.arn]
 }
 
 # API Gateway Resources
@@ -148,7 +249,10 @@ resource "aws_api_gateway_method" "get_bookings_method" {
   http_method   = "GET"
   authorization = "NONE"  # Optional: Add Cognito if needed
   request_parameters = {
-    "method.request.querystring.email" = true  # Enable email as a required query parameter
+    "method.request.querystring.email"  = true  # Enable email as a required query parameter
+    "method.request.querystring.status" = false
+    "method.request.querystring.limit"  = false
+    "method.request.querystring.cursor" = false
   }
 }
 
@@ -0,0 +1,69 @@
+# Per-table version counters used to build ETags for cached responses
+resource "aws_dynamodb_table" "change_markers" {
+  name         = "DALScooterChangeMarkers"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "tableName"
+
+  # Marker bumps trigger the fleet snapshot builder
+  stream_enabled   = true
+  stream_view_type = "KEYS_ONLY"
+
+  attribute {
+    name = "tableName"
+    type = "S"
+  }
+
+  tags = {
+    Name = "DALScooterChangeMarkers"
+  }
+}
+
+data "archive_file" "change_markers_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/change-markers"
+  output_path = "${path.module}/change_markers.zip"
+}
+
+# Lambda bumping a table's change marker for every batch of stream records
+resource "aws_lambda_function" "change_markers" {
+  function_name    = "DALScooterChangeMarkers"
+  handler          = "lambda_function.lambda_handler"
+  runtime          = "python3.12"
+  role             = "arn:aws:iam::101784748999:role/LabRole"
+  filename         = data.archive_file.change_markers_zip.output_path
+  source_code_hash = data.archive_file.change_markers_zip.output_base64sha256
+  timeout          = 30
+
+  environment {
+    variables = {
+      CHANGE_MARKER_TABLE = aws_dynamodb_table.change_markers.name
+      VEHICLES_DYNAMODB_TABLE = aws_dynamodb_table.dalscooter_vehicles.name # Vehicle changes invalidate cached vehicle operators
+    }
+  }
+
+  layers = [aws_lambda_layer_version.common.arn]
+}
+
+resource "aws_lambda_event_source_mapping" "vehicles_stream_to_change_markers" {
+  event_source_arn                   = aws_dynamodb_table.dalscooter_vehicles.stream_arn
+  function_name                      = aws_lambda_function.change_markers.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+}
+
+resource "aws_lambda_event_source_mapping" "bookings_stream_to_change_markers" {
+  event_source_arn                   = aws_dynamodb_table.dalscooter_bookings.stream_arn
+  function_name                      = aws_lambda_function.change_markers.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+}
+
+resource "aws_lambda_event_source_mapping" "feedback_stream_to_change_markers" {
+  event_source_arn                   = aws_dynamodb_table.feedback_table.stream_arn
+  function_name                      = aws_lambda_function.change_markers.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+}
@@ -0,0 +1,14 @@
+# Shared Python modules (sentiment, aggregates, ...) used by several Lambdas.
+# Everything under common-layer/python is importable from /opt/python at runtime.
+data "archive_file" "common_layer_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/common-layer"
+  output_path = "${path.module}/common_layer.zip"
+}
+
+resource "aws_lambda_layer_version" "common" {
+  layer_name          = "dalscooter-common"
+  filename            = data.archive_file.common_layer_zip.output_path
+  source_code_hash    = data.archive_file.common_layer_zip.output_base64sha256
+  compatible_runtimes = ["python3.9", "python3.12"]
+}
@@ -35,6 +35,10 @@ resource "aws_dynamodb_table" "feedback_table" {
   billing_mode   = "PAY_PER_REQUEST"  # On-demand billing
   hash_key       = "feedbackId"
 
+  # Stream new feedback to the sentiment aggregator and the change-marker Lambda
+  stream_enabled   = true
+  stream_view_type = "NEW_IMAGE"
+
   attribute {
     name = "feedbackId"
     type = "S"  # String
@@ -47,6 +51,96 @@ resource "aws_dynamodb_table" "feedback_table" {
   }
 }
 
+# DynamoDB table for per-vehicle sentiment aggregates (read model for get-vehicles)
+resource "aws_dynamodb_table" "vehicle_sentiment" {
+  name         = "DALScooter-VehicleSentiment"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "vehicleID"
+
+  attribute {
+    name = "vehicleID"
+    type = "S"
+  }
+
+  tags = {
+    Name        = "DALScooter-VehicleSentiment"
+    Environment = "dev"
+    Module      = "Feedback"
+  }
+}
+
+# DynamoDB table caching sentiment results by message hash and backend version
+resource "aws_dynamodb_table" "sentiment_cache" {
+  name         = "DALScooter-SentimentCache"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "cacheKey"
+
+  attribute {
+    name = "cacheKey"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = {
+    Name        = "DALScooter-SentimentCache"
+    Environment = "dev"
+    Module      = "Feedback"
+  }
+}
+
+# Archive the feedback aggregator code
+data "archive_file" "feedback_aggregator_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/feedback-aggregator"
+  output_path = "${path.module}/feedback_aggregator.zip"
+}
+
+# Lambda function scoring new feedback once and updating the vehicle aggregates
+resource "aws_lambda_function" "feedback_aggregator" {
+  function_name    = "DALScooter-FeedbackAggregator"
+  filename         = data.archive_file.feedback_aggregator_zip.output_path
+  source_code_hash = data.archive_file.feedback_aggregator_zip.output_base64sha256
+  role             = "arn:aws:iam::101784748999:role/LabRole"
+  handler          = "lambda_function.lambda_handler"
+  runtime          = "python3.12"
+  timeout          = 300  # Long enough for {"action": "rebuild"} backfills
+  memory_size      = 256
+
+  environment {
+    variables = {
+      FEEDBACK_TABLE_NAME       = aws_dynamodb_table.feedback_table.name
+      BOOKING_TABLE_NAME        = aws_dynamodb_table.dalscooter_bookings.name
+      SENTIMENT_AGGREGATE_TABLE = aws_dynamodb_table.vehicle_sentiment.name
+      SENTIMENT_BACKEND         = "google"  # or "lexicon" for local scoring
+      SENTIMENT_CACHE_TABLE     = aws_dynamodb_table.sentiment_cache.name
+    }
+  }
+
+  layers = [
+    "arn:aws:lambda:us-east-1:101784748999:layer:google:5",
+    aws_lambda_layer_version.common.arn
+  ]
+
+  tags = {
+    Name        = "DALScooter-FeedbackAggregator"
+    Environment = "dev"
+    Module      = "Feedback"
+  }
+}
+
+resource "aws_lambda_event_source_mapping" "feedback_stream_to_aggregator" {
+  event_source_arn               = aws_dynamodb_table.feedback_table.stream_arn
+  function_name                  = aws_lambda_function.feedback_aggregator.arn
+  starting_position              = "LATEST"
+  batch_size                     = 25
+  bisect_batch_on_function_error = true
+  maximum_retry_attempts         = 5
+}
+
 # API Gateway resource for submit-feedback endpoint
 resource "aws_api_gateway_resource" "submit_feedback" {
   rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
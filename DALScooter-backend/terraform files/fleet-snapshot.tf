@@ -0,0 +1,80 @@
+# Precomputed get-vehicles response, stored in the versioned images bucket
+data "archive_file" "fleet_snapshot_builder_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/fleet-snapshot-builder"
+  output_path = "${path.module}/fleet_snapshot_builder.zip"
+}
+
+# Lambda rebuilding the snapshot whenever a change marker moves
+resource "aws_lambda_function" "fleet_snapshot_builder" {
+  function_name    = "DALScooterFleetSnapshotBuilder"
+  handler          = "lambda_function.lambda_handler"
+  runtime          = "python3.12"
+  role             = "arn:aws:iam::101784748999:role/LabRole"
+  filename         = data.archive_file.fleet_snapshot_builder_zip.output_path
+  source_code_hash = data.archive_file.fleet_snapshot_builder_zip.output_base64sha256
+  timeout          = 300
+  memory_size      = 512
+
+  environment {
+    variables = {
+      SNAPSHOT_BUCKET           = aws_s3_bucket.vehicle_images.bucket
+      CHANGE_MARKER_TABLE       = aws_dynamodb_table.change_markers.name
+      SENTIMENT_AGGREGATE_TABLE = aws_dynamodb_table.vehicle_sentiment.name
+      SENTIMENT_BACKEND         = "google"  # or "lexicon" for local scoring
+      SENTIMENT_CACHE_TABLE     = aws_dynamodb_table.sentiment_cache.name
+    }
+  }
+
+  layers = [
+    "arn:aws:lambda:us-east-1:101784748999:layer:google:5",
+    aws_lambda_layer_version.common.arn
+  ]
+}
+
+resource "aws_lambda_event_source_mapping" "change_markers_to_fleet_snapshot" {
+  event_source_arn                   = aws_dynamodb_table.change_markers.stream_arn
+  function_name                      = aws_lambda_function.fleet_snapshot_builder.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 5  # Coalesce bursts of writes into one rebuild
+  maximum_retry_attempts             = 3
+
+  # Only source table markers affect the snapshot; lookup cache markers
+  # (cache:*) share the table but must not trigger rebuilds
+  filter_criteria {
+    filter {
+      pattern = jsonencode({
+        dynamodb = {
+          Keys = {
+            tableName = {
+              S = [
+                aws_dynamodb_table.dalscooter_vehicles.name,
+                aws_dynamodb_table.dalscooter_bookings.name,
+                aws_dynamodb_table.feedback_table.name
+              ]
+            }
+          }
+        }
+      })
+    }
+  }
+}
+
+# Every rebuild writes a new object version; keep a week of history
+resource "aws_s3_bucket_lifecycle_configuration" "fleet_snapshot_history" {
+  bucket = aws_s3_bucket.vehicle_images.id
+
+  rule {
+    id     = "expire-old-fleet-snapshots"
+    status = "Enabled"
+
+    filter {
+      prefix = "fleet-snapshots/"
+    }
+
+    noncurrent_version_expiration {
+      noncurrent_days = 7
+    }
+  }
+}
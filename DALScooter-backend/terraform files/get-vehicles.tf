@@ -1,18 +1,36 @@
+data "archive_file" "get_vehicles_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/get_vehicles_handler"
+  output_path = "${path.module}/get_vehicles_handler.zip"
+}
+
 resource "aws_lambda_function" "get_vehicles" {
-  function_name = "DALScooterGetVehicles"
-  handler       = "lambda_function.handler"
-  runtime       = "python3.12"
-  role          = "arn:aws:iam::101784748999:role/LabRole"
-  filename      = "get_vehicles_handler.zip"
-  timeout       = 10
+  function_name    = "DALScooterGetVehicles"
+  handler          = "lambda_function.handler"
+  runtime          = "python3.12"
+  role             = "arn:aws:iam::101784748999:role/LabRole"
+  filename         = data.archive_file.get_vehicles_zip.output_path
+  source_code_hash = data.archive_file.get_vehicles_zip.output_base64sha256
+  timeout          = 10
 
   environment {
     variables = {
-      TABLE_NAME = aws_dynamodb_table.dalscooter_vehicles.name
+      TABLE_NAME                = aws_dynamodb_table.dalscooter_vehicles.name
+      SENTIMENT_AGGREGATE_TABLE = aws_dynamodb_table.vehicle_sentiment.name
+      SENTIMENT_BACKEND         = "google"  # or "lexicon" for local scoring
+      SENTIMENT_CACHE_TABLE     = aws_dynamodb_table.sentiment_cache.name
+      SENTIMENT_MAX_WORKERS     = "8"  # Concurrent Google NL calls per request
+      SENTIMENT_CALL_TIMEOUT    = "3"  # Seconds, keeps the request under the 10s Lambda timeout
+      CHANGE_MARKER_TABLE       = aws_dynamodb_table.change_markers.name
+      GZIP_RESPONSES            = "false"  # The REST API compresses via minimum_compression_size
+      SNAPSHOT_BUCKET           = aws_s3_bucket.vehicle_images.bucket
+      SNAPSHOT_MAX_STALENESS    = "60"  # Seconds a snapshot behind the change markers may still be served
+      SERVE_SNAPSHOT            = "true"
     }
   }
   layers = [
-    "arn:aws:lambda:us-east-1:101784748999:layer:google:5"
+    "arn:aws:lambda:us-east-1:101784748999:layer:google:5",
+    aws_lambda_layer_version.common.arn
   ]
 }
 
@@ -0,0 +1,21 @@
+# Idempotency ledger of the SQS consumers (approval-lambda, message-processor):
+# one item per booking notification / customer concern already handled
+resource "aws_dynamodb_table" "idempotency" {
+  name         = "DALScooterIdempotency"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "idempotencyKey"
+
+  attribute {
+    name = "idempotencyKey"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = {
+    Name = "DALScooterIdempotency"
+  }
+}
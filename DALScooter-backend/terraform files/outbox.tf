@@ -0,0 +1,100 @@
+# Transactional outbox: handlers write events next to the records they
+# describe, outbox-relay publishes them to SNS from the table stream
+resource "aws_dynamodb_table" "outbox" {
+  name         = "DALScooterOutbox"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "eventID"
+
+  attribute {
+    name = "eventID"
+    type = "S"
+  }
+
+  attribute {
+    name = "pending"
+    type = "S"
+  }
+
+  attribute {
+    name = "createdAt"
+    type = "N"
+  }
+
+  # Sparse: only events not yet published carry `pending`
+  global_secondary_index {
+    name            = "PendingIndex"
+    hash_key        = "pending"
+    range_key       = "createdAt"
+    projection_type = "ALL"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  stream_enabled   = true
+  stream_view_type = "NEW_IMAGE"
+
+  tags = {
+    Name = "DALScooterOutbox"
+  }
+}
+
+data "archive_file" "outbox_relay_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/outbox-relay"
+  output_path = "${path.module}/outbox_relay.zip"
+}
+
+resource "aws_lambda_function" "outbox_relay" {
+  function_name    = "DALScooterOutboxRelay"
+  handler          = "lambda_function.lambda_handler"
+  runtime          = "python3.12"
+  role             = "arn:aws:iam::101784748999:role/LabRole"
+  filename         = data.archive_file.outbox_relay_zip.output_path
+  source_code_hash = data.archive_file.outbox_relay_zip.output_base64sha256
+  timeout          = 60
+
+  environment {
+    variables = {
+      OUTBOX_TABLE       = aws_dynamodb_table.outbox.name
+      OUTBOX_SWEEP_AFTER = "300"
+    }
+  }
+
+  layers = [aws_lambda_layer_version.common.arn]
+
+  tags = {
+    Name = "DALScooterOutboxRelay"
+  }
+}
+
+resource "aws_lambda_event_source_mapping" "outbox_stream" {
+  event_source_arn                   = aws_dynamodb_table.outbox.stream_arn
+  function_name                      = aws_lambda_function.outbox_relay.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+  maximum_retry_attempts             = 10
+  function_response_types            = ["ReportBatchItemFailures"]
+}
+
+# Republish events the stream mapping gave up on
+resource "aws_cloudwatch_event_rule" "outbox_sweep" {
+  name                = "DALScooterOutboxSweep"
+  schedule_expression = "rate(5 minutes)"
+}
+
+resource "aws_cloudwatch_event_target" "outbox_sweep" {
+  rule = aws_cloudwatch_event_rule.outbox_sweep.name
+  arn  = aws_lambda_function.outbox_relay.arn
+}
+
+resource "aws_lambda_permission" "allow_events_outbox_sweep" {
+  statement_id  = "AllowEventBridgeInvokeOutboxSweep"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.outbox_relay.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.outbox_sweep.arn
+}
@@ -0,0 +1,21 @@
+# One topic for all user notifications. Each user's email subscription has a
+# filter policy on the userID message attribute, so notifiers publish with
+# the recipient's userID instead of looking up a per-user topic.
+#
+# Users created before the shared topic keep their per-user topic (topicArn
+# on the user item) until `user_notifications.py --migrate --delete-topics`
+# finds their shared subscription confirmed; notifiers publish there until
+# then. Set legacy_topics to "off" once no user has a topicArn left.
+locals {
+  user_notifications = {
+    legacy_topics = "on"
+  }
+}
+
+resource "aws_sns_topic" "user_notifications" {
+  name = "DALScooterUserNotifications"
+
+  tags = {
+    Name = "DALScooterUserNotifications"
+  }
+}
@@ -0,0 +1,96 @@
+# Signup provisioning off the request path: auth-handler writes a job to the
+# outbox, the relay publishes it here, and user-provisioning subscribes the
+# user to notifications with retries from the queue
+resource "aws_sns_topic" "user_provisioning" {
+  name = "DALScooterUserProvisioning"
+}
+
+resource "aws_sqs_queue" "user_provisioning_dlq" {
+  name                      = "DALScooterUserProvisioningDLQ"
+  message_retention_seconds = 1209600 # 14 days
+
+  tags = {
+    Name = "DALScooterUserProvisioningDLQ"
+  }
+}
+
+resource "aws_sqs_queue" "user_provisioning" {
+  name                       = "DALScooterUserProvisioningQueue"
+  visibility_timeout_seconds = 60 # Delay between attempts; at least the Lambda timeout
+  message_retention_seconds  = 345600 # 4 days
+  receive_wait_time_seconds  = 10
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.user_provisioning_dlq.arn
+    maxReceiveCount     = 5 # Must match MAX_PROVISIONING_ATTEMPTS
+  })
+
+  tags = {
+    Name = "DALScooterUserProvisioningQueue"
+  }
+}
+
+resource "aws_sns_topic_subscription" "user_provisioning_queue_subscription" {
+  topic_arn = aws_sns_topic.user_provisioning.arn
+  protocol  = "sqs"
+  endpoint  = aws_sqs_queue.user_provisioning.arn
+}
+
+resource "aws_sqs_queue_policy" "user_provisioning_queue_policy" {
+  queue_url = aws_sqs_queue.user_provisioning.id
+  policy    = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect    = "Allow"
+        Principal = "*"
+        Action    = "sqs:SendMessage"
+        Resource  = aws_sqs_queue.user_provisioning.arn
+        Condition = {
+          ArnEquals = {
+            "aws:SourceArn" = aws_sns_topic.user_provisioning.arn
+          }
+        }
+      }
+    ]
+  })
+}
+
+data "archive_file" "user_provisioning_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/user-provisioning"
+  output_path = "${path.module}/user_provisioning.zip"
+}
+
+resource "aws_lambda_function" "user_provisioning" {
+  function_name    = "DALScooterUserProvisioning"
+  handler          = "lambda_function.lambda_handler"
+  runtime          = "python3.12"
+  role             = "arn:aws:iam::101784748999:role/LabRole"
+  filename         = data.archive_file.user_provisioning_zip.output_path
+  source_code_hash = data.archive_file.user_provisioning_zip.output_base64sha256
+  timeout          = 30
+
+  environment {
+    variables = {
+      DYNAMODB_TABLE               = aws_dynamodb_table.dalscooter_users.name
+      USER_NOTIFICATIONS_TOPIC_ARN = aws_sns_topic.user_notifications.arn
+      MAX_PROVISIONING_ATTEMPTS    = "5"
+    }
+  }
+
+  layers = [aws_lambda_layer_version.common.arn]
+
+  tags = {
+    Name = "DALScooterUserProvisioning"
+  }
+}
+
+resource "aws_lambda_event_source_mapping" "user_provisioning_trigger" {
+  event_source_arn = aws_sqs_queue.user_provisioning.arn
+  function_name    = aws_lambda_function.user_provisioning.arn
+  batch_size       = 10
+
+  # Only the records listed in batchItemFailures are retried
+  function_response_types = ["ReportBatchItemFailures"]
+}
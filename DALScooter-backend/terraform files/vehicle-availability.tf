@@ -0,0 +1,126 @@
+# Availability search: GET /availability?start=&end=&type=&limit=&cursor=
+data "archive_file" "vehicle_availability_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/vehicle-availability"
+  output_path = "${path.module}/vehicle_availability.zip"
+}
+
+resource "aws_lambda_function" "vehicle_availability" {
+  function_name    = "DALScooterVehicleAvailability"
+  handler          = "lambda_function.handler"
+  runtime          = "python3.12"
+  role             = "arn:aws:iam::101784748999:role/LabRole"
+  filename         = data.archive_file.vehicle_availability_zip.output_path
+  source_code_hash = data.archive_file.vehicle_availability_zip.output_base64sha256
+  timeout          = 10
+
+  environment {
+    variables = {
+      VEHICLE_TABLE          = aws_dynamodb_table.dalscooter_vehicles.name
+      BOOKING_TABLE          = aws_dynamodb_table.dalscooter_bookings.name
+      BOOKING_SLOT_MINUTES   = "15"  # Must match book_vehicle; windows are rounded out to slots
+      MAX_BOOKING_HOURS      = "24"  # Must match book_vehicle; bounds the conflict range query
+      AVAILABILITY_QUERY_CONCURRENCY = "16"  # Per-vehicle conflict queries in flight
+      DEFAULT_PAGE_SIZE      = "20"
+      MAX_PAGE_SIZE          = "100"  # One conflict query per vehicle on a page
+    }
+  }
+  layers = [aws_lambda_layer_version.common.arn]
+}
+
+resource "aws_api_gateway_resource" "vehicle_availability_resource" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  parent_id   = aws_api_gateway_rest_api.dalscooter_api.root_resource_id
+  path_part   = "availability"
+}
+
+resource "aws_api_gateway_method" "vehicle_availability_method" {
+  rest_api_id   = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id   = aws_api_gateway_resource.vehicle_availability_resource.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "vehicle_availability_integration" {
+  rest_api_id             = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id             = aws_api_gateway_resource.vehicle_availability_resource.id
+  http_method             = aws_api_gateway_method.vehicle_availability_method.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.vehicle_availability.invoke_arn
+}
+
+resource "aws_api_gateway_method_response" "vehicle_availability_response_200" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.vehicle_availability_resource.id
+  http_method = aws_api_gateway_method.vehicle_availability_method.http_method
+  status_code = "200"
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin"  = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Headers" = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "vehicle_availability_integration_response_200" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.vehicle_availability_resource.id
+  http_method = aws_api_gateway_method.vehicle_availability_method.http_method
+  status_code = aws_api_gateway_method_response.vehicle_availability_response_200.status_code
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"  # or "'http://localhost:3000'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token'"
+  }
+  depends_on = [aws_api_gateway_integration.vehicle_availability_integration]
+}
+
+resource "aws_api_gateway_method" "vehicle_availability_options_method" {
+  rest_api_id   = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id   = aws_api_gateway_resource.vehicle_availability_resource.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "vehicle_availability_options_integration" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.vehicle_availability_resource.id
+  http_method = aws_api_gateway_method.vehicle_availability_options_method.http_method
+  type        = "MOCK"
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "vehicle_availability_options_response_200" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.vehicle_availability_resource.id
+  http_method = aws_api_gateway_method.vehicle_availability_options_method.http_method
+  status_code = "200"
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin"  = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Headers" = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "vehicle_availability_options_integration_response_200" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.vehicle_availability_resource.id
+  http_method = aws_api_gateway_method.vehicle_availability_options_method.http_method
+  status_code = aws_api_gateway_method_response.vehicle_availability_options_response_200.status_code
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"  # or "'http://localhost:3000'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token'"
+  }
+  depends_on = [aws_api_gateway_integration.vehicle_availability_options_integration]
+}
+
+resource "aws_lambda_permission" "apigw_vehicle_availability" {
+  statement_id  = "AllowAPIGatewayInvokeVehicleAvailability"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.vehicle_availability.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.dalscooter_api.execution_arn}/*/*"
+}
\ No newline at end of file
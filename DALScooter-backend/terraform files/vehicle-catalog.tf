@@ -0,0 +1,124 @@
+# Paginated vehicle catalog: GET /vehicles?type=&operatorID=&limit=&cursor=
+data "archive_file" "vehicle_catalog_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda-functions/vehicle-catalog"
+  output_path = "${path.module}/vehicle_catalog.zip"
+}
+
+resource "aws_lambda_function" "vehicle_catalog" {
+  function_name    = "DALScooterVehicleCatalog"
+  handler          = "lambda_function.handler"
+  runtime          = "python3.12"
+  role             = "arn:aws:iam::101784748999:role/LabRole"
+  filename         = data.archive_file.vehicle_catalog_zip.output_path
+  source_code_hash = data.archive_file.vehicle_catalog_zip.output_base64sha256
+  timeout          = 10
+
+  environment {
+    variables = {
+      TABLE_NAME                = aws_dynamodb_table.dalscooter_vehicles.name
+      SENTIMENT_AGGREGATE_TABLE = aws_dynamodb_table.vehicle_sentiment.name
+      DEFAULT_PAGE_SIZE         = "20"
+      MAX_PAGE_SIZE             = "100"
+    }
+  }
+  # Only reads precomputed sentiment aggregates, so the Google layer is not needed
+  layers = [aws_lambda_layer_version.common.arn]
+}
+
+resource "aws_api_gateway_resource" "vehicle_catalog_resource" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  parent_id   = aws_api_gateway_rest_api.dalscooter_api.root_resource_id
+  path_part   = "vehicles"
+}
+
+resource "aws_api_gateway_method" "vehicle_catalog_method" {
+  rest_api_id   = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id   = aws_api_gateway_resource.vehicle_catalog_resource.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "vehicle_catalog_integration" {
+  rest_api_id             = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id             = aws_api_gateway_resource.vehicle_catalog_resource.id
+  http_method             = aws_api_gateway_method.vehicle_catalog_method.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.vehicle_catalog.invoke_arn
+}
+
+resource "aws_api_gateway_method_response" "vehicle_catalog_response_200" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.vehicle_catalog_resource.id
+  http_method = aws_api_gateway_method.vehicle_catalog_method.http_method
+  status_code = "200"
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin"  = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Headers" = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "vehicle_catalog_integration_response_200" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.vehicle_catalog_resource.id
+  http_method = aws_api_gateway_method.vehicle_catalog_method.http_method
+  status_code = aws_api_gateway_method_response.vehicle_catalog_response_200.status_code
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"  # or "'http://localhost:3000'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token'"
+  }
+  depends_on = [aws_api_gateway_integration.vehicle_catalog_integration]
+}
+
+resource "aws_api_gateway_method" "vehicle_catalog_options_method" {
+  rest_api_id   = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id   = aws_api_gateway_resource.vehicle_catalog_resource.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "vehicle_catalog_options_integration" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.vehicle_catalog_resource.id
+  http_method = aws_api_gateway_method.vehicle_catalog_options_method.http_method
+  type        = "MOCK"
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "vehicle_catalog_options_response_200" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.vehicle_catalog_resource.id
+  http_method = aws_api_gateway_method.vehicle_catalog_options_method.http_method
+  status_code = "200"
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin"  = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Headers" = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "vehicle_catalog_options_integration_response_200" {
+  rest_api_id = aws_api_gateway_rest_api.dalscooter_api.id
+  resource_id = aws_api_gateway_resource.vehicle_catalog_resource.id
+  http_method = aws_api_gateway_method.vehicle_catalog_options_method.http_method
+  status_code = aws_api_gateway_method_response.vehicle_catalog_options_response_200.status_code
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"  # or "'http://localhost:3000'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token'"
+  }
+  depends_on = [aws_api_gateway_integration.vehicle_catalog_options_integration]
+}
+
+resource "aws_lambda_permission" "apigw_vehicle_catalog" {
+  statement_id  = "AllowAPIGatewayInvokeVehicleCatalog"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.vehicle_catalog.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.dalscooter_api.execution_arn}/*/*"
+}
\ No newline at end of file